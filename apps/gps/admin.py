@@ -3,6 +3,7 @@ Django Admin Configuration for GPS Application
 """
 from django.contrib import admin
 from django.contrib.gis.admin import OSMGeoAdmin
+from .admin_paging import EstimatedCountPaginator, GpsDayFilter, KeysetChangeList
 from .models import Match, Player, MacAssignment, GpsData
 
 
@@ -44,13 +45,20 @@ class MacAssignmentAdmin(admin.ModelAdmin):
 class GpsDataAdmin(OSMGeoAdmin):
     """
     Admin interface for GPS data with map display
+
+    Lists are estimated-count, keyset-paged by (timestamp, id) and filtered
+    per day instead of date_hierarchy (see admin_paging.py)
     """
     list_display = ['id', 'timestamp', 'mac', 'latitude', 'longitude',
                     'speed_kmh', 'num_satellites', 'quality']
-    list_filter = ['quality', 'timestamp']
+    list_filter = [GpsDayFilter, 'quality']
     search_fields = ['mac']
-    date_hierarchy = 'timestamp'
     readonly_fields = ['geom']
+    ordering = ['-timestamp', '-id']
+    # Keyset pages need a fixed order
+    sortable_by = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Basic Info', {
@@ -71,3 +79,6 @@ class GpsDataAdmin(OSMGeoAdmin):
     default_center_longitude = 18.9659
     default_center_latitude = 50.2585
     default_zoom = 15
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
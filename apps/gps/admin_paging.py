@@ -0,0 +1,200 @@
+"""
+GPS Admin Paging
+Changelist of gps_data without COUNT(*), OFFSET and date_hierarchy scans
+
+The default changelist ran COUNT(*) over all of gps_data (twice with
+show_full_result_count), paged with OFFSET and built the date hierarchy
+with DISTINCT date_trunc over the whole table. GpsDataAdmin now uses:
+
+- EstimatedCountPaginator: row estimate from pg_class.reltuples (no
+  filters) or from the planner (EXPLAIN) for filtered lists; small results
+  are still counted exactly
+- KeysetChangeList: pages of (timestamp, id) descending, continued with
+  ?before=<timestamp>_<id> instead of ?p=<page>
+- GpsDayFilter: the cached day list of partitions.data_days(); the newest
+  day is selected by default, so every page is pruned to one partition
+"""
+import json
+from datetime import date, datetime
+from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from .partitions import data_days, day_range
+
+# Estimates below this are replaced by an exact COUNT(*)
+EXACT_COUNT_BELOW = 10000
+
+CURSOR_VAR = 'before'
+
+
+def _table_estimate(cursor, table):
+    """reltuples of a table and its partitions (a partitioned parent reports -1)"""
+    cursor.execute(
+        """
+        SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0)::bigint
+        FROM pg_class
+        WHERE oid = to_regclass(%s)
+           OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = to_regclass(%s))
+        """,
+        [table, table],
+    )
+    return cursor.fetchone()[0]
+
+
+def _plan_estimate(cursor, queryset):
+    """Planner row estimate of a filtered queryset"""
+    sql, params = queryset.order_by().query.sql_with_params()
+    cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def estimated_count(queryset):
+    """
+    Row count of a queryset, estimated on PostgreSQL.
+
+    Returns:
+        int: estimate, or the exact count for other databases and for
+        results smaller than EXACT_COUNT_BELOW
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    with connection.cursor() as cursor:
+        if queryset.query.where:
+            estimate = _plan_estimate(cursor, queryset)
+        else:
+            estimate = _table_estimate(cursor, queryset.model._meta.db_table)
+
+    if estimate < EXACT_COUNT_BELOW:
+        return queryset.count()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator whose count is estimated_count() instead of COUNT(*)"""
+
+    @cached_property
+    def count(self):
+        return estimated_count(self.object_list)
+
+
+def encode_cursor(row):
+    return f'{row.timestamp.isoformat()}_{row.pk}'
+
+
+def decode_cursor(value):
+    """
+    (timestamp, id) of a ?before= cursor.
+
+    Raises:
+        IncorrectLookupParameters: Malformed cursor (admin redirects with ?e=1)
+    """
+    try:
+        timestamp, pk = value.rsplit('_', 1)
+        return datetime.fromisoformat(timestamp), int(pk)
+    except ValueError:
+        raise IncorrectLookupParameters(f'Invalid cursor: {value}')
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist paged by (timestamp, id) descending.
+
+    Attributes:
+        cursor: (timestamp, id) of the last row of the previous page, or None
+        next_url: Query string of the next (older) page, or None
+        first_url: Query string of the first (newest) page
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        value = request.GET.get(CURSOR_VAR)
+        self.cursor = decode_cursor(value) if value else None
+        super().__init__(request, *args, **kwargs)
+
+    def get_query_string(self, new_params=None, remove=None):
+        """Links to other filters, searches or orderings start at the first page"""
+        if not new_params or CURSOR_VAR not in new_params:
+            remove = [*(remove or []), CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(request, self.queryset, self.list_per_page)
+
+        queryset = self.queryset
+        if self.cursor is not None:
+            timestamp, pk = self.cursor
+            queryset = queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=pk))
+        rows = list(queryset.order_by('-timestamp', '-pk')[:self.list_per_page + 1])
+
+        has_next = len(rows) > self.list_per_page
+        rows = rows[:self.list_per_page]
+        self.next_url = (
+            self.get_query_string({CURSOR_VAR: encode_cursor(rows[-1])}, [PAGE_VAR])
+            if has_next else None
+        )
+        self.first_url = self.get_query_string(remove=[PAGE_VAR])
+
+        self.result_count = paginator.count
+        # The unfiltered total would be a second estimate of the whole table
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.result_list = rows
+        self.can_show_all = False
+        self.multi_page = has_next or self.cursor is not None
+        self.paginator = paginator
+
+
+class GpsDayFilter(admin.SimpleListFilter):
+    """Local day of the fix, from the cached partitions.data_days() list"""
+    title = 'day'
+    parameter_name = 'day'
+    ALL = 'all'
+
+    def lookups(self, request, model_admin):
+        return [(day.isoformat(), day.isoformat()) for day in data_days()]
+
+    def value(self):
+        value = super().value()
+        if value is None:
+            # Newest day by default: an unfiltered list sorts every partition
+            return self.lookup_choices[0][0] if self.lookup_choices else self.ALL
+        return value
+
+    def choices(self, changelist):
+        value = self.value()
+        yield {
+            'selected': value == self.ALL,
+            'query_string': changelist.get_query_string({self.parameter_name: self.ALL}),
+            'display': 'All days',
+        }
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': value == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value == self.ALL:
+            return queryset
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            raise IncorrectLookupParameters(f'Invalid day: {value}')
+        start, end = day_range(day)
+        return queryset.filter(timestamp__gte=start, timestamp__lt=end)
@@ -8,3 +8,6 @@ class GpsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.gps'
     verbose_name = 'GPS Tracking System'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,144 @@
+"""
+GPS MAC Assignments
+Cached (mac, day) -> (player, match) resolution
+
+GpsData.player and GpsData.match used to run a MacAssignment query per row
+and per property. All assignments of a match day are now loaded once
+(with player and match) into an in-memory map:
+
+- single rows resolve through resolve_assignment() (GpsData properties)
+- batches resolve through player_labels(), one load per distinct day,
+  so history responses carry player names without per-row queries
+- match_macs() decides which match's base station corrects a MAC's fixes
+  (online correction and stored corrected positions)
+- saving or deleting a MacAssignment, Player or Match clears the map
+  (signals.py); other processes pick changes up after ASSIGNMENTS_CACHE_TTL
+
+Days are local calendar days (TIME_ZONE), the same days as Match.date and
+the gps_data partitions.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+import numpy as np
+from django.utils import timezone
+from .correction import tick_to_datetime, to_tick
+from .functions import factorize
+from .partitions import day_range
+
+# Seconds the assignments of a day are cached per process
+ASSIGNMENTS_CACHE_TTL = 60
+
+Assignment = namedtuple('Assignment', ['player', 'match'])
+
+_days = {}
+_days_lock = threading.Lock()
+
+
+def assignments_for_day(day):
+    """
+    {mac: Assignment} of all matches on a local day (cached).
+
+    A MAC assigned in two matches of the same day resolves to the match
+    with the lower id.
+    """
+    now = time.monotonic()
+    with _days_lock:
+        cached = _days.get(day)
+        if cached is not None and now - cached[0] <= ASSIGNMENTS_CACHE_TTL:
+            return cached[1]
+
+    # models.py imports this module
+    from .models import MacAssignment
+
+    assignments = {}
+    for assignment in (
+        MacAssignment.objects.filter(match__date=day)
+        .select_related('player', 'match').order_by('match_id')
+    ):
+        assignments.setdefault(assignment.mac, Assignment(assignment.player, assignment.match))
+
+    with _days_lock:
+        _days[day] = (now, assignments)
+    return assignments
+
+
+def invalidate_assignments():
+    """Drop all cached assignments (called from MacAssignment/Player/Match signals)"""
+    with _days_lock:
+        _days.clear()
+
+
+def match_macs(match):
+    """
+    MACs whose fixes belong to a match: the MACs resolved to it by
+    assignments_for_day() plus its base station (unless assigned elsewhere).
+
+    Base station corrections are stored per fix for these MACs only, so two
+    matches on the same day never overwrite each other's positions.
+    """
+    assignments = assignments_for_day(match.date)
+    macs = {mac for mac, assignment in assignments.items() if assignment.match.id == match.id}
+    if match.base_mac and match.base_mac not in assignments:
+        macs.add(match.base_mac)
+    return macs
+
+
+def local_day(timestamp):
+    return timezone.localtime(timestamp).date() if timezone.is_aware(timestamp) else timestamp.date()
+
+
+def resolve_assignment(mac, timestamp):
+    """Assignment of a MAC at a timestamp, or None"""
+    return assignments_for_day(local_day(timestamp)).get(mac)
+
+
+def local_days(ticks):
+    """
+    Local calendar day of each tick, vectorized (DST-aware).
+
+    Returns:
+        Tuple (days, index): list of consecutive days and the int array
+        index into it for every tick
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    if ticks.size == 0:
+        return [], np.zeros(0, dtype=np.int64)
+
+    first = local_day(tick_to_datetime(ticks.min()))
+    last = local_day(tick_to_datetime(ticks.max()))
+    days = [first + timedelta(days=n) for n in range((last - first).days + 1)]
+    # End tick of every day but the last
+    bounds = np.array([to_tick(day_range(day)[1]) for day in days[:-1]], dtype=np.int64)
+    return days, np.searchsorted(bounds, ticks, side='right')
+
+
+def player_labels(macs, ticks):
+    """
+    Player name of each row, resolved per distinct (MAC, day).
+
+    Args:
+        macs: MAC addresses of the rows
+        ticks: int64 ticks of the rows
+
+    Returns:
+        Object array of player labels, str(Player) (None for unassigned MACs)
+    """
+    macs = np.asarray(macs, dtype=object)
+    labels = np.empty(len(macs), dtype=object)
+    if not len(macs):
+        return labels
+
+    days, day_index = local_days(ticks)
+    codes = factorize(macs)
+    # One resolution per distinct (MAC, day) pair
+    keys = codes * len(days) + day_index
+    unique_keys, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    resolved = np.empty(len(unique_keys), dtype=object)
+    for i, row in enumerate(first_rows.tolist()):
+        assignment = assignments_for_day(days[day_index[row]]).get(macs[row])
+        resolved[i] = str(assignment.player) if assignment else None
+    labels[:] = resolved[inverse]
+    return labels
@@ -0,0 +1,260 @@
+"""
+GPS Base Station Correction Engine
+Columnar (NumPy) computation of base station corrections
+
+Timestamps are handled as int64 ticks of 0.1 s since the Unix epoch and
+coordinates as float64 arrays. Base station fixes are averaged per tick,
+gaps between ticks are linearly interpolated and the resulting dense
+correction table is applied to all records with a single fancy-index.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+
+# Correction resolution: 0.1 s
+TICK = timedelta(microseconds=100000)
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def to_tick(timestamp):
+    """Convert an aware datetime to its tick (0.1 s since the Unix epoch)"""
+    return (timestamp - EPOCH) // TICK
+
+
+def to_ticks(timestamps):
+    """
+    Convert aware datetimes to int64 ticks (0.1 s since the Unix epoch).
+
+    Equivalent to rounding each timestamp down to its 0.1 s tick.
+    """
+    return np.fromiter(
+        (to_tick(ts) for ts in timestamps),
+        dtype=np.int64,
+        count=len(timestamps),
+    )
+
+
+def tick_to_datetime(tick):
+    """Convert a tick back to an aware UTC datetime"""
+    return EPOCH + TICK * int(tick)
+
+
+class GpsColumns:
+    """
+    Columnar view of GPS records ordered by timestamp.
+
+    Attributes:
+        timestamps: List of aware datetimes (kept for serialization)
+        ticks: int64 array of 0.1 s ticks
+        macs: Object array of MAC addresses
+        latitudes, longitudes, speeds: float64 arrays
+    """
+    FIELDS = ('timestamp', 'mac', 'latitude', 'longitude', 'speed_kmh')
+    # FIELDS plus the position corrected at ingest (NULL if none was available)
+    STORED_FIELDS = FIELDS + ('corrected_latitude', 'corrected_longitude')
+
+    def __init__(self, timestamps, macs, latitudes, longitudes, speeds):
+        self.timestamps = list(timestamps)
+        self.ticks = to_ticks(self.timestamps)
+        self.macs = np.asarray(macs, dtype=object)
+        self.latitudes = np.asarray(latitudes, dtype=np.float64)
+        self.longitudes = np.asarray(longitudes, dtype=np.float64)
+        self.speeds = np.asarray(
+            [speed or 0.0 for speed in speeds], dtype=np.float64
+        )
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def select(self, mask):
+        """Columns of the rows where mask is True, in the same order"""
+        index = np.flatnonzero(mask)
+        selected = object.__new__(type(self))
+        selected.timestamps = [self.timestamps[i] for i in index.tolist()]
+        selected.ticks = self.ticks[index]
+        selected.macs = self.macs[index]
+        selected.latitudes = self.latitudes[index]
+        selected.longitudes = self.longitudes[index]
+        selected.speeds = self.speeds[index]
+        return selected
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build columns from (timestamp, mac, latitude, longitude, speed_kmh) tuples"""
+        if not rows:
+            return cls([], [], [], [], [])
+        return cls(*zip(*rows))
+
+    @classmethod
+    def from_stored_rows(cls, rows):
+        """
+        Build columns from STORED_FIELDS tuples, taking the position corrected
+        at ingest where one is stored.
+
+        Returns:
+            Tuple (columns, pending): pending is the boolean mask of rows that
+            still hold their raw position
+        """
+        if not rows:
+            return cls.from_rows([]), np.zeros(0, dtype=bool)
+        timestamps, macs, latitudes, longitudes, speeds, corrected_lats, corrected_lons = zip(*rows)
+        pending = np.fromiter(
+            (latitude is None for latitude in corrected_lats), dtype=bool, count=len(rows)
+        )
+        columns = cls(timestamps, macs, latitudes, longitudes, speeds)
+        stored = ~pending
+        if stored.any():
+            columns.latitudes[stored] = np.asarray(corrected_lats, dtype=object)[stored].astype(np.float64)
+            columns.longitudes[stored] = np.asarray(corrected_lons, dtype=object)[stored].astype(np.float64)
+        return columns, pending
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build columns from GpsData instances, taking the position corrected
+        at ingest where one is set.
+
+        Returns:
+            Tuple (columns, pending) as for from_stored_rows
+        """
+        return cls.from_stored_rows([
+            tuple(getattr(record, field) for field in cls.STORED_FIELDS) for record in records
+        ])
+
+    @classmethod
+    def from_queryset(cls, queryset):
+        """Load GpsData rows (ordered by timestamp) into columns with one query"""
+        return cls.from_rows(list(queryset.order_by('timestamp').values_list(*cls.FIELDS)))
+
+    @classmethod
+    async def afrom_queryset(cls, queryset):
+        """Async variant of from_queryset"""
+        rows = [
+            row async for row in queryset.order_by('timestamp').values_list(*cls.FIELDS)
+        ]
+        return cls.from_rows(rows)
+
+    @classmethod
+    def from_stored_queryset(cls, queryset):
+        """Load GpsData rows (ordered by timestamp) with from_stored_rows, one query"""
+        return cls.from_stored_rows(
+            list(queryset.order_by('timestamp').values_list(*cls.STORED_FIELDS))
+        )
+
+    @classmethod
+    async def afrom_stored_queryset(cls, queryset):
+        """Async variant of from_stored_queryset"""
+        return cls.from_stored_rows([
+            row async for row in queryset.order_by('timestamp').values_list(*cls.STORED_FIELDS)
+        ])
+
+
+def tick_corrections(ticks, latitudes, longitudes, base_lat, base_lon):
+    """
+    Average base station fixes per tick and turn them into corrections.
+
+    Args:
+        ticks: int64 ticks of base station fixes
+        latitudes, longitudes: Measured base station position per fix
+        base_lat, base_lon: Reference (true) base station coordinates
+
+    Returns:
+        Tuple (ticks, dlat, dlon, samples): sorted unique ticks, correction
+        (reference - average measured position) and fix count per tick
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    if ticks.size == 0:
+        empty = np.empty(0, dtype=np.float64)
+        return ticks, empty, empty, np.empty(0, dtype=np.int64)
+
+    known_ticks, inverse = np.unique(ticks, return_inverse=True)
+    counts = np.bincount(inverse)
+    avg_lat = np.bincount(inverse, weights=latitudes) / counts
+    avg_lon = np.bincount(inverse, weights=longitudes) / counts
+    return known_ticks, base_lat - avg_lat, base_lon - avg_lon, counts
+
+
+class CorrectionTable:
+    """
+    Dense per-tick base station correction covering [first_tick, last_tick].
+
+    Attributes:
+        first_tick: Tick of the first base station fix
+        dlat, dlon: float64 arrays of corrections, one entry per tick
+    """
+
+    def __init__(self, first_tick, dlat, dlon):
+        self.first_tick = int(first_tick)
+        self.dlat = dlat
+        self.dlon = dlon
+
+    def __len__(self):
+        return len(self.dlat)
+
+    @classmethod
+    def from_base_fixes(cls, ticks, latitudes, longitudes, base_lat, base_lon):
+        """
+        Build corrections from base station fixes.
+
+        Args:
+            ticks: int64 ticks of base station fixes
+            latitudes, longitudes: Measured base station position per fix
+            base_lat, base_lon: Reference (true) base station coordinates
+
+        Returns:
+            CorrectionTable or None if there are no base station fixes
+        """
+        known_ticks, dlat, dlon, _ = tick_corrections(ticks, latitudes, longitudes, base_lat, base_lon)
+        return cls.from_known_ticks(known_ticks, dlat, dlon)
+
+    @classmethod
+    def from_known_ticks(cls, ticks, dlat, dlon):
+        """
+        Build the dense table from per-tick corrections (e.g. BaseCorrection rows).
+
+        Args:
+            ticks: Sorted unique int64 ticks with a base station fix
+            dlat, dlon: Correction at each of those ticks
+
+        Returns:
+            CorrectionTable or None if there are no ticks
+        """
+        ticks = np.asarray(ticks, dtype=np.int64)
+        if ticks.size == 0:
+            return None
+
+        # Fill every tick between first and last fix by linear interpolation
+        dense_ticks = np.arange(ticks[0], ticks[-1] + 1, dtype=np.int64)
+        dense_dlat = np.interp(dense_ticks, ticks, np.asarray(dlat, dtype=np.float64))
+        dense_dlon = np.interp(dense_ticks, ticks, np.asarray(dlon, dtype=np.float64))
+
+        return cls(ticks[0], dense_dlat, dense_dlon)
+
+    @classmethod
+    def from_columns(cls, columns, base_mac, base_lat, base_lon):
+        """Build corrections from the base_mac rows of a GpsColumns batch"""
+        mask = columns.macs == base_mac
+        return cls.from_base_fixes(
+            columns.ticks[mask], columns.latitudes[mask], columns.longitudes[mask],
+            base_lat, base_lon,
+        )
+
+    def apply(self, ticks, latitudes, longitudes):
+        """
+        Correct coordinates in place for all ticks covered by the table.
+
+        Returns:
+            Boolean mask of corrected entries
+        """
+        index = np.asarray(ticks, dtype=np.int64) - self.first_tick
+        covered = (index >= 0) & (index < len(self))
+        index = index[covered]
+        latitudes[covered] += self.dlat[index]
+        longitudes[covered] += self.dlon[index]
+        return covered
+
+    def lookup(self, tick):
+        """Return (dlat, dlon) for a single tick, or None if not covered"""
+        index = int(tick) - self.first_tick
+        if 0 <= index < len(self):
+            return float(self.dlat[index]), float(self.dlon[index])
+        return None
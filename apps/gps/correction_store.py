@@ -0,0 +1,354 @@
+"""
+GPS Correction Store
+Persistent per-tick base station corrections (BaseCorrection)
+
+History requests used to rebuild the correction map of a match from all of
+its raw base station rows on every call. The corrections are now stored per
+match and tick:
+
+- ingestion refreshes the ticks covered by newly written base station fixes
+  (recomputed from the stored rows, so retried POSTs do not skew averages)
+- saving a Match with a changed base station reference rebuilds its table
+  in a background thread (schedule_rebuild), after the save commits
+- history loads the table with one query and interpolates the gaps (only
+  for fixes without a position corrected at ingest)
+- ingestion continues its online correction state from the stored ticks
+  around new fixes (see online_correction.py)
+- rebuilding a match also rewrites the corrected positions of its fixes
+  (match_macs(): its assigned MACs and base station) from the raw
+  coordinates, one committed UPDATE per POSITION_BATCH_SIZE fixes
+
+Only matches with base_mac, base_latitude and base_longitude set have
+corrections.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from .assignments import match_macs
+from .correction import CorrectionTable, tick_corrections, tick_to_datetime, to_tick, to_ticks
+from .history_cache import invalidate_day
+from .models import BaseCorrection, GpsData, Match
+
+logger = logging.getLogger(__name__)
+
+# Seconds the set of base station MACs is cached per process
+BASE_MACS_CACHE_TTL = 60
+
+# Rows per INSERT ... ON CONFLICT statement
+UPSERT_BATCH_SIZE = 5000
+
+# Ticks around live fixes searched for stored corrections (60 s)
+NEARBY_TICKS = 600
+
+# Fixes per UPDATE of rewritten corrected positions
+POSITION_BATCH_SIZE = 5000
+
+_base_macs = None
+_base_macs_loaded_at = 0.0
+_base_macs_lock = threading.Lock()
+
+
+def has_base_reference(match):
+    """True if the match has a base station MAC and reference coordinates"""
+    return bool(
+        match and match.base_mac
+        and match.base_latitude is not None and match.base_longitude is not None
+    )
+
+
+def base_macs():
+    """MAC addresses configured as base station of any match (cached)"""
+    global _base_macs, _base_macs_loaded_at
+    with _base_macs_lock:
+        if _base_macs is None or time.monotonic() - _base_macs_loaded_at > BASE_MACS_CACHE_TTL:
+            _base_macs = frozenset(
+                Match.objects.exclude(base_mac__isnull=True).exclude(base_mac='')
+                .values_list('base_mac', flat=True)
+            )
+            _base_macs_loaded_at = time.monotonic()
+        return _base_macs
+
+
+def invalidate_base_macs():
+    """Drop the cached base station MACs (called when a Match is saved)"""
+    global _base_macs
+    with _base_macs_lock:
+        _base_macs = None
+
+
+def refresh_corrections(match, start, end):
+    """
+    Recompute the stored corrections of a match from its base station fixes
+    in [start, end). The range should be aligned to ticks.
+
+    Returns:
+        Number of ticks written
+    """
+    rows = list(
+        GpsData.objects.filter(
+            mac=match.base_mac, quality__gt=0,
+            timestamp__gte=start, timestamp__lt=end,
+        ).values_list('timestamp', 'latitude', 'longitude')
+    )
+    if not rows:
+        return 0
+
+    timestamps, latitudes, longitudes = zip(*rows)
+    ticks, dlat, dlon, samples = tick_corrections(
+        to_ticks(timestamps),
+        np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64),
+        float(match.base_latitude), float(match.base_longitude),
+    )
+
+    BaseCorrection.objects.bulk_create(
+        [
+            BaseCorrection(match=match, tick=tick, dlat=lat, dlon=lon, samples=count)
+            for tick, lat, lon, count in zip(
+                ticks.tolist(), dlat.tolist(), dlon.tolist(), samples.tolist()
+            )
+        ],
+        batch_size=UPSERT_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['match', 'tick'],
+        update_fields=['dlat', 'dlon', 'samples'],
+    )
+    return len(ticks)
+
+
+def _write_corrected_positions(ids, timestamps, latitudes, longitudes):
+    """Set corrected_latitude/corrected_longitude of fixes by (id, timestamp)"""
+    if connection.vendor != 'postgresql':
+        GpsData.objects.bulk_update(
+            [
+                GpsData(id=pk, corrected_latitude=latitude, corrected_longitude=longitude)
+                for pk, latitude, longitude in zip(ids, latitudes, longitudes)
+            ],
+            ['corrected_latitude', 'corrected_longitude'],
+            batch_size=POSITION_BATCH_SIZE,
+        )
+        return
+
+    table = GpsData._meta.db_table
+    values = ', '.join(['(%s, %s::timestamptz, %s::float8, %s::float8)'] * len(ids))
+    params = [
+        value for row in zip(ids, timestamps, latitudes, longitudes) for value in row
+    ]
+    with connection.cursor() as cursor:
+        # timestamp in the join prunes the update to the day partition
+        cursor.execute(
+            f'UPDATE {table} AS g '
+            f'SET corrected_latitude = v.lat, corrected_longitude = v.lon '
+            f'FROM (VALUES {values}) AS v (id, ts, lat, lon) '
+            f'WHERE g.id = v.id AND g.timestamp = v.ts',
+            params,
+        )
+
+
+def store_corrected_positions(match):
+    """
+    Recompute the stored corrected positions of the match's fixes
+    (match_macs() on its day) from their raw coordinates and the stored
+    corrections.
+
+    Fixes outside the corrected ticks, like all fixes of a match without
+    corrections, get NULL and keep being corrected at read time. Every
+    batch is its own UPDATE, committed unless the caller holds a
+    transaction.
+
+    Returns:
+        Number of updated fixes
+    """
+    start, end = match.time_range()
+    fixes = GpsData.objects.filter(
+        timestamp__gte=start, timestamp__lt=end, mac__in=match_macs(match)
+    )
+    table = load_correction_table(match) if has_base_reference(match) else None
+    if table is None:
+        return fixes.update(corrected_latitude=None, corrected_longitude=None)
+
+    def write(rows):
+        ids, timestamps, latitudes, longitudes = zip(*rows)
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        covered = table.apply(to_ticks(timestamps), latitudes, longitudes)
+        _write_corrected_positions(
+            ids, timestamps,
+            np.where(covered, latitudes, None).tolist(), np.where(covered, longitudes, None).tolist(),
+        )
+        return len(rows)
+
+    updated = 0
+    rows = []
+    for row in fixes.order_by().values_list('id', 'timestamp', 'latitude', 'longitude').iterator(
+        chunk_size=POSITION_BATCH_SIZE
+    ):
+        rows.append(row)
+        if len(rows) >= POSITION_BATCH_SIZE:
+            updated += write(rows)
+            rows = []
+    if rows:
+        updated += write(rows)
+    return updated
+
+
+def rebuild_corrections(match):
+    """
+    Replace all stored corrections of a match, rewrite the corrected
+    positions of its fixes and invalidate its cached history.
+
+    The table is replaced in one transaction; the positions are rewritten
+    batch by batch after it (a long match is not held in one transaction).
+
+    Returns:
+        Number of ticks written
+    """
+    with transaction.atomic():
+        BaseCorrection.objects.filter(match=match).delete()
+        written = 0
+        if has_base_reference(match):
+            start, end = match.time_range()
+            written = refresh_corrections(match, start, end)
+    positions = store_corrected_positions(match)
+
+    # Cached history was corrected with the previous reference
+    invalidate_day(match.date)
+    logger.info(f"[CORRECTION] Rebuilt match {match.id}: {written} ticks, {positions} positions")
+    return written
+
+
+_rebuild_executor = None
+_rebuild_executor_lock = threading.Lock()
+
+
+def _rebuild_in_background(match_id):
+    close_old_connections()
+    try:
+        match = Match.objects.filter(id=match_id).first()
+        if match is not None:
+            rebuild_corrections(match)
+    except Exception as e:
+        logger.error(f"[ERROR] Rebuilding corrections of match {match_id} failed: {e}")
+    finally:
+        close_old_connections()
+
+
+def schedule_rebuild(match):
+    """
+    Run rebuild_corrections() for a match in a background thread once the
+    current transaction commits.
+
+    Rebuilds run one at a time per process; a rebuild lost with the process
+    is repeated with `manage.py rebuild_corrections --match <id>`.
+    """
+    global _rebuild_executor
+    with _rebuild_executor_lock:
+        if _rebuild_executor is None:
+            _rebuild_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='gps-rebuild')
+        executor = _rebuild_executor
+    match_id = match.id
+    transaction.on_commit(lambda: executor.submit(_rebuild_in_background, match_id))
+
+
+def update_corrections(fixes):
+    """
+    Refresh corrections for newly written fixes.
+
+    Fixes of devices that are not a base station cost one set lookup each.
+
+    Args:
+        fixes: Iterable of (mac, timestamp) of the written fixes
+    """
+    macs = base_macs()
+    if not macs:
+        return
+
+    # Time span of new fixes per base station MAC
+    spans = defaultdict(list)
+    for mac, timestamp in fixes:
+        if mac in macs:
+            spans[mac].append(timestamp)
+    if not spans:
+        return
+
+    tz = timezone.get_default_timezone()
+    for mac, timestamps in spans.items():
+        first, last = min(timestamps), max(timestamps)
+        days = {first.astimezone(tz).date(), last.astimezone(tz).date()}
+
+        for match in Match.objects.filter(
+            base_mac=mac, date__in=days,
+            base_latitude__isnull=False, base_longitude__isnull=False,
+        ):
+            day_start, day_end = match.time_range()
+            start = max(tick_to_datetime(to_tick(first)), day_start)
+            end = min(tick_to_datetime(to_tick(last) + 1), day_end)
+            if start < end:
+                refresh_corrections(match, start, end)
+
+
+aupdate_corrections = sync_to_async(update_corrections)
+
+
+def _table_from_rows(rows):
+    if not rows:
+        return None
+    ticks, dlat, dlon = zip(*rows)
+    return CorrectionTable.from_known_ticks(ticks, dlat, dlon)
+
+
+def load_correction_table(match):
+    """
+    Stored corrections of a match as a dense CorrectionTable (one query).
+
+    Returns:
+        CorrectionTable, or None if nothing is stored for the match
+    """
+    return _table_from_rows(list(
+        BaseCorrection.objects.filter(match=match).order_by('tick')
+        .values_list('tick', 'dlat', 'dlon')
+    ))
+
+
+def nearby_corrections(match, ticks, window=NEARBY_TICKS):
+    """
+    Stored per-tick corrections around fresh fixes (one query).
+
+    Used by the online correction to continue after a restart or for
+    batches outside its window.
+
+    Returns:
+        Tuple (ticks, dlat, dlon, samples) of the stored ticks within window
+        ticks of the fixes, sorted (empty arrays if nothing is stored)
+    """
+    ticks = np.asarray(ticks, dtype=np.int64)
+    rows = []
+    if ticks.size:
+        rows = list(
+            BaseCorrection.objects.filter(
+                match=match,
+                tick__gte=int(ticks.min()) - window, tick__lte=int(ticks.max()) + window,
+            ).order_by('tick').values_list('tick', 'dlat', 'dlon', 'samples')
+        )
+    if not rows:
+        empty = np.empty(0, dtype=np.float64)
+        return np.empty(0, dtype=np.int64), empty, empty, np.empty(0, dtype=np.int64)
+
+    known_ticks, dlat, dlon, samples = zip(*rows)
+    return (
+        np.asarray(known_ticks, dtype=np.int64), np.asarray(dlat, dtype=np.float64),
+        np.asarray(dlon, dtype=np.float64), np.asarray(samples, dtype=np.int64),
+    )
+
+
+async def aload_correction_table(match):
+    """Async variant of load_correction_table"""
+    return _table_from_rows([
+        row async for row in BaseCorrection.objects.filter(match=match).order_by('tick')
+        .values_list('tick', 'dlat', 'dlon')
+    ])
@@ -3,6 +3,9 @@ GPS Helper Functions
 Utility functions for GPS data processing
 """
 import math
+import numpy as np
+
+EARTH_RADIUS_M = 6371000
 
 
 def convert_to_decimal(coord_str, hemisphere):
@@ -44,7 +47,7 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculate distance between two points on Earth in meters using Haversine formula.
     """
-    R = 6371000  # Earth radius in meters
+    R = EARTH_RADIUS_M
     
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
@@ -57,6 +60,65 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return R * c
 
 
+def haversine_distances(lat1, lon1, lat2, lon2):
+    """
+    Vectorized Haversine distance in meters for NumPy arrays (or scalars).
+    
+    All arguments broadcast against each other, so one point can be
+    compared against many.
+    """
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = np.radians(np.subtract(lon2, lon1))
+    
+    a = np.sin(delta_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def factorize(values):
+    """
+    Map hashable values (e.g. MAC addresses) to int64 codes in order of first appearance.
+    
+    Much faster than np.unique on object arrays, which has to sort strings.
+    """
+    values = values.tolist() if isinstance(values, np.ndarray) else list(values)
+    codes_by_value = {value: code for code, value in enumerate(dict.fromkeys(values))}
+    return np.fromiter((codes_by_value[value] for value in values), dtype=np.int64, count=len(values))
+
+
+def step_distances(macs, latitudes, longitudes):
+    """
+    Distance in meters from the previous point of the same MAC.
+    
+    Records must be in timestamp order. They are stably sorted by MAC (which
+    keeps timestamp order inside each group), distances between neighbours
+    are computed in one vectorized call and mapped back to input order.
+    
+    Returns:
+        float64 array, 0.0 for the first point of each MAC
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    step_dist = np.zeros(len(latitudes), dtype=np.float64)
+    if len(latitudes) < 2:
+        return step_dist
+    
+    mac_codes = factorize(macs)
+    order = np.argsort(mac_codes, kind='stable')
+    codes = mac_codes[order]
+    lat = latitudes[order]
+    lon = longitudes[order]
+    
+    distances = haversine_distances(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    same_mac = codes[1:] == codes[:-1]
+    
+    sorted_dist = np.zeros(len(order), dtype=np.float64)
+    sorted_dist[1:] = np.where(same_mac, distances, 0.0)
+    step_dist[order] = sorted_dist
+    return step_dist
+
+
 def process_history_with_correction(history_data, base_coordinates, mac_address):
     """
     Process history data to apply corrections based on MAC address presence.
@@ -0,0 +1,171 @@
+"""
+GPS History Cache
+Serialized, gzip-compressed history responses of completed matches
+
+A finished match's history only changes when its base station reference
+is moved or late fixes for its day arrive, yet every request re-queried,
+re-corrected and re-serialized it. Responses of completed matches are now
+stored once per (match, endpoint variant, threshold) in the 'history'
+cache (settings.CACHES) as (etag, content type, gzip bytes):
+
+- keys include a version token per match day; invalidate_day() replaces
+  the token, so stale entries are never read again and age out through
+  the backend's eviction (filesystem cull, or Redis allkeys-lru)
+- ingestion invalidates the days of written fixes that are already over,
+  saving a Match invalidates its day (base station changes)
+- the ETag is a hash of the encoded body; If-None-Match answers 304 without
+  touching the database
+
+Matches whose day is not over yet are never cached; live clients use
+?since= or the live stream instead.
+"""
+import gzip
+import hashlib
+import logging
+import uuid
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils import timezone
+from django.utils.http import parse_etags
+from .history_format import accepted_encodings, encode_body, payload_response
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'history'
+
+# Seconds a cached response is kept (None = until evicted or invalidated)
+ENTRY_TIMEOUT = None
+
+GZIP_LEVEL = 6
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _version_key(day):
+    return f'gps:history:day:{day.isoformat()}'
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def is_cacheable(match):
+    """True for matches whose day is over"""
+    return match is not None and match.time_range()[1] <= timezone.now()
+
+
+def _entry_key(match, variant, threshold):
+    """Key of a response; creates the day's version token if it is missing"""
+    cache = _cache()
+    version_key = _version_key(match.date)
+    version = cache.get(version_key)
+    if version is None:
+        cache.add(version_key, _new_version(), None)
+        version = cache.get(version_key)
+    return f'gps:history:{variant}:{match.id}:{threshold:g}:{version}'
+
+
+async def _aentry_key(match, variant, threshold):
+    cache = _cache()
+    version_key = _version_key(match.date)
+    version = await cache.aget(version_key)
+    if version is None:
+        await cache.aadd(version_key, _new_version(), None)
+        version = await cache.aget(version_key)
+    return f'gps:history:{variant}:{match.id}:{threshold:g}:{version}'
+
+
+def invalidate_day(day):
+    """Drop all cached history responses of matches on day"""
+    _cache().set(_version_key(day), _new_version(), None)
+    logger.info(f"[CACHE] Invalidated history of {day}")
+
+
+def invalidate_fixes(timestamps):
+    """
+    Invalidate the days of written fixes that are already over.
+
+    Fixes of the current day cost one date conversion each: matches of the
+    current day are not cached.
+    """
+    tz = timezone.get_default_timezone()
+    today = timezone.localdate()
+    days = {timestamp.astimezone(tz).date() for timestamp in timestamps}
+    for day in sorted(days):
+        if day < today:
+            invalidate_day(day)
+
+
+def _build_entry(payload):
+    body, content_type = encode_body(payload)
+    etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+    return etag, content_type, gzip.compress(body, GZIP_LEVEL)
+
+
+def _entry_response(request, entry):
+    """304, gzip or uncompressed response for a cached entry"""
+    etag, content_type, compressed = entry
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        # Weak comparison: proxies may have turned the ETag into W/"..."
+        candidates = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        if etag in candidates or '*' in candidates:
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
+
+    if 'gzip' in accepted_encodings(request):
+        response = HttpResponse(compressed, content_type=content_type)
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(compressed), content_type=content_type)
+    response['ETag'] = etag
+    response['Vary'] = 'Accept, Accept-Encoding'
+    # Browsers revalidate every time and get 304 while the match is unchanged
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+def cached_history_response(request, match, variant, threshold, build):
+    """
+    History response of a match, served from the cache when it is over.
+
+    Args:
+        variant: Endpoint variant ('history', 'simple', ...), None to skip the cache
+        build: Callable returning the payload (JSON data or binary bytes) on a miss
+
+    Returns:
+        HttpResponse (built without caching for running matches)
+    """
+    if variant is None or not is_cacheable(match):
+        return payload_response(request, build())
+
+    cache = _cache()
+    key = _entry_key(match, variant, threshold)
+    entry = cache.get(key)
+    if entry is None:
+        entry = _build_entry(build())
+        cache.set(key, entry, ENTRY_TIMEOUT)
+        logger.info(f"[CACHE] Stored {key} ({len(entry[2])} bytes)")
+    else:
+        logger.debug(f"[CACHE] Hit {key}")
+    return _entry_response(request, entry)
+
+
+async def acached_history_response(request, match, variant, threshold, abuild):
+    """Async variant of cached_history_response (abuild is a coroutine function)"""
+    if variant is None or not is_cacheable(match):
+        return payload_response(request, await abuild())
+
+    cache = _cache()
+    key = await _aentry_key(match, variant, threshold)
+    entry = await cache.aget(key)
+    if entry is None:
+        entry = _build_entry(await abuild())
+        await cache.aset(key, entry, ENTRY_TIMEOUT)
+        logger.info(f"[CACHE] Stored {key} ({len(entry[2])} bytes)")
+    else:
+        logger.debug(f"[CACHE] Hit {key}")
+    return _entry_response(request, entry)
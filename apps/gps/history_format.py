@@ -0,0 +1,295 @@
+"""
+GPS History Formats
+Compact encodings and compression of history responses
+
+The default JSON format repeats the full ISO timestamp and MAC in every
+record (~130 bytes per fix) and was sent uncompressed. Clients can ask
+for a compact format with ?format= (or the Accept header):
+
+- json: list of records (default, unchanged)
+- columnar: one object per MAC with delta-encoded integer columns
+  (application/json)
+- binary: typed arrays the browser reads without parsing
+  (application/vnd.gps-history)
+
+Columnar JSON:
+
+    {"format": "columnar", "t0": <ms since epoch>, "scale": 1000000,
+     "tracks": [{"mac": "...", "player": "...", "t": [...], "lat": [...],
+                 "lon": [...], "speed": [...], "step": [...]}],
+     "next": <cursor, cursor pages only>}
+
+    t:        milliseconds, first relative to t0, then deltas
+    lat, lon: degrees * scale as integers, first absolute, then deltas
+    speed:    km/h * 100, step: step_dist in metres * 100
+
+Binary (little-endian):
+
+    magic     4s   b'GPSH'
+    version   u1   1
+    reserved  3x
+    meta_len  u4   length of the metadata JSON
+    meta      JSON {"macs", "players", "counts", "points", "t0", "time_unit",
+                    "lat0", "lon0", "next"}, space-padded to 8 bytes
+    time      u4[points]  (time - t0) in time_unit milliseconds
+    lat, lon  f4[points]  degrees relative to lat0/lon0
+    speed     f4[points]  km/h
+    step      f4[points]  step_dist in metres
+
+    Points are grouped by MAC in the order of macs/counts, in timestamp
+    order within a MAC; players holds the player name of each MAC. Every
+    column starts at a multiple of 4 bytes, so
+    new Float32Array(buffer, offset, points) maps it without copying.
+    Coordinates are offsets from lat0/lon0 so float32 keeps ~1e-9 degree
+    precision.
+
+Every format is compressed with brotli (optional 'brotli' package) or gzip
+when the client accepts it.
+"""
+import gzip
+import json
+import struct
+from datetime import timedelta
+import numpy as np
+from django.http import HttpResponse
+from .correction import EPOCH
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FORMATS = ('json', 'columnar', 'binary')
+
+JSON_CONTENT_TYPE = 'application/json'
+BINARY_CONTENT_TYPE = 'application/vnd.gps-history'
+COLUMNAR_MEDIA_TYPE = 'application/vnd.gps-history.columnar+json'
+
+BINARY_MAGIC = b'GPSH'
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct('<4sB3xI')
+
+COORDINATE_SCALE = 1000000
+VALUE_SCALE = 100
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Responses smaller than this are sent uncompressed
+MIN_COMPRESS_SIZE = 512
+
+MILLISECOND = timedelta(milliseconds=1)
+
+
+def negotiate_format(request):
+    """
+    Response format from ?format= or the Accept header.
+
+    Raises:
+        ValueError: Unknown ?format= value
+    """
+    name = request.GET.get('format')
+    if name:
+        if name not in FORMATS:
+            raise ValueError(f"Unknown format: {name} (expected {', '.join(FORMATS)})")
+        return name
+
+    accept = request.META.get('HTTP_ACCEPT', '')
+    if BINARY_CONTENT_TYPE in accept.replace(COLUMNAR_MEDIA_TYPE, ''):
+        return 'binary'
+    if COLUMNAR_MEDIA_TYPE in accept:
+        return 'columnar'
+    return 'json'
+
+
+def _epoch_ms(timestamps):
+    """int64 milliseconds since the Unix epoch"""
+    return np.fromiter(
+        ((timestamp - EPOCH) // MILLISECOND for timestamp in timestamps),
+        dtype=np.int64,
+        count=len(timestamps),
+    )
+
+
+def _grouped(columns):
+    """
+    Stable MAC grouping of history columns.
+
+    Returns:
+        Tuple (order, macs, counts): index array grouping the points by MAC
+        in order of first appearance, the MACs and their point counts
+    """
+    macs = columns.macs.tolist()
+    codes_by_mac = {mac: code for code, mac in enumerate(dict.fromkeys(macs))}
+    codes = np.fromiter((codes_by_mac[mac] for mac in macs), dtype=np.int64, count=len(macs))
+    order = np.argsort(codes, kind='stable')
+    counts = np.bincount(codes, minlength=len(codes_by_mac))
+    return order, list(codes_by_mac), counts.tolist()
+
+
+def _track_players(players, order, counts):
+    """Player of each MAC group (its first row)"""
+    firsts = np.cumsum([0] + counts[:-1]).astype(np.int64) if counts else []
+    return [players[order[first]] for first in firsts]
+
+
+def _deltas(values):
+    """First value followed by the differences, per MAC segment"""
+    deltas = np.empty_like(values)
+    if len(values):
+        deltas[0] = values[0]
+        deltas[1:] = np.diff(values)
+    return deltas
+
+
+def columnar_payload(columns, step_dist, speeds, players, next_cursor=None):
+    """
+    Columnar JSON payload of prepared history columns.
+
+    Args:
+        columns: GpsColumns in timestamp order (corrected, simplified)
+        step_dist: float64 step distances of columns
+        speeds: float64 speeds after the threshold
+        players: Player label of every row (see assignments.player_labels)
+        next_cursor: Cursor of the next page, for cursor pages
+
+    Returns:
+        Dict ready for json.dumps
+    """
+    times = _epoch_ms(columns.timestamps)
+    t0 = int(times.min()) if len(times) else 0
+    order, macs, counts = _grouped(columns)
+
+    lat = np.rint(columns.latitudes[order] * COORDINATE_SCALE).astype(np.int64)
+    lon = np.rint(columns.longitudes[order] * COORDINATE_SCALE).astype(np.int64)
+    speed = np.rint(np.asarray(speeds)[order] * VALUE_SCALE).astype(np.int64)
+    step = np.rint(np.asarray(step_dist)[order] * VALUE_SCALE).astype(np.int64)
+    times = times[order] - t0
+
+    players = _track_players(players, order, counts)
+
+    tracks = []
+    start = 0
+    for mac, player, count in zip(macs, players, counts):
+        end = start + count
+        tracks.append({
+            'mac': mac,
+            'player': player,
+            't': _deltas(times[start:end]).tolist(),
+            'lat': _deltas(lat[start:end]).tolist(),
+            'lon': _deltas(lon[start:end]).tolist(),
+            'speed': speed[start:end].tolist(),
+            'step': step[start:end].tolist(),
+        })
+        start = end
+
+    payload = {'format': 'columnar', 't0': t0, 'scale': COORDINATE_SCALE, 'tracks': tracks}
+    if next_cursor is not None:
+        payload['next'] = next_cursor
+    return payload
+
+
+def binary_payload(columns, step_dist, speeds, players, next_cursor=None):
+    """
+    Binary typed-array payload of prepared history columns.
+
+    Arguments as for columnar_payload.
+
+    Returns:
+        bytes
+    """
+    times = _epoch_ms(columns.timestamps)
+    order, macs, counts = _grouped(columns)
+    points = len(order)
+
+    t0 = int(times.min()) if points else 0
+    span = int(times.max()) - t0 if points else 0
+    # Multi-week ranges fall back to 0.1 s resolution to fit in uint32
+    time_unit = 1 if span < 2 ** 32 else 100
+    lat0 = float(columns.latitudes.min()) if points else 0.0
+    lon0 = float(columns.longitudes.min()) if points else 0.0
+
+    meta = json.dumps({
+        'macs': macs, 'players': _track_players(players, order, counts),
+        'counts': counts, 'points': points,
+        't0': t0, 'time_unit': time_unit, 'lat0': lat0, 'lon0': lon0,
+        'next': next_cursor,
+    }).encode()
+    meta += b' ' * (-(BINARY_HEADER.size + len(meta)) % 8)
+
+    return b''.join((
+        BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(meta)),
+        meta,
+        ((times[order] - t0) // time_unit).astype('<u4').tobytes(),
+        (columns.latitudes[order] - lat0).astype('<f4').tobytes(),
+        (columns.longitudes[order] - lon0).astype('<f4').tobytes(),
+        np.asarray(speeds)[order].astype('<f4').tobytes(),
+        np.asarray(step_dist)[order].astype('<f4').tobytes(),
+    ))
+
+
+def encode_history(name, columns, step_dist, speeds, players, next_cursor=None):
+    """Columnar dict or binary bytes for a compact format name"""
+    if name == 'binary':
+        return binary_payload(columns, step_dist, speeds, players, next_cursor)
+    return columnar_payload(columns, step_dist, speeds, players, next_cursor)
+
+
+def encode_body(payload):
+    """
+    Serialize a history payload.
+
+    Returns:
+        Tuple (bytes, content type): bytes payloads are binary, everything
+        else is JSON
+    """
+    if isinstance(payload, bytes):
+        return payload, BINARY_CONTENT_TYPE
+    return json.dumps(payload).encode(), JSON_CONTENT_TYPE
+
+
+def accepted_encodings(request):
+    """Content codings of Accept-Encoding, without those refused with q=0"""
+    accepted = set()
+    for part in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, *params = (value.strip() for value in part.split(';'))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+def compress_body(request, body):
+    """
+    Compress a response body for the client.
+
+    Returns:
+        Tuple (body, content encoding or None)
+    """
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    accepted = accepted_encodings(request)
+    if brotli is not None and 'br' in accepted:
+        return brotli.compress(body, quality=BROTLI_QUALITY), 'br'
+    if 'gzip' in accepted:
+        return gzip.compress(body, GZIP_LEVEL), 'gzip'
+    return body, None
+
+
+def payload_response(request, payload):
+    """Encoded and compressed HttpResponse for a history payload"""
+    body, content_type = encode_body(payload)
+    body, encoding = compress_body(request, body)
+    response = HttpResponse(body, content_type=content_type)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
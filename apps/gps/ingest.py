@@ -0,0 +1,242 @@
+"""
+GPS Ingest Helpers
+Batched storage path for parsed GPS fixes
+
+Used by the receiver endpoints to write a whole POST batch in one
+transaction instead of one GpsData.save() per fix, and by the log
+importer to load large batches with COPY FROM STDIN.
+
+Fixes already stored for the same (mac, timestamp) - device retries,
+re-imported logs - are dropped before the write by one indexed lookup per
+device and batch, so only new fixes are counted as inserted and fanned out
+below. The INSERT still runs with ON CONFLICT DO NOTHING on the
+gps_data_mac_timestamp_uniq constraint for fixes written concurrently by
+another request.
+
+Before the write every fix gets its base station corrected position from
+the running per-match correction state (see online_correction.py); rows
+loaded with COPY (log imports) keep NULL and are corrected at read time or
+by rebuild_corrections.
+
+After every write the stored base station corrections are refreshed for
+new base station fixes (see correction_store.py) and fixes from the
+receivers are pushed to live map subscribers (see live.py) and to the
+latest positions store (see latest.py). Imported logs are historical and
+not published. Fixes for days that are already over
+invalidate the cached history of those days (see history_cache.py).
+"""
+import csv
+import io
+import logging
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+from .correction_store import aupdate_corrections, update_corrections
+from .history_cache import invalidate_fixes
+from .latest import update_latest
+from .live import get_live_hub, publish_fixes
+from .models import GpsData
+from .online_correction import correct_records
+from .projection import assign_geometries, puwg92_ewkt
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT statement for bulk_create
+BULK_BATCH_SIZE = 1000
+
+# Column order of the row tuples accepted by copy_gps_rows()
+COPY_FIELDS = (
+    'timestamp', 'mac', 'latitude', 'longitude', 'altitude',
+    'num_satellites', 'hdop', 'quality', 'speed_kmh', 'course',
+)
+
+
+def _correct_online(records):
+    """Corrected positions for a batch; without them history corrects at read time"""
+    try:
+        correct_records(records)
+    except Exception as e:
+        logger.error(f"[ERROR] Online correction failed: {e}")
+
+
+def _refresh_corrections(fixes):
+    """Update stored corrections; a failure must not fail the written batch"""
+    try:
+        update_corrections(fixes)
+    except Exception as e:
+        logger.error(f"[ERROR] Correction update failed: {e}")
+
+
+def _invalidate_history(timestamps):
+    """Invalidate cached history for late fixes; a failure must not fail the batch"""
+    try:
+        invalidate_fixes(timestamps)
+    except Exception as e:
+        logger.error(f"[ERROR] History cache invalidation failed: {e}")
+
+
+def _publish_live(records):
+    """Push written fixes to live subscribers; a failure must not fail the batch"""
+    try:
+        publish_fixes(records)
+    except Exception as e:
+        logger.error(f"[ERROR] Live publish failed: {e}")
+
+
+def _update_latest(records):
+    """Keep the newest positions in memory; a failure must not fail the batch"""
+    try:
+        update_latest(records)
+    except Exception as e:
+        logger.error(f"[ERROR] Latest positions update failed: {e}")
+
+
+def _new_records(records):
+    """
+    Drop fixes already stored or repeated within the batch.
+
+    One query per device reads the stored timestamps of the batch time range
+    from the (mac, timestamp) unique index.
+
+    Returns:
+        List of records not stored yet, in submitted order
+    """
+    by_mac = {}
+    for record in records:
+        by_mac.setdefault(record.mac, []).append(record.timestamp)
+
+    seen = set()
+    for mac, timestamps in by_mac.items():
+        stored = GpsData.objects.filter(
+            mac=mac, timestamp__gte=min(timestamps), timestamp__lte=max(timestamps)
+        ).values_list('timestamp', flat=True)
+        seen.update((mac, timestamp) for timestamp in stored)
+
+    new_records = []
+    for record in records:
+        key = (record.mac, record.timestamp)
+        if key not in seen:
+            seen.add(key)
+            new_records.append(record)
+    return new_records
+
+
+def bulk_insert_gps_data(records, publish=True):
+    """
+    Insert a batch of unsaved GpsData instances in a single transaction.
+
+    Args:
+        records: List of GpsData instances (not yet saved)
+        publish: Push the fixes to live map subscribers and the latest
+            positions store
+
+    Returns:
+        Number of inserted records (duplicates excluded)
+    """
+    if not records:
+        return 0
+
+    records = _new_records(records)
+    if not records:
+        return 0
+
+    assign_geometries(records)
+    _correct_online(records)
+    with transaction.atomic():
+        GpsData.objects.bulk_create(records, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+    _refresh_corrections((record.mac, record.timestamp) for record in records)
+    _invalidate_history(record.timestamp for record in records)
+    if publish:
+        _update_latest(records)
+        _publish_live(records)
+    return len(records)
+
+
+async def abulk_insert_gps_data(records):
+    """
+    Async variant of bulk_insert_gps_data for ASGI views.
+
+    Django has no async transactions; with BULK_BATCH_SIZE larger than a
+    device POST the batch is still written by a single INSERT statement.
+
+    Returns:
+        Number of inserted records (duplicates excluded)
+    """
+    if not records:
+        return 0
+
+    records = await sync_to_async(_new_records)(records)
+    if not records:
+        return 0
+
+    assign_geometries(records)
+    await sync_to_async(_correct_online)(records)
+    await GpsData.objects.abulk_create(records, batch_size=BULK_BATCH_SIZE, ignore_conflicts=True)
+
+    try:
+        await aupdate_corrections([(record.mac, record.timestamp) for record in records])
+    except Exception as e:
+        logger.error(f"[ERROR] Correction update failed: {e}")
+
+    # Only fixes of past days touch the cache (file or Redis I/O)
+    await sync_to_async(_invalidate_history)([record.timestamp for record in records])
+    await sync_to_async(_update_latest)(records)
+    if get_live_hub().watched():
+        await sync_to_async(_publish_live)(records)
+    return len(records)
+
+
+def copy_gps_rows(rows):
+    """
+    Load plain row tuples with COPY FROM STDIN in a single round-trip.
+
+    COPY cannot skip conflicting rows, so the batch is copied into a
+    temporary staging table and moved with INSERT ... ON CONFLICT DO NOTHING.
+    Geometry is projected for the whole batch at once and sent as EWKT.
+    On databases other than PostgreSQL the rows fall back to bulk_create.
+
+    Args:
+        rows: Sequence of tuples ordered as COPY_FIELDS
+
+    Returns:
+        Number of inserted rows (duplicates excluded)
+    """
+    if not rows:
+        return 0
+
+    if connection.vendor != 'postgresql':
+        return bulk_insert_gps_data(
+            [GpsData(**dict(zip(COPY_FIELDS, row))) for row in rows], publish=False
+        )
+
+    geometries = puwg92_ewkt([row[2] for row in rows], [row[3] for row in rows])
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row, geom in zip(rows, geometries):
+        # Empty unquoted CSV field = NULL
+        writer.writerow((*row, geom or ''))
+    buffer.seek(0)
+
+    table = GpsData._meta.db_table
+    columns = ', '.join(COPY_FIELDS + ('geom',))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {table}_stage '
+            f'(LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP'
+        )
+        cursor.copy_expert(
+            f'COPY {table}_stage ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer,
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM {table}_stage '
+            f'ON CONFLICT (mac, timestamp) DO NOTHING'
+        )
+        inserted = cursor.rowcount
+
+    _refresh_corrections((row[1], row[0]) for row in rows)
+    if inserted:
+        _invalidate_history(row[0] for row in rows)
+    return inserted
@@ -0,0 +1,222 @@
+"""
+GPS Ingest Queue
+Bounded in-process queue decoupling the receiver from database writes
+
+The receiver validates and parses a POST, submits the resulting GpsData
+instances and answers 202 immediately. A background writer thread drains
+the queue in batches through bulk_insert_gps_data(). When the queue is
+full, submissions are rejected so the view can answer 503 (backpressure).
+
+A batch that fails to write (database stalled or down) is kept and retried
+with exponential backoff before any newer record; retries are safe because
+duplicates are skipped on (mac, timestamp). While the writer is failing,
+submissions are rejected as well, so devices keep their data and retry
+instead of it piling up in memory. Pending records are flushed at
+interpreter shutdown; records still unwritable then are logged as lost.
+
+Configured in settings:
+    GPS_INGEST_MODE: 'sync' (write in the request) or 'queue'
+    GPS_INGEST_QUEUE_SIZE: Maximum number of queued records
+    GPS_INGEST_BATCH_SIZE: Maximum records written per batch
+    GPS_INGEST_FLUSH_INTERVAL: Seconds the writer waits for more records
+"""
+import atexit
+import logging
+import queue
+import threading
+import time
+from django.conf import settings
+from django.db import close_old_connections
+from .ingest import bulk_insert_gps_data
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_SIZE = 50000
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_FLUSH_INTERVAL = 0.5
+
+# Backoff between retries of a failed batch: doubled per failure up to the maximum
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+
+
+class IngestQueue:
+    """
+    Bounded queue of unsaved GpsData instances with a batching writer thread.
+    """
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._submit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Batch that failed to write, retried before newer records
+        self._pending = []
+        self.failing = False
+
+        # Metrics
+        self.enqueued = 0
+        self.rejected = 0
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_write_at = None
+
+    def start(self):
+        """Start the writer thread (idempotent)"""
+        with self._submit_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='gps-ingest-writer', daemon=True
+            )
+            self._thread.start()
+
+    def submit(self, records):
+        """
+        Queue records for writing.
+
+        All records of a POST are accepted or rejected together.
+
+        Returns:
+            True if queued, False if the queue is full, the writer is
+            failing or the queue is shutting down
+        """
+        if not records:
+            return True
+
+        self.start()
+        with self._submit_lock:
+            depth = self._queue.qsize() + len(self._pending)
+            if self._stop.is_set() or self.failing or depth + len(records) > self.maxsize:
+                self.rejected += len(records)
+                return False
+            for record in records:
+                self._queue.put_nowait(record)
+            self.enqueued += len(records)
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+        return True
+
+    def _next_batch(self, timeout):
+        """Block up to timeout for the first record, then take what is queued"""
+        try:
+            batch = [self._queue.get(timeout=timeout)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        """
+        Write one batch without letting an error kill the writer.
+
+        Returns:
+            True if the batch was written
+        """
+        close_old_connections()
+        try:
+            self.written += bulk_insert_gps_data(batch)
+            self.batches += 1
+            self.last_write_at = time.time()
+            return True
+        except Exception as e:
+            logger.error(f"[ERROR] Ingest writer failed to insert {len(batch)} records: {e}")
+            return False
+
+    def _run(self):
+        delay = 0.0
+        while not self._stop.is_set():
+            batch = self._pending or self._next_batch(self.flush_interval)
+            if not batch:
+                continue
+            if self._write(batch):
+                if self.failing:
+                    logger.info(f"[RESULT] Ingest writer recovered after {self.retries} retries")
+                self._pending = []
+                self.failing = False
+                delay = 0.0
+            else:
+                # Keep the batch and stop accepting records until it is written
+                self._pending = batch
+                self.failing = True
+                self.retries += 1
+                delay = min(max(delay * 2, RETRY_BASE_DELAY), RETRY_MAX_DELAY)
+                self._stop.wait(delay)
+
+        # Drain whatever is left after stop was requested
+        batch = self._pending
+        while True:
+            batch = batch or self._next_batch(0)
+            if not batch:
+                break
+            if not self._write(batch):
+                lost = len(batch) + self._queue.qsize()
+                self.failed += lost
+                logger.error(f"[ERROR] Ingest writer shut down while failing, {lost} records lost")
+                break
+            batch = []
+        self._pending = []
+
+    def shutdown(self, timeout=30):
+        """Stop accepting records, flush the queue and wait for the writer"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.warning(
+                    f"[WARNING] Ingest writer did not finish in {timeout}s, "
+                    f"{self._queue.qsize()} records left"
+                )
+        logger.info(f"[RESULT] Ingest queue flushed: {self.written} written, {self.failed} failed")
+
+    def stats(self):
+        """Queue depth and throughput counters"""
+        return {
+            'depth': self._queue.qsize() + len(self._pending),
+            'max_depth': self.max_depth,
+            'capacity': self.maxsize,
+            'enqueued': self.enqueued,
+            'rejected': self.rejected,
+            'written': self.written,
+            'failed': self.failed,
+            'retries': self.retries,
+            'failing': self.failing,
+            'batches': self.batches,
+            'last_write_at': self.last_write_at,
+            'writer_alive': bool(self._thread and self._thread.is_alive()),
+        }
+
+
+_ingest_queue = None
+_ingest_queue_lock = threading.Lock()
+
+
+def queue_enabled():
+    """True if the receiver should queue records instead of writing them"""
+    return getattr(settings, 'GPS_INGEST_MODE', 'sync') == 'queue'
+
+
+def get_ingest_queue():
+    """Process-wide IngestQueue configured from settings"""
+    global _ingest_queue
+    with _ingest_queue_lock:
+        if _ingest_queue is None:
+            _ingest_queue = IngestQueue(
+                maxsize=getattr(settings, 'GPS_INGEST_QUEUE_SIZE', DEFAULT_QUEUE_SIZE),
+                batch_size=getattr(settings, 'GPS_INGEST_BATCH_SIZE', DEFAULT_BATCH_SIZE),
+                flush_interval=getattr(settings, 'GPS_INGEST_FLUSH_INTERVAL', DEFAULT_FLUSH_INTERVAL),
+            )
+            atexit.register(_ingest_queue.shutdown)
+        return _ingest_queue
@@ -0,0 +1,299 @@
+"""
+GPS Latest Positions
+In-process ring buffers of the newest corrected fixes per MAC
+
+"Where is everyone right now" (the map, base station sanity checks, the
+stability view) used to be an ORDER BY timestamp DESC over gps_data. The
+receivers now also write every valid fix into a per-MAC ring buffer:
+
+- each MAC owns preallocated NumPy arrays of GPS_LATEST_SIZE fixes; a new
+  fix overwrites the oldest one, so memory stays fixed per device
+- the raw position and the one corrected at ingest (see
+  online_correction.py) are kept side by side: /live/ shows the corrected
+  one where it exists, the stability check measures the raw one (a base
+  station's corrected position is its reference point by construction)
+- fixes older than the newest one of their MAC (retries, late batches)
+  are skipped, so every buffer stays in timestamp order
+- player names are resolved at write time, so reads never query the
+  database
+
+Like the live hub the store is per process and starts empty; imported logs
+(COPY path) do not feed it.
+"""
+import threading
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .assignments import assignments_for_day
+from .correction import GpsColumns, tick_to_datetime, to_tick
+from .functions import factorize
+from .stability import mac_stability
+
+# Fixes kept per MAC
+DEFAULT_LATEST_SIZE = 50
+
+
+class FixRing:
+    """
+    Last capacity fixes of one MAC in preallocated arrays, oldest overwritten first.
+
+    latitudes/longitudes are raw; corrected_latitudes/corrected_longitudes
+    are NaN for fixes without a corrected position.
+    """
+    __slots__ = (
+        'ticks', 'latitudes', 'longitudes', 'corrected_latitudes', 'corrected_longitudes',
+        'speeds', 'head', 'size', 'player',
+    )
+
+    def __init__(self, capacity):
+        self.ticks = np.zeros(capacity, dtype=np.int64)
+        self.latitudes = np.zeros(capacity, dtype=np.float64)
+        self.longitudes = np.zeros(capacity, dtype=np.float64)
+        self.corrected_latitudes = np.full(capacity, np.nan)
+        self.corrected_longitudes = np.full(capacity, np.nan)
+        self.speeds = np.zeros(capacity, dtype=np.float64)
+        # Next write position and number of stored fixes
+        self.head = 0
+        self.size = 0
+        self.player = None
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def newest_tick(self):
+        if not self.size:
+            return None
+        return int(self.ticks[self.head - 1])
+
+    def extend(self, ticks, latitudes, longitudes, corrected_latitudes, corrected_longitudes,
+               speeds):
+        """Append fixes in timestamp order (only the last capacity are kept)"""
+        capacity = len(self.ticks)
+        count = len(ticks)
+        if count > capacity:
+            ticks, latitudes, longitudes, corrected_latitudes, corrected_longitudes, speeds = (
+                column[-capacity:] for column in (
+                    ticks, latitudes, longitudes, corrected_latitudes, corrected_longitudes, speeds
+                )
+            )
+            count = capacity
+
+        index = (self.head + np.arange(count)) % capacity
+        self.ticks[index] = ticks
+        self.latitudes[index] = latitudes
+        self.longitudes[index] = longitudes
+        self.corrected_latitudes[index] = corrected_latitudes
+        self.corrected_longitudes[index] = corrected_longitudes
+        self.speeds[index] = speeds
+        self.head = (self.head + count) % capacity
+        self.size = min(self.size + count, capacity)
+
+    def newest(self, count):
+        """Ring positions of the newest count fixes, oldest first"""
+        count = min(count, self.size)
+        return (self.head - count + np.arange(count)) % len(self.ticks)
+
+
+class LatestStore:
+    """FixRing per MAC, safe to update and read from any thread"""
+
+    def __init__(self, capacity=DEFAULT_LATEST_SIZE):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._rings = {}
+        self.written = 0
+        self.skipped = 0
+
+    def update(self, columns, corrected_latitudes, corrected_longitudes, players=None):
+        """
+        Store fixes of a GpsColumns batch.
+
+        Args:
+            columns: GpsColumns with raw coordinates (any order)
+            corrected_latitudes, corrected_longitudes: float64 per row, NaN
+                for fixes without a corrected position
+            players: Optional {mac: player label}
+
+        Returns:
+            Number of stored fixes
+        """
+        if not len(columns):
+            return 0
+        corrected_latitudes = np.asarray(corrected_latitudes, dtype=np.float64)
+        corrected_longitudes = np.asarray(corrected_longitudes, dtype=np.float64)
+        codes = factorize(columns.macs)
+        order = np.lexsort((columns.ticks, codes))
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+
+        stored = 0
+        with self._lock:
+            for index in np.split(order, bounds):
+                mac = columns.macs[index[0]]
+                ring = self._rings.get(mac)
+                if ring is None:
+                    ring = self._rings[mac] = FixRing(self.capacity)
+
+                ticks = columns.ticks[index]
+                newest = ring.newest_tick
+                # Ticks newer than the stored ones, one fix per tick
+                keep = np.diff(ticks, prepend=-1) > 0
+                if newest is not None:
+                    keep &= ticks > newest
+                index = index[keep]
+                ring.extend(
+                    columns.ticks[index], columns.latitudes[index], columns.longitudes[index],
+                    corrected_latitudes[index], corrected_longitudes[index], columns.speeds[index],
+                )
+                if players and mac in players:
+                    ring.player = players[mac]
+                stored += len(index)
+                self.skipped += int(len(keep) - len(index))
+            self.written += stored
+        return stored
+
+    def snapshot(self, macs=None, points=1, max_age=None):
+        """
+        Newest fixes per MAC, copied out of the rings.
+
+        Args:
+            macs: Only these MACs (default: all)
+            points: Fixes per MAC, newest last
+            max_age: Leave out MACs without a fix in the last max_age seconds
+
+        Returns:
+            {mac: (player, ticks, latitudes, longitudes, corrected_latitudes,
+            corrected_longitudes, speeds)}, raw latitudes/longitudes and NaN
+            corrected coordinates for fixes without a corrected position
+        """
+        min_tick = None
+        if max_age is not None:
+            min_tick = to_tick(timezone.now() - timedelta(seconds=max_age))
+
+        with self._lock:
+            selected = self._rings if macs is None else {
+                mac: self._rings[mac] for mac in macs if mac in self._rings
+            }
+            result = {}
+            for mac, ring in selected.items():
+                if not ring.size or (min_tick is not None and ring.newest_tick < min_tick):
+                    continue
+                index = ring.newest(points)
+                result[mac] = (
+                    ring.player, ring.ticks[index], ring.latitudes[index], ring.longitudes[index],
+                    ring.corrected_latitudes[index], ring.corrected_longitudes[index],
+                    ring.speeds[index],
+                )
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'macs': len(self._rings),
+                'capacity': self.capacity,
+                'written': self.written,
+                'skipped': self.skipped,
+            }
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_latest_store():
+    """Process-wide store, created on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = LatestStore(getattr(settings, 'GPS_LATEST_SIZE', DEFAULT_LATEST_SIZE))
+        return _store
+
+
+def update_latest(records):
+    """
+    Write received GpsData records (valid fixes only) into the store.
+
+    Player names come from the cached assignments of the fix's day.
+
+    Returns:
+        Number of stored fixes
+    """
+    tz = timezone.get_default_timezone()
+    valid = [record for record in records if record.quality > 0]
+    players = {}
+    for record in valid:
+        assignment = assignments_for_day(record.timestamp.astimezone(tz).date()).get(record.mac)
+        if assignment is not None:
+            players[record.mac] = str(assignment.player)
+
+    columns = GpsColumns.from_rows([
+        tuple(getattr(record, field) for field in GpsColumns.FIELDS) for record in valid
+    ])
+    # NaN marks fixes without a corrected position
+    corrected_latitudes = np.array(
+        [record.corrected_latitude for record in valid], dtype=np.float64
+    )
+    corrected_longitudes = np.array(
+        [record.corrected_longitude for record in valid], dtype=np.float64
+    )
+    return get_latest_store().update(columns, corrected_latitudes, corrected_longitudes, players)
+
+
+def latest_positions(macs=None, points=1, max_age=None):
+    """
+    JSON-ready newest fixes per MAC, most recently seen first.
+
+    Returns:
+        List of dicts: mac, player, the newest fix (timestamp, latitude,
+        longitude, speed_kmh, corrected) and with points > 1 the track of
+        the last points fixes, oldest first. Positions are corrected where
+        a corrected position exists (corrected: true), raw otherwise
+    """
+    positions = []
+    for mac, (player, ticks, raw_lats, raw_lons, corrected_lats, corrected_lons, speeds) in (
+        get_latest_store().snapshot(macs, points, max_age).items()
+    ):
+        corrected = ~np.isnan(corrected_lats)
+        latitudes = np.where(corrected, corrected_lats, raw_lats)
+        longitudes = np.where(corrected, corrected_lons, raw_lons)
+        fixes = [
+            {
+                'timestamp': tick_to_datetime(tick).isoformat(),
+                'latitude': round(latitude, 6),
+                'longitude': round(longitude, 6),
+                'speed_kmh': round(speed, 2),
+                'corrected': is_corrected,
+            }
+            for tick, latitude, longitude, speed, is_corrected in zip(
+                ticks.tolist(), latitudes.tolist(), longitudes.tolist(),
+                speeds.tolist(), corrected.tolist(),
+            )
+        ]
+        position = {'mac': mac, 'player': player, **fixes[-1]}
+        if points > 1:
+            position['track'] = fixes
+        positions.append(position)
+
+    positions.sort(key=lambda position: position['timestamp'], reverse=True)
+    return positions
+
+
+def latest_stability(macs=None, min_points=2):
+    """
+    mac_stability() of the buffered fixes of every MAC, most stable first.
+
+    A quick base station sanity check without reading gps_data: a base
+    station should show centimetre-level spread over its last fixes. Uses
+    the raw positions, like the database path of stability.py.
+    """
+    store = get_latest_store()
+    results = []
+    for mac, (_, _, latitudes, longitudes, _, _, _) in (
+        store.snapshot(macs, points=store.capacity).items()
+    ):
+        if len(latitudes) < min_points:
+            continue
+        results.append({'mac': mac, **mac_stability(latitudes, longitudes)})
+    results.sort(key=lambda x: x['avg_distance_m'])
+    return results
@@ -0,0 +1,234 @@
+"""
+GPS Live Feed
+In-process pub/sub hub pushing newly ingested fixes to map clients
+
+Map clients used to poll /history/ every few seconds, so every viewer
+re-queried and re-serialized the match. Now a client subscribes to a match
+through the server-sent events endpoint (views/api/live.py). After each
+ingest write the new fixes, corrected at ingest (see online_correction.py),
+are fanned out to all of the match's subscribers, so N viewers cost one
+write and no extra query per batch.
+
+- subscribers live in the ASGI event loop, each with a bounded asyncio queue
+- publishing is thread-safe (ingest runs in request threads and the ingest
+  queue writer) and hands batches to the loop with call_soon_threadsafe
+- a slow client whose queue is full loses batches instead of blocking
+  ingestion; it can catch up with /history/?since=
+
+The hub is per process: run the live endpoint in the same process as the
+receiver (e.g. uvicorn with one worker, or sticky routing).
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.utils import timezone
+from .assignments import player_labels
+from .correction import GpsColumns
+from .functions import haversine_distance
+from .models import Match
+
+logger = logging.getLogger(__name__)
+
+# Batches buffered per subscriber before new batches are dropped
+DEFAULT_QUEUE_SIZE = 256
+
+
+class Subscription:
+    """One client of the live feed: a bounded queue in its event loop"""
+
+    def __init__(self, match_id, day, loop, maxsize):
+        self.match_id = match_id
+        self.day = day
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def _put(self, points):
+        try:
+            self.queue.put_nowait(points)
+        except asyncio.QueueFull:
+            self.dropped += len(points)
+
+    def deliver(self, points):
+        """Queue a batch from any thread (raises RuntimeError if the loop is closed)"""
+        self.loop.call_soon_threadsafe(self._put, points)
+
+    async def get(self, timeout):
+        """Next batch of points, or None after timeout seconds"""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LiveHub:
+    """
+    Fan-out of corrected fixes to subscribers, keyed by match.
+
+    The hub also keeps the last published position of every MAC per match
+    so step_dist continues across batches as in /history/.
+    """
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._days = {}
+        self._last_positions = {}
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self, match):
+        """Register a subscriber for match; must be called from the event loop"""
+        subscription = Subscription(
+            match.id, match.date, asyncio.get_running_loop(), self.queue_size
+        )
+        with self._lock:
+            self._subscribers[match.id].add(subscription)
+            self._days[match.id] = match.date
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.match_id)
+            if not subscribers or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            self.dropped += subscription.dropped
+            if not subscribers:
+                del self._subscribers[subscription.match_id]
+                self._days.pop(subscription.match_id, None)
+                self._last_positions.pop(subscription.match_id, None)
+
+    def watched(self):
+        """{match_id: day} of matches with at least one subscriber"""
+        with self._lock:
+            return dict(self._days)
+
+    def step_distances(self, match_id, macs, latitudes, longitudes):
+        """Distance from the previous published position of each MAC, in meters"""
+        distances = []
+        with self._lock:
+            last = self._last_positions.setdefault(match_id, {})
+            for mac, latitude, longitude in zip(macs, latitudes, longitudes):
+                previous = last.get(mac)
+                distances.append(
+                    haversine_distance(previous[0], previous[1], latitude, longitude)
+                    if previous else 0.0
+                )
+                last[mac] = (latitude, longitude)
+        return distances
+
+    def publish(self, match_id, points):
+        """Deliver a batch of points to every subscriber of a match"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(match_id, ()))
+
+        for subscription in subscribers:
+            try:
+                subscription.deliver(points)
+            except RuntimeError:
+                # Event loop of the client is gone
+                self.unsubscribe(subscription)
+        self.published += len(points)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'matches': len(self._subscribers),
+                'subscribers': sum(len(subs) for subs in self._subscribers.values()),
+                'published': self.published,
+                'dropped': self.dropped + sum(
+                    sub.dropped for subs in self._subscribers.values() for sub in subs
+                ),
+            }
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def live_enabled():
+    """
+    True if the live stream is served (GPS_LIVE_ENABLED).
+
+    Only for single-process ASGI deployments: under WSGI every stream holds
+    a worker, and with several processes a subscriber only sees the fixes
+    received by its own process.
+    """
+    return getattr(settings, 'GPS_LIVE_ENABLED', False)
+
+
+def get_live_hub():
+    """Process-wide hub, created on first use"""
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = LiveHub(getattr(settings, 'GPS_LIVE_QUEUE_SIZE', DEFAULT_QUEUE_SIZE))
+        return _hub
+
+
+def _match_points(hub, match, records):
+    """Corrected live points of one match for records ordered by timestamp"""
+    columns, _ = GpsColumns.from_records(records)
+
+    macs = columns.macs.tolist()
+    latitudes = columns.latitudes.tolist()
+    longitudes = columns.longitudes.tolist()
+    step_dist = hub.step_distances(match.id, macs, latitudes, longitudes)
+    players = player_labels(columns.macs, columns.ticks).tolist()
+
+    return [
+        {
+            'timestamp': timestamp.isoformat(),
+            'mac': mac,
+            'player': player,
+            'latitude': round(latitude, 6),
+            'longitude': round(longitude, 6),
+            'speed_kmh': round(speed, 2),
+            'step_dist': round(dist, 2),
+        }
+        for timestamp, mac, player, latitude, longitude, speed, dist in zip(
+            columns.timestamps, macs, players, latitudes, longitudes,
+            columns.speeds.tolist(), step_dist,
+        )
+    ]
+
+
+def publish_fixes(records):
+    """
+    Publish written GpsData records to the subscribers of their match.
+
+    Costs one dict lookup when nobody is watching. Otherwise the watched
+    matches are loaded (one query); positions are the ones corrected at
+    ingest.
+
+    Returns:
+        Number of published points
+    """
+    hub = get_live_hub()
+    watched = hub.watched()
+    if not watched:
+        return 0
+
+    tz = timezone.get_default_timezone()
+    days = set(watched.values())
+    by_day = defaultdict(list)
+    for record in records:
+        if record.quality <= 0:
+            continue
+        day = record.timestamp.astimezone(tz).date()
+        if day in days:
+            by_day[day].append(record)
+    if not by_day:
+        return 0
+
+    published = 0
+    for match in Match.objects.filter(id__in=list(watched), date__in=list(by_day)):
+        day_records = sorted(by_day[match.date], key=lambda record: record.timestamp)
+        points = _match_points(hub, match, day_records)
+        hub.publish(match.id, points)
+        published += len(points)
+    return published
@@ -0,0 +1,297 @@
+"""
+GPS Log Import
+Chunked, process-parallel parsing of receiver logs
+
+Parses log lines written by the receiver:
+    INFO 2026-01-09 17:23:54,551 receiver 3866476 ... [INCOMING] MAC: D8F15B0A3E69
+    INFO 2026-01-09 17:23:54,551 receiver 3866476 ... [INCOMING] RAW GPS: $GNRMC,...
+
+Log files are split into byte chunks that end on a line boundary, so chunks
+can be parsed independently in worker processes. A worker does not know the
+MAC announced before its chunk starts: fixes seen before the first MAC line
+of a chunk are returned with mac=None and resolved by the caller from the
+previous chunk's last MAC.
+
+Plain files are memory-mapped by the workers themselves, so only byte
+ranges cross the process boundary. Gzip and zstd (optional 'zstandard'
+package) files are decompressed as a stream by the caller. In both cases
+lines are located with a byte search for '[INCOMING]' first; the other
+lines (DEBUG, SQL, ...) are never split, decoded or matched by a regex.
+Offsets of compressed logs count decompressed bytes.
+
+This module does not import Django, so worker processes stay lightweight
+regardless of the multiprocessing start method.
+"""
+import glob
+import gzip
+import mmap
+import os
+import re
+from datetime import datetime
+
+from .nmea import parse_sentence
+
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Every line the importer cares about contains this marker
+INCOMING_MARKER = b'[INCOMING]'
+
+GZIP_SUFFIXES = ('.gz',)
+ZSTD_SUFFIXES = ('.zst', '.zstd')
+
+MAC_PATTERN = re.compile(
+    rb'INFO (\d{4}-\d{2}-\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3}) '
+    rb'receiver \d+ .* \[INCOMING\] MAC: ([A-F0-9:]+)'
+)
+GPS_PATTERN = re.compile(
+    rb'INFO (\d{4}-\d{2}-\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3}) '
+    rb'receiver \d+ .* \[INCOMING\] RAW GPS: (\$[A-Z]+.*)'
+)
+
+
+class LogFormatError(Exception):
+    """Raised for log files that cannot be opened (e.g. missing decompressor)"""
+
+
+class ChunkResult:
+    """Parsed fixes of one chunk plus the state needed to stitch chunks"""
+    __slots__ = ('start', 'end', 'rows', 'last_mac', 'skipped', 'errors')
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        # (mac or None, timestamp, latitude, longitude, speed_kmh, quality)
+        self.rows = []
+        self.last_mac = None
+        self.skipped = 0
+        # (byte offset, message)
+        self.errors = []
+
+
+def resolve_log_paths(path):
+    """
+    Expand a file, directory or glob pattern into log files.
+
+    Files are ordered by modification time (oldest first), which keeps
+    rotated logs (gps.log.3.gz, gps.log.2.gz, ...) in write order.
+    """
+    if os.path.isdir(path):
+        paths = [os.path.join(path, name) for name in os.listdir(path)]
+    elif glob.has_magic(path):
+        paths = glob.glob(path)
+    else:
+        return [path]
+
+    paths = [p for p in paths if os.path.isfile(p) and not p.endswith('.checkpoint')]
+    return sorted(paths, key=lambda p: (os.path.getmtime(p), p))
+
+
+def is_compressed(path):
+    return path.endswith(GZIP_SUFFIXES + ZSTD_SUFFIXES)
+
+
+def open_compressed(path):
+    """Binary stream of the decompressed contents of a .gz/.zst log"""
+    if path.endswith(GZIP_SUFFIXES):
+        return gzip.open(path, 'rb')
+
+    try:
+        import zstandard
+    except ImportError:
+        raise LogFormatError(f'Reading {path} requires the zstandard package')
+    return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+
+
+def _skip(f, start):
+    """Position a (possibly non-seekable) stream at start"""
+    if not start:
+        return
+    try:
+        f.seek(start)
+    except (OSError, ValueError):
+        remaining = start
+        while remaining:
+            data = f.read(min(remaining, DEFAULT_CHUNK_SIZE))
+            if not data:
+                break
+            remaining -= len(data)
+
+
+def iter_chunks(f, start=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read a binary stream in chunks that end on a newline.
+
+    Yields:
+        Tuples (start_offset, end_offset, data)
+    """
+    _skip(f, start)
+    offset = start
+    tail = b''
+    while True:
+        data = f.read(chunk_size)
+        if not data:
+            break
+        data = tail + data
+        cut = data.rfind(b'\n') + 1
+        if not cut:
+            tail = data
+            continue
+        data, tail = data[:cut], data[cut:]
+        yield offset, offset + len(data), data
+        offset += len(data)
+    if tail:
+        yield offset, offset + len(tail), tail
+
+
+def file_ranges(path, start=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Split a plain file into line-aligned byte ranges without reading it.
+
+    Yields:
+        Tuples (start_offset, end_offset)
+    """
+    size = os.path.getsize(path)
+    if start >= size:
+        return
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        offset = start
+        while offset < size:
+            newline = mm.find(b'\n', min(offset + chunk_size, size) - 1)
+            end = size if newline == -1 else newline + 1
+            yield offset, end
+            offset = end
+
+
+def chunk_tasks(path, start=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Units of parsing work for one log file.
+
+    Yields:
+        Tuples (function, args); call function(*args, match_date, tz) to
+        get a ChunkResult. Plain files yield byte ranges that the worker
+        maps itself, compressed files yield decompressed chunk bytes.
+    """
+    if is_compressed(path):
+        with open_compressed(path) as f:
+            for chunk_start, chunk_end, data in iter_chunks(f, start, chunk_size):
+                yield parse_chunk, (chunk_start, chunk_end, data)
+    else:
+        for chunk_start, chunk_end in file_ranges(path, start, chunk_size):
+            yield parse_file_range, (path, chunk_start, chunk_end)
+
+
+def incoming_lines(buffer, start, end, base=0):
+    """
+    Lines of buffer[start:end] that contain INCOMING_MARKER.
+
+    Works on bytes and mmap objects; the gaps between matches are skipped
+    by find() without looking at individual lines.
+
+    Yields:
+        Tuples (offset, line) with offset = base + position in buffer
+    """
+    find = buffer.find
+    rfind = buffer.rfind
+    pos = find(INCOMING_MARKER, start, end)
+    while pos != -1:
+        line_start = max(rfind(b'\n', start, pos) + 1, start)
+        line_end = find(b'\n', pos, end)
+        if line_end == -1:
+            line_end = end
+        yield base + line_start, buffer[line_start:line_end]
+        pos = find(INCOMING_MARKER, line_end, end)
+
+
+def fix_from_sentence(parsed):
+    """
+    Position, speed and quality of a GGA/RMC sentence.
+
+    Returns:
+        Tuple (latitude, longitude, speed_kmh, quality), or None for invalid
+        fixes and other sentence types
+    """
+    if parsed is None:
+        return None
+    if parsed.latitude is None or parsed.longitude is None:
+        return None
+
+    if parsed.kind == 'RMC':
+        if parsed.status != 'A':  # A = active
+            return None
+        return parsed.latitude, parsed.longitude, parsed.speed_kmh, 1  # GPS fix
+
+    if parsed.kind == 'GGA':
+        if parsed.quality == 0:
+            return None
+        return parsed.latitude, parsed.longitude, 0.0, parsed.quality  # GGA has no speed
+
+    return None
+
+
+def _parse_lines(lines, result, match_date, tz):
+    """Fill result from (offset, line) pairs"""
+    current_mac = None
+    dates = {}
+
+    for line_offset, line in lines:
+        mac_match = MAC_PATTERN.search(line)
+        if mac_match:
+            current_mac = mac_match.group(6).decode('ascii')
+            result.last_mac = current_mac
+            continue
+
+        gps_match = GPS_PATTERN.search(line)
+        if not gps_match:
+            continue
+
+        try:
+            fix = fix_from_sentence(parse_sentence(gps_match.group(6)))
+            if fix is None:
+                result.skipped += 1
+                continue
+
+            use_date = match_date or gps_match.group(1).decode('ascii')
+            day = dates.get(use_date)
+            if day is None:
+                day = dates[use_date] = tuple(int(part) for part in use_date.split('-'))
+
+            timestamp = datetime(
+                *day,
+                int(gps_match.group(2)), int(gps_match.group(3)), int(gps_match.group(4)),
+                int(gps_match.group(5)) * 1000,
+                tzinfo=tz,
+            )
+            result.rows.append((current_mac, timestamp) + fix)
+        except Exception as e:
+            result.errors.append((line_offset, f'MAC {current_mac}: {e}'))
+
+    return result
+
+
+def parse_chunk(start, end, data, match_date, tz):
+    """
+    Parse one chunk of a receiver log.
+
+    Args:
+        start, end: Byte offsets of the chunk in the (decompressed) log
+        data: Chunk bytes (whole lines)
+        match_date: 'YYYY-MM-DD' overriding the log date, or None
+        tz: tzinfo of the log timestamps
+
+    Returns:
+        ChunkResult
+    """
+    return _parse_lines(
+        incoming_lines(data, 0, len(data), base=start),
+        ChunkResult(start, end), match_date, tz,
+    )
+
+
+def parse_file_range(path, start, end, match_date, tz):
+    """parse_chunk for a byte range of a plain file, read through mmap"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return _parse_lines(
+            incoming_lines(mm, start, end),
+            ChunkResult(start, end), match_date, tz,
+        )
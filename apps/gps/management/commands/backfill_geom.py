@@ -0,0 +1,61 @@
+"""
+Management command to fill missing PostGIS geometry for GPS data.
+Projects lat/lon of rows with NULL geom to EPSG:2180 in vectorized batches.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from apps.gps.models import GpsData
+from apps.gps.projection import puwg92_points
+
+
+class Command(BaseCommand):
+    help = 'Compute missing geom (EPSG:2180) for GPS data rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10000,
+            help='Rows projected and updated per batch (default: 10000)',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        query = GpsData.objects.filter(geom__isnull=True).order_by('id')
+
+        updated = 0
+        skipped = 0
+        last_id = 0
+
+        while True:
+            rows = list(
+                query.filter(id__gt=last_id).values_list(
+                    'id', 'latitude', 'longitude'
+                )[:batch_size]
+            )
+            if not rows:
+                break
+
+            ids, latitudes, longitudes = zip(*rows)
+            last_id = ids[-1]
+
+            points = puwg92_points(latitudes, longitudes)
+            batch = [
+                GpsData(id=row_id, geom=point)
+                for row_id, point in zip(ids, points)
+                if point is not None
+            ]
+            skipped += len(rows) - len(batch)
+
+            with transaction.atomic():
+                GpsData.objects.bulk_update(batch, ['geom'])
+            updated += len(batch)
+
+            self.stdout.write(f'Updated {updated} rows (last id {last_id})')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Backfill complete: {updated} updated, {skipped} skipped '
+                f'(no coordinates)'
+            )
+        )
@@ -0,0 +1,114 @@
+"""
+Management command to check the query plan of the history endpoints.
+Runs EXPLAIN on the exact history queryset and fails if gps_data is read
+with a sequential scan, i.e. if the time range filter stopped being
+index-friendly (e.g. a regression back to timestamp__date).
+
+Sequential scans are disabled for the EXPLAIN (SET LOCAL enable_seqscan),
+so small development tables still show whether an index path exists.
+
+Example:
+    python manage.py explain_history --match 3 --mac D8F15B0A3E69
+"""
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from apps.gps.models import GpsData, Match
+from apps.gps.views.api.history import _history_query
+
+
+def plan_nodes(plan):
+    """All nodes of a JSON plan tree, depth first"""
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN the history query and fail on sequential scans of gps_data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--match',
+            type=int,
+            help='Match ID (default: last N hours, as the endpoint without ?match)',
+        )
+        parser.add_argument(
+            '--hours',
+            type=int,
+            default=24,
+            help='Hours to look back when no match is given (default: 24)',
+        )
+        parser.add_argument(
+            '--mac',
+            type=str,
+            help='Also check the single-device variant of the query',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run EXPLAIN ANALYZE (executes the query)',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('explain_history requires PostgreSQL')
+
+        match = None
+        if options['match']:
+            try:
+                match = Match.objects.get(id=options['match'])
+            except Match.DoesNotExist:
+                raise CommandError(f"Match not found: {options['match']}")
+
+        query = _history_query(match, options['hours']).order_by('timestamp')
+        queries = [('history', query)]
+        if options['mac']:
+            queries.append((f"history mac={options['mac']}", query.filter(mac=options['mac'])))
+
+        failures = []
+        for label, queryset in queries:
+            plan = self.explain(queryset, options['analyze'])
+            self.stdout.write(self.style.SUCCESS(f'\n=== {label} ==='))
+            self.write_plan(plan)
+
+            for node in plan_nodes(plan):
+                relation = node.get('Relation Name', '')
+                if node['Node Type'] == 'Seq Scan' and relation.startswith(GpsData._meta.db_table):
+                    failures.append(f'{label}: Seq Scan on {relation}')
+
+        if failures:
+            raise CommandError('Sequential scan in history plan:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('\nOK: history queries use indexes'))
+
+    def explain(self, queryset, analyze=False):
+        """Top plan node of EXPLAIN (FORMAT JSON) for queryset"""
+        sql, params = queryset.query.sql_with_params()
+        options = 'ANALYZE, BUFFERS, FORMAT JSON' if analyze else 'FORMAT JSON'
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN ({options}) {sql}', params)
+            result = cursor.fetchone()[0]
+        if isinstance(result, str):
+            result = json.loads(result)
+        return result[0]['Plan']
+
+    def write_plan(self, plan, depth=0):
+        """Compact plan tree: node type, relation, index and row estimates"""
+        parts = [plan['Node Type']]
+        if 'Relation Name' in plan:
+            parts.append(f"on {plan['Relation Name']}")
+        if 'Index Name' in plan:
+            parts.append(f"using {plan['Index Name']}")
+        parts.append(f"(rows={plan.get('Plan Rows')}")
+        if 'Actual Rows' in plan:
+            parts[-1] += f" actual={plan['Actual Rows']} time={plan.get('Actual Total Time')}ms"
+        parts[-1] += ')'
+        self.stdout.write('  ' * depth + ' '.join(parts))
+
+        for condition in ('Index Cond', 'Recheck Cond', 'Filter'):
+            if condition in plan:
+                self.stdout.write('  ' * depth + f'    {condition}: {plan[condition]}')
+
+        for child in plan.get('Plans', []):
+            self.write_plan(child, depth + 1)
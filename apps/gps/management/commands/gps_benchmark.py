@@ -0,0 +1,121 @@
+"""
+Management command to benchmark GPS processing kernels on synthetic data.
+Does not touch the database.
+"""
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from datetime import datetime, timezone
+from apps.gps.functions import convert_to_decimal, haversine_distance, step_distances
+from apps.gps.nmea import parse_payload
+from .loadtest_receiver import synthetic_payload
+
+
+class Command(BaseCommand):
+    help = 'Benchmark GPS processing kernels on synthetic data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'target',
+            choices=['haversine', 'nmea'],
+            help='Kernel to benchmark',
+        )
+        parser.add_argument(
+            '--points',
+            type=int,
+            default=1000000,
+            help='Number of synthetic points / NMEA lines (default: 1000000)',
+        )
+        parser.add_argument(
+            '--macs',
+            type=int,
+            default=22,
+            help='Number of synthetic devices (default: 22)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed',
+        )
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        getattr(self, f"bench_{options['target']}")(rng, options)
+
+    def timed(self, label, func, *args):
+        """Run func once and report wall time"""
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f'{label}: {elapsed:.3f}s')
+        return result, elapsed
+
+    def bench_haversine(self, rng, options):
+        """Per-MAC step distances: Python loop vs one vectorized call"""
+        points = options['points']
+        macs = np.array([f'MAC{i:02d}' for i in range(options['macs'])], dtype=object)
+
+        # Players moving around a pitch in Gliwice, interleaved in time order
+        mac_column = macs[rng.integers(0, len(macs), points)]
+        latitudes = 50.2585 + rng.normal(0, 2e-4, points)
+        longitudes = 18.9659 + rng.normal(0, 3e-4, points)
+
+        self.stdout.write(f'{points} points, {len(macs)} MACs')
+
+        def python_loop(mac_column, latitudes, longitudes):
+            step_dist = [0.0] * len(mac_column)
+            last_position_by_mac = {}
+            for i, (mac, lat, lon) in enumerate(
+                zip(mac_column.tolist(), latitudes.tolist(), longitudes.tolist())
+            ):
+                previous = last_position_by_mac.get(mac)
+                if previous:
+                    step_dist[i] = haversine_distance(previous[0], previous[1], lat, lon)
+                last_position_by_mac[mac] = (lat, lon)
+            return step_dist
+
+        expected, loop_time = self.timed('Python loop', python_loop, mac_column, latitudes, longitudes)
+        result, vector_time = self.timed('Vectorized', step_distances, mac_column, latitudes, longitudes)
+
+        max_error = float(np.max(np.abs(result - np.asarray(expected))))
+        self.stdout.write(f'Max difference: {max_error:.2e} m')
+        self.stdout.write(
+            self.style.SUCCESS(f'Speedup: {loop_time / vector_time:.1f}x')
+        )
+
+    def bench_nmea(self, rng, options):
+        """NMEA parsing: legacy split/slice parsing vs apps.gps.nmea (lines/sec)"""
+        fixes = options['points'] // 2
+        payload = synthetic_payload(datetime(2026, 1, 9, 17, 0, tzinfo=timezone.utc), fixes)
+        payload_bytes = payload.encode('ascii')
+        lines = 2 * fixes
+
+        self.stdout.write(f'{lines} lines, {len(payload_bytes) / 1e6:.1f} MB')
+
+        def legacy(gps_raw):
+            # Receiver parsing before apps.gps.nmea (no checksum validation)
+            parsed = 0
+            for line in gps_raw.strip().split('\n'):
+                parts = line.strip().split(',')
+                sentence_type = parts[0][3:6] if len(parts[0]) >= 6 else ''
+                if sentence_type == 'GGA' and len(parts) >= 10:
+                    convert_to_decimal(parts[2], parts[3])
+                    convert_to_decimal(parts[4], parts[5])
+                    int(parts[6]), int(parts[7]), float(parts[8]), float(parts[9])
+                    parsed += 1
+                elif sentence_type == 'RMC' and len(parts) >= 10:
+                    float(parts[7]) * 1.852, float(parts[8])
+                    convert_to_decimal(parts[3], parts[4])
+                    convert_to_decimal(parts[5], parts[6])
+                    parsed += 1
+            return parsed
+
+        _, legacy_time = self.timed('Legacy split parser', legacy, payload)
+        (sentences, rejected), nmea_time = self.timed('apps.gps.nmea', parse_payload, payload_bytes)
+
+        self.stdout.write(f'Parsed {len(sentences)} sentences, {rejected} rejected')
+        self.stdout.write(f'Legacy: {lines / legacy_time:,.0f} lines/s')
+        self.stdout.write(
+            self.style.SUCCESS(f'apps.gps.nmea (checksum validated): {lines / nmea_time:,.0f} lines/s')
+        )
@@ -0,0 +1,113 @@
+"""
+Management command to manage the daily partitions of gps_data.
+
+Examples:
+    python manage.py gps_partitions list
+    python manage.py gps_partitions create --matches
+    python manage.py gps_partitions create 2026-01-09 2026-01-16
+    python manage.py gps_partitions detach 2025-06-01
+    python manage.py gps_partitions attach 2025-06-01
+    python manage.py gps_partitions archive --before 2025-08-01 --output-dir /srv/archive
+"""
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+from apps.gps import partitions
+from apps.gps.models import Match
+
+
+class Command(BaseCommand):
+    help = 'List, create, attach, detach or archive daily gps_data partitions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'action',
+            choices=['list', 'create', 'attach', 'detach', 'archive'],
+            help='Operation to perform',
+        )
+        parser.add_argument(
+            'days',
+            nargs='*',
+            type=str,
+            help='Partition days (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--matches',
+            action='store_true',
+            help='create: all match days',
+        )
+        parser.add_argument(
+            '--before',
+            type=str,
+            help='detach/archive: all attached partitions older than this day (YYYY-MM-DD)',
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default='.',
+            help='archive: directory for the .csv.gz dumps (default: current directory)',
+        )
+
+    def handle(self, *args, **options):
+        if not partitions.is_partitioned():
+            raise CommandError('gps_data is not a partitioned table (run migrations on PostgreSQL)')
+
+        action = options['action']
+        if action == 'list':
+            self.list_partitions()
+            return
+
+        days = self.selected_days(options)
+        if not days:
+            raise CommandError('No partition days given')
+
+        for day in days:
+            try:
+                if action == 'create':
+                    created = partitions.create_partition(day)
+                    message = 'created' if created else 'already exists'
+                elif action == 'attach':
+                    partitions.attach_partition(day)
+                    message = 'attached'
+                elif action == 'detach':
+                    partitions.detach_partition(day)
+                    message = 'detached'
+                else:
+                    message = f"archived to {partitions.archive_partition(day, options['output_dir'])}"
+            except (DatabaseError, ValueError) as e:
+                raise CommandError(f'{partitions.partition_name(day)}: {e}')
+
+            self.stdout.write(self.style.SUCCESS(f'{partitions.partition_name(day)}: {message}'))
+
+    def parse_day(self, value):
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise CommandError(f'Invalid day: {value} (expected YYYY-MM-DD)')
+
+    def selected_days(self, options):
+        """Days from arguments, --matches and --before"""
+        days = {self.parse_day(value) for value in options['days']}
+
+        if options['matches']:
+            days.update(Match.objects.values_list('date', flat=True))
+
+        if options['before']:
+            if options['action'] not in ('detach', 'archive'):
+                raise CommandError('--before is only valid for detach and archive')
+            days.update(partitions.partitions_before(self.parse_day(options['before'])))
+
+        return sorted(days)
+
+    def list_partitions(self):
+        rows = partitions.list_partitions()
+        if not rows:
+            self.stdout.write(self.style.WARNING('No partitions attached'))
+            return
+
+        self.stdout.write(self.style.SUCCESS('\n=== gps_data partitions ===\n'))
+        for partition in rows:
+            self.stdout.write(
+                f"{partition['name']:<24} ~{partition['rows']:>10} rows "
+                f"{partition['size'] / 1024 / 1024:>9.1f} MB  {partition['bounds']}"
+            )
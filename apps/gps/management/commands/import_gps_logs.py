@@ -1,249 +1,220 @@
 """
 Management command to import GPS data from log files.
 Parses log format: INFO 2026-01-09 17:23:54,551 receiver 3866476 ... [INCOMING] RAW GPS: $GNRMC,...
+
+Accepts a plain, .gz or .zst log file, a directory or a glob pattern
+(e.g. "logs/gps.log*"). Files are split into line-aligned chunks that are
+parsed in a process pool. Fixes are loaded with COPY FROM STDIN in large
+batches; fixes already stored (same mac and timestamp) are skipped by the
+database with ON CONFLICT DO NOTHING and reported as duplicates. After
+every batch the finished files and the byte offset in the current file are
+written to a checkpoint, so an interrupted import continues with --resume.
 """
-import re
+import glob
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
-from apps.gps.models import GpsData, Match
-from apps.gps.functions import convert_to_decimal
+from apps.gps.ingest import copy_gps_rows
+from apps.gps.log_import import (
+    DEFAULT_CHUNK_SIZE, LogFormatError, chunk_tasks, resolve_log_paths,
+)
 
 
 class Command(BaseCommand):
     help = 'Import GPS data from log files'
 
     def add_arguments(self, parser):
-        parser.add_argument('logfile', type=str, help='Path to the log file')
+        parser.add_argument(
+            'logfile',
+            type=str,
+            help='Log file (plain, .gz, .zst), directory or glob pattern'
+        )
         parser.add_argument(
             '--match-date',
             type=str,
             help='Match date (YYYY-MM-DD). If not provided, uses date from log.'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Parser processes (default: CPU count, 1 = parse in this process)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE // (1024 * 1024),
+            help=f'Chunk size in MB handed to a worker (default: {DEFAULT_CHUNK_SIZE // (1024 * 1024)})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50000,
+            help='Rows per COPY batch and checkpoint (default: 50000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            type=str,
+            help='Checkpoint file (default: <logfile>.checkpoint)'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue from the offset stored in the checkpoint file'
+        )
 
     def handle(self, *args, **options):
         logfile = options['logfile']
         match_date = options.get('match_date')
-        
-        try:
-            with open(logfile, 'r') as f:
-                self.process_logfile(f, match_date)
-        except FileNotFoundError:
-            raise CommandError(f'Log file not found: {logfile}')
-
-    def process_logfile(self, logfile, match_date):
-        """Process log file and import GPS data"""
-        
-        # Patterns for MAC and RAW GPS lines
-        mac_pattern = re.compile(
-            r'INFO (\d{4}-\d{2}-\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3}) '
-            r'receiver \d+ .* \[INCOMING\] MAC: ([A-F0-9:]+)'
-        )
-        gps_pattern = re.compile(
-            r'INFO (\d{4}-\d{2}-\d{2}) (\d{2}):(\d{2}):(\d{2}),(\d{3}) '
-            r'receiver \d+ .* \[INCOMING\] RAW GPS: (\$[A-Z]+.*)'
-        )
-        
-        imported = 0
-        skipped = 0
-        errors = 0
-        current_mac = None
-        
-        for line_num, line in enumerate(logfile, 1):
-            # Check for MAC line
-            mac_match = mac_pattern.search(line)
-            if mac_match:
-                current_mac = mac_match.group(6)
+        checkpoint_path = options['checkpoint'] or self.default_checkpoint(logfile)
+
+        if match_date:
+            try:
+                datetime.strptime(match_date, '%Y-%m-%d')
+            except ValueError:
+                raise CommandError(f'Invalid --match-date: {match_date} (expected YYYY-MM-DD)')
+
+        paths = resolve_log_paths(logfile)
+        if not paths:
+            raise CommandError(f'No log files found: {logfile}')
+
+        state = {'done': [], 'logfile': None, 'offset': 0, 'mac': None}
+        if options['resume']:
+            state = self.read_checkpoint(checkpoint_path, state)
+
+        self.counts = {'imported': 0, 'skipped': 0, 'duplicates': 0, 'errors': 0}
+
+        current_mac = state['mac']
+        for path in paths:
+            path = os.path.abspath(path)
+            if path in state['done']:
+                self.stdout.write(f'Skipping {path} (already imported)')
                 continue
-            
-            # Check for GPS line
-            gps_match = gps_pattern.search(line)
-            if gps_match:
-                log_date = gps_match.group(1)
-                hour = int(gps_match.group(2))
-                minute = int(gps_match.group(3))
-                second = int(gps_match.group(4))
-                millisecond = int(gps_match.group(5))
-                sentence = gps_match.group(6).strip()
-                
-                # Use current_mac if available, otherwise skip
-                if not current_mac:
-                    skipped += 1
-                    continue
-                
-                use_date = match_date if match_date else log_date
-                
-                try:
-                    gps_record = self.parse_gnss_sentence(
-                        sentence, use_date, hour, minute, second,
-                        millisecond, current_mac
-                    )
-                    
-                    if gps_record:
-                        self.save_gps_record(gps_record, use_date)
-                        imported += 1
-                    else:
-                        skipped += 1
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(
-                            f'Line {line_num} (MAC {current_mac}): {str(e)}'
-                        )
-                    )
-                    errors += 1
-        
+
+            start = state['offset'] if path == state['logfile'] else 0
+            if start:
+                self.stdout.write(f'Resuming {path} at byte {start} (MAC {current_mac})')
+            elif len(paths) > 1:
+                self.stdout.write(f'Importing {path}')
+
+            try:
+                current_mac = self.process_logfile(
+                    path, match_date, start, current_mac, checkpoint_path, state, options
+                )
+            except FileNotFoundError:
+                raise CommandError(f'Log file not found: {path}')
+            except LogFormatError as e:
+                raise CommandError(str(e))
+
+            state['done'].append(path)
+            self.write_checkpoint(checkpoint_path, state, None, 0, current_mac)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
         self.stdout.write(
             self.style.SUCCESS(
-                f'Import complete: {imported} imported, {skipped} skipped, '
-                f'{errors} errors'
+                f"Import complete: {self.counts['imported']} imported, "
+                f"{self.counts['skipped']} skipped, {self.counts['duplicates']} duplicates, "
+                f"{self.counts['errors']} errors"
             )
         )
 
-    def parse_gnss_sentence(
-        self, sentence, date_str, hour, minute, second, millisecond, mac
-    ):
-        """Parse GNRMC or GNGGA sentence"""
-        
-        parts = sentence.split(',')
-        if not parts:
-            return None
-        
-        sentence_type = parts[0]
-        
-        if sentence_type in ['$GNRMC', '$GPRMC']:
-            return self.parse_rmc(
-                parts, date_str, hour, minute, second, millisecond, mac
-            )
-        elif sentence_type in ['$GNGGA', '$GPGGA']:
-            return self.parse_gga(
-                parts, date_str, hour, minute, second, millisecond, mac
-            )
-        
-        return None
+    def default_checkpoint(self, logfile):
+        """<file or directory>.checkpoint, or import_gps_logs.checkpoint for a glob"""
+        if glob.has_magic(logfile):
+            return 'import_gps_logs.checkpoint'
+        return f"{logfile.rstrip(os.sep)}.checkpoint"
 
-    def parse_rmc(self, parts, date_str, hour, minute, second, millisecond, mac):
-        """
-        Parse GNRMC sentence format:
-        $GNRMC,162352.800,A,5016.611174,N,01903.767172,E,2.44,163.88,090126,,,D,V*03
-        """
-        if len(parts) < 10:
-            return None
-        
+    def read_checkpoint(self, checkpoint_path, default):
+        """Return the stored import state, or default if there is none"""
         try:
-            status = parts[2]  # A = active
-            if status != 'A':
-                return None
-            
-            lat_str = parts[3]
-            lat_hem = parts[4]
-            lon_str = parts[5]
-            lon_hem = parts[6]
-            speed_knots = float(parts[7]) if parts[7] else 0.0
-            
-            latitude = convert_to_decimal(lat_str, lat_hem)
-            longitude = convert_to_decimal(lon_str, lon_hem)
-            
-            if latitude is False or longitude is False:
-                return None
-            
-            # Convert knots to km/h
-            speed_kmh = speed_knots * 1.852
-            
-            # Parse date from DDMMYY format
-            date_from_sentence = parts[9]
-            if date_from_sentence and len(date_from_sentence) == 6:
-                day = int(date_from_sentence[0:2])
-                month = int(date_from_sentence[2:4])
-                year = int(date_from_sentence[4:6])
-                use_date = f'20{year:02d}-{month:02d}-{day:02d}'
-            else:
-                use_date = date_str
-            
-            return {
-                'mac': mac,
-                'date': use_date,
-                'hour': hour,
-                'minute': minute,
-                'second': second,
-                'millisecond': millisecond,
-                'latitude': latitude,
-                'longitude': longitude,
-                'speed_kmh': speed_kmh,
-                'quality': 1  # GPS fix
-            }
-        except (ValueError, IndexError):
-            return None
-
-    def parse_gga(self, parts, date_str, hour, minute, second, millisecond, mac):
+            with open(checkpoint_path) as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return default
+        except ValueError as e:
+            raise CommandError(f'Invalid checkpoint {checkpoint_path}: {e}')
+        return {**default, **checkpoint}
+
+    def write_checkpoint(self, checkpoint_path, state, logfile, offset, current_mac):
+        """Atomically store finished files and the offset reached in logfile"""
+        state.update(logfile=logfile, offset=offset, mac=current_mac)
+        tmp_path = f'{checkpoint_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def parsed_chunks(self, path, match_date, start, options):
+        """Parse chunks in a process pool, yielding ChunkResults in file order"""
+        tz = timezone.get_default_timezone()
+        tasks = chunk_tasks(path, start, options['chunk_size'] * 1024 * 1024)
+        workers = max(1, options['workers'])
+
+        if workers == 1:
+            for func, args in tasks:
+                yield func(*args, match_date, tz)
+            return
+
+        # Keep a bounded number of chunks in flight to cap memory use
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for func, args in tasks:
+                pending.append(pool.submit(func, *args, match_date, tz))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    def load_batch(self, batch):
+        """COPY one batch, counting rows the database skipped as duplicates"""
+        inserted = copy_gps_rows(batch)
+        self.counts['imported'] += inserted
+        self.counts['duplicates'] += len(batch) - inserted
+
+    def process_logfile(self, path, match_date, start, current_mac, checkpoint_path, state, options):
         """
-        Parse GNGGA sentence format:
-        $GNGGA,162358.800,5016.598964,N,01903.764094,E,2,31,0.49,267.240,M,42.101,M,,*70
+        Import one log file.
+
+        Returns:
+            The last MAC announced in the file (carried into the next one)
         """
-        if len(parts) < 10:
-            return None
-        
-        try:
-            lat_str = parts[2]
-            lat_hem = parts[3]
-            lon_str = parts[4]
-            lon_hem = parts[5]
-            fix_quality = int(parts[6]) if parts[6] else 0
-            
-            if fix_quality == 0:
-                return None
-            
-            latitude = convert_to_decimal(lat_str, lat_hem)
-            longitude = convert_to_decimal(lon_str, lon_hem)
-            
-            if latitude is False or longitude is False:
-                return None
-            
-            return {
-                'mac': mac,
-                'date': date_str,
-                'hour': hour,
-                'minute': minute,
-                'second': second,
-                'millisecond': millisecond,
-                'latitude': latitude,
-                'longitude': longitude,
-                'speed_kmh': 0.0,  # GGA doesn't have speed
-                'quality': fix_quality
-            }
-        except (ValueError, IndexError):
-            return None
-
-    def save_gps_record(self, record, match_date_str):
-        """Save GPS record to database"""
-        try:
-            # Construct timestamp
-            timestamp = datetime(
-                year=int(match_date_str.split('-')[0]),
-                month=int(match_date_str.split('-')[1]),
-                day=int(match_date_str.split('-')[2]),
-                hour=record['hour'],
-                minute=record['minute'],
-                second=record['second'],
-                microsecond=record['millisecond'] * 1000
-            )
-            
-            # Make timezone-aware
-            timestamp = timezone.make_aware(timestamp)
-            
-            # Check if already exists
-            existing = GpsData.objects.filter(
-                mac=record['mac'],
-                timestamp=timestamp
-            ).exists()
-            
-            if not existing:
-                GpsData.objects.create(
-                    timestamp=timestamp,
-                    mac=record['mac'],
-                    latitude=record['latitude'],
-                    longitude=record['longitude'],
-                    speed_kmh=record['speed_kmh'],
-                    quality=record['quality']
-                )
-        except Exception as e:
-            raise Exception(f'Error saving record: {str(e)}')
+        counts = self.counts
+        batch = []
+        batch_size = options['batch_size']
+
+        for chunk in self.parsed_chunks(path, match_date, start, options):
+            for offset, message in chunk.errors:
+                self.stdout.write(self.style.WARNING(f'Byte {offset}: {message}'))
+            counts['errors'] += len(chunk.errors)
+            counts['skipped'] += chunk.skipped
+
+            for mac, timestamp, latitude, longitude, speed_kmh, quality in chunk.rows:
+                # Fixes before the chunk's first MAC line belong to the previous MAC
+                if mac is None:
+                    mac = current_mac
+                    if mac is None:
+                        counts['skipped'] += 1
+                        continue
+
+                batch.append((
+                    timestamp, mac, latitude, longitude, 0.0, 0, 0.0, quality, speed_kmh, 0.0
+                ))
+
+            if chunk.last_mac is not None:
+                current_mac = chunk.last_mac
+
+            if len(batch) >= batch_size:
+                self.load_batch(batch)
+                batch = []
+                self.write_checkpoint(checkpoint_path, state, path, chunk.end, current_mac)
+                self.stdout.write(f"{counts['imported']} imported (byte {chunk.end})")
+
+        if batch:
+            self.load_batch(batch)
+
+        return current_mac
@@ -0,0 +1,164 @@
+"""
+Management command to load test the GPS receiver endpoints over HTTP.
+Compares requests/sec of the sync view and the async view, either behind
+one server (--base-url with --paths) or across deployments (--url), e.g.
+the sync view under gunicorn core.wsgi against the async view under
+uvicorn core.asgi.
+
+Example (gunicorn on port 8001, uvicorn on port 8000):
+    python manage.py loadtest_receiver --concurrency 200 \
+        --url http://localhost:8001/gps/ --url http://localhost:8000/gps/async/
+
+Every request inserts real rows for synthetic devices whose MAC starts with
+--mac-prefix. After the run the rows of that prefix are deleted from the
+database configured for this command, which must be the one the tested
+servers write to; --keep-rows leaves them in place. Run it against a
+scratch database when the real one must not see synthetic writes at all.
+"""
+import statistics
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from django.core.management.base import BaseCommand, CommandError
+from apps.gps.models import GpsData
+from apps.gps.nmea import build_sentence
+
+
+def synthetic_payload(start, fixes, step=timedelta(milliseconds=100)):
+    """GGA + RMC pairs for consecutive 10 Hz fixes starting at start (UTC)"""
+    lines = []
+    for i in range(fixes):
+        ts = start + step * i
+        time_str = ts.strftime('%H%M%S.') + f'{ts.microsecond // 1000:03d}'
+        date_str = ts.strftime('%d%m%y')
+        lat = f'5015.{510000 + i:06d}'
+        lon = f'01857.{954000 + i:06d}'
+        lines.append(build_sentence(f'GNGGA,{time_str},{lat},N,{lon},E,1,12,0.9,245.4,M,42.1,M,,'))
+        lines.append(build_sentence(f'GNRMC,{time_str},A,{lat},N,{lon},E,2.44,163.88,{date_str},,,D,V'))
+    return '\n'.join(lines)
+
+
+class Command(BaseCommand):
+    help = 'Load test GPS receiver endpoints (sync vs async) over HTTP'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--base-url',
+            type=str,
+            default='http://localhost:8000',
+            help='Server base URL (default: http://localhost:8000)',
+        )
+        parser.add_argument(
+            '--paths',
+            nargs='+',
+            default=['/gps/', '/gps/async/'],
+            help='Receiver paths to compare (default: /gps/ /gps/async/)',
+        )
+        parser.add_argument(
+            '--url',
+            action='append',
+            dest='urls',
+            help='Full receiver URL to measure, repeatable; replaces --base-url/--paths '
+                 '(e.g. a gunicorn and a uvicorn deployment)',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=2000,
+            help='Requests per path (default: 2000)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=100,
+            help='Concurrent client connections (default: 100)',
+        )
+        parser.add_argument(
+            '--fixes',
+            type=int,
+            default=20,
+            help='Fixes per POST (default: 20)',
+        )
+        parser.add_argument(
+            '--mac-prefix',
+            type=str,
+            default='LOADTEST',
+            help='Prefix of the synthetic device MACs (default: LOADTEST)',
+        )
+        parser.add_argument(
+            '--keep-rows',
+            action='store_true',
+            help='Keep the synthetic rows instead of deleting them after the run',
+        )
+
+    def handle(self, *args, **options):
+        if not options['mac_prefix']:
+            raise CommandError('--mac-prefix must not be empty')
+
+        urls = options['urls'] or [
+            options['base_url'].rstrip('/') + path for path in options['paths']
+        ]
+        # Synthetic fixes are timestamped from the start of each path run on
+        run_started = datetime.now(timezone.utc).replace(microsecond=0)
+        try:
+            for url in urls:
+                self.run_path(url, options)
+        finally:
+            if not options['keep_rows']:
+                self.delete_rows(options['mac_prefix'], run_started)
+
+    def delete_rows(self, mac_prefix, since):
+        """Remove the synthetic fixes written by the run"""
+        # The time bound keeps the delete on today's partitions
+        deleted, _ = GpsData.objects.filter(
+            mac__startswith=mac_prefix, timestamp__gte=since
+        ).delete()
+        self.stdout.write(f'\nDeleted {deleted} synthetic rows (MAC prefix {mac_prefix})')
+
+    def post(self, url, mac, start, fixes):
+        """Send one device POST, return (status, latency seconds)"""
+        data = urllib.parse.urlencode({
+            'mac': mac,
+            'gps_raw': synthetic_payload(start, fixes),
+        }).encode()
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, data=data, timeout=30) as response:
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            status = 0
+        return status, time.perf_counter() - started
+
+    def run_path(self, url, options):
+        requests = options['requests']
+        fixes = options['fixes']
+        concurrency = options['concurrency']
+        base_start = datetime.now(timezone.utc).replace(microsecond=0)
+
+        def task(i):
+            # Each simulated device sends consecutive, non-overlapping batches
+            mac = f"{options['mac_prefix']}{i % concurrency:04d}"
+            start = base_start + timedelta(milliseconds=100) * fixes * (i // concurrency)
+            return self.post(url, mac, start, fixes)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(task, range(requests)))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(latency for _, latency in results)
+        ok = sum(1 for status, _ in results if 200 <= status < 300)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0
+
+        self.stdout.write(self.style.SUCCESS(f'\n=== {url} ==='))
+        self.stdout.write(f'Requests: {requests} ({ok} ok, {requests - ok} failed), concurrency {concurrency}')
+        self.stdout.write(f'Throughput: {requests / elapsed:.1f} req/s ({requests * fixes / elapsed:.0f} fixes/s)')
+        self.stdout.write(
+            f'Latency: p50 {statistics.median(latencies) * 1000:.1f} ms, '
+            f'p95 {p95 * 1000:.1f} ms, max {latencies[-1] * 1000:.1f} ms'
+        )
@@ -0,0 +1,36 @@
+"""
+Management command to rebuild stored base station corrections (BaseCorrection)
+and the corrected positions of the matches' fixes.
+Needed once for matches recorded before the table or the corrected columns
+existed; afterwards both are kept up to date by ingestion and Match saves
+(rebuilt in the background, rerun here if a process stopped mid-rebuild).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from apps.gps.correction_store import has_base_reference, rebuild_corrections
+from apps.gps.models import Match
+
+
+class Command(BaseCommand):
+    help = 'Rebuild stored base station corrections for matches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--match',
+            type=int,
+            help='Rebuild only this match ID (default: all matches with a base station)',
+        )
+
+    def handle(self, *args, **options):
+        if options['match']:
+            try:
+                matches = [Match.objects.get(id=options['match'])]
+            except Match.DoesNotExist:
+                raise CommandError(f"Match not found: {options['match']}")
+        else:
+            matches = [match for match in Match.objects.all() if has_base_reference(match)]
+
+        for match in matches:
+            ticks = rebuild_corrections(match)
+            self.stdout.write(f'{match}: {ticks} ticks')
+
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt corrections for {len(matches)} matches'))
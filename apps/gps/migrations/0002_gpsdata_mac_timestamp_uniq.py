@@ -0,0 +1,31 @@
+# Unique (mac, timestamp) for GpsData.
+# Existing duplicates (device POST retries, repeated log imports) are removed
+# first, keeping the oldest row of every group.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            sql='''
+                DELETE FROM gps_data newer
+                USING gps_data older
+                WHERE newer.mac = older.mac
+                  AND newer.timestamp = older.timestamp
+                  AND newer.id > older.id;
+            ''',
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='gpsdata',
+            constraint=models.UniqueConstraint(
+                fields=['mac', 'timestamp'], name='gps_data_mac_timestamp_uniq'
+            ),
+        ),
+    ]
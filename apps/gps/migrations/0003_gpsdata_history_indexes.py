@@ -0,0 +1,41 @@
+# Indexes for the history query shape (time range, optionally one MAC).
+# The single-column btrees on timestamp and mac are replaced by a BRIN index
+# on timestamp; (mac, timestamp) lookups use the unique index from 0002.
+
+import django.contrib.postgres.indexes
+from django.contrib.gis.db import models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0002_gpsdata_mac_timestamp_uniq'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gpsdata',
+            name='gps_data_timesta_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='gpsdata',
+            name='gps_data_mac_idx',
+        ),
+        migrations.AlterField(
+            model_name='gpsdata',
+            name='timestamp',
+            field=models.DateTimeField(),
+        ),
+        migrations.AlterField(
+            model_name='gpsdata',
+            name='mac',
+            field=models.CharField(help_text='Device MAC address', max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='gpsdata',
+            index=django.contrib.postgres.indexes.BrinIndex(
+                fields=['timestamp'], name='gps_data_timestamp_brin', pages_per_range=32
+            ),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Convert gps_data into a table partitioned by RANGE (timestamp), one
+# partition per match day plus the default partition for all other days
+# (see apps/gps/partitions.py).
+#
+# PostgreSQL requires the partition key in every unique constraint, so the
+# primary key becomes (id, timestamp); ids still come from one sequence.
+# The migration state keeps id as the primary key, as GpsData does: Django
+# 4.2 has no composite primary keys and only ever looks rows up by id. The
+# unused player_id column (and its index) from 0001 is not carried over and
+# is removed from the state as well.
+#
+# The existing rows are copied with a single INSERT ... SELECT inside the
+# migration transaction: stop the receivers for the duration (see README).
+# The partition SQL is inlined so later changes to partitions.py do not
+# change this migration.
+#
+# Not reversible: restore from a backup to go back to a plain table.
+
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+from django.conf import settings
+from django.db import migrations
+
+PREPARE_SQL = '''
+ALTER TABLE gps_data RENAME TO gps_data_unpartitioned;
+ALTER TABLE gps_data_unpartitioned RENAME CONSTRAINT gps_data_pkey TO gps_data_unpartitioned_pkey;
+ALTER TABLE gps_data_unpartitioned DROP CONSTRAINT gps_data_mac_timestamp_uniq;
+DROP INDEX IF EXISTS gps_data_timestamp_brin;
+DROP INDEX IF EXISTS gps_data_geom_id;
+DROP INDEX IF EXISTS gps_data_quality_idx;
+
+CREATE SEQUENCE gps_data_partitioned_id_seq AS integer;
+SELECT setval(
+    'gps_data_partitioned_id_seq',
+    COALESCE((SELECT max(id) FROM gps_data_unpartitioned), 0) + 1,
+    false
+);
+
+CREATE TABLE gps_data (
+    id integer NOT NULL DEFAULT nextval('gps_data_partitioned_id_seq'),
+    "timestamp" timestamp with time zone NOT NULL,
+    mac varchar(50) NOT NULL,
+    latitude double precision NOT NULL,
+    longitude double precision NOT NULL,
+    altitude double precision NOT NULL,
+    num_satellites integer NOT NULL,
+    hdop double precision NOT NULL,
+    quality integer NOT NULL,
+    speed_kmh double precision NOT NULL,
+    course double precision NOT NULL,
+    geom geometry(Point, 2180) NULL,
+    CONSTRAINT gps_data_pkey PRIMARY KEY (id, "timestamp"),
+    CONSTRAINT gps_data_mac_timestamp_uniq UNIQUE (mac, "timestamp")
+) PARTITION BY RANGE ("timestamp");
+
+ALTER SEQUENCE gps_data_partitioned_id_seq OWNED BY gps_data.id;
+
+CREATE TABLE gps_data_default PARTITION OF gps_data DEFAULT;
+
+CREATE INDEX gps_data_timestamp_brin ON gps_data USING brin ("timestamp") WITH (pages_per_range = 32);
+CREATE INDEX gps_data_geom_id ON gps_data USING gist (geom);
+CREATE INDEX gps_data_quality_idx ON gps_data (quality);
+'''
+
+COPY_SQL = '''
+INSERT INTO gps_data (
+    id, "timestamp", mac, latitude, longitude, altitude,
+    num_satellites, hdop, quality, speed_kmh, course, geom
+)
+SELECT
+    id, "timestamp", mac, latitude, longitude, altitude,
+    num_satellites, hdop, quality, speed_kmh, course, geom
+FROM gps_data_unpartitioned;
+
+DROP TABLE gps_data_unpartitioned;
+
+ANALYZE gps_data;
+'''
+
+
+def partition_sql(day):
+    """CREATE TABLE of the partition of one local day, bounded by local midnights"""
+    tz = ZoneInfo(settings.TIME_ZONE)
+    start = datetime.combine(day, time.min, tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+    return (
+        f"CREATE TABLE gps_data_p{day:%Y%m%d} PARTITION OF gps_data "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def create_match_partitions(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        # The match table is not part of the migration state (see 0001)
+        cursor.execute("SELECT to_regclass('match') IS NOT NULL")
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute('SELECT DISTINCT date FROM match ORDER BY date')
+        for (day,) in cursor.fetchall():
+            cursor.execute(partition_sql(day))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0003_gpsdata_history_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PREPARE_SQL),
+                migrations.RunPython(create_match_partitions),
+                migrations.RunSQL(COPY_SQL),
+            ],
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='gpsdata',
+                    name='gps_data_player_idx',
+                ),
+                migrations.RemoveField(
+                    model_name='gpsdata',
+                    name='player_id',
+                ),
+            ],
+        ),
+    ]
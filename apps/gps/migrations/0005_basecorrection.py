@@ -0,0 +1,72 @@
+# BaseCorrection: per-tick base station corrections of a match.
+#
+# Match is not part of the migration state of 0001 (the table comes from the
+# original PHP schema), so it is added to the state here and created only
+# where it does not exist yet.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+CREATE_MATCH_SQL = '''
+CREATE TABLE IF NOT EXISTS match (
+    id serial PRIMARY KEY,
+    date date NOT NULL,
+    description varchar(255) NULL,
+    base_mac varchar(50) NULL,
+    base_latitude double precision NULL,
+    base_longitude double precision NULL
+);
+CREATE INDEX IF NOT EXISTS match_date_idx ON match (date);
+CREATE INDEX IF NOT EXISTS match_base_mac_idx ON match (base_mac);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0004_gpsdata_partition_by_day'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(CREATE_MATCH_SQL, reverse_sql=migrations.RunSQL.noop),
+            ],
+            state_operations=[
+                migrations.CreateModel(
+                    name='Match',
+                    fields=[
+                        ('id', models.AutoField(primary_key=True, serialize=False)),
+                        ('date', models.DateField(db_index=True, help_text='Match date')),
+                        ('description', models.CharField(blank=True, max_length=255, null=True)),
+                        ('base_mac', models.CharField(blank=True, db_index=True, help_text='MAC address of stationary base station', max_length=50, null=True)),
+                        ('base_latitude', models.FloatField(blank=True, help_text='Latitude of base station', null=True)),
+                        ('base_longitude', models.FloatField(blank=True, help_text='Longitude of base station', null=True)),
+                    ],
+                    options={
+                        'db_table': 'match',
+                        'ordering': ['-date'],
+                    },
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BaseCorrection',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('tick', models.BigIntegerField(help_text='0.1 s ticks since the Unix epoch')),
+                ('dlat', models.FloatField(help_text='Reference minus measured base station latitude')),
+                ('dlon', models.FloatField(help_text='Reference minus measured base station longitude')),
+                ('samples', models.IntegerField(default=1, help_text='Base station fixes averaged in this tick')),
+                ('match', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='base_corrections', to='gps.match')),
+            ],
+            options={
+                'db_table': 'base_correction',
+                'ordering': ['match', 'tick'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='basecorrection',
+            constraint=models.UniqueConstraint(fields=['match', 'tick'], name='base_correction_match_tick_uniq'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Base station corrected position stored next to the raw coordinates.
+#
+# Nullable columns without a default are a catalog-only change, also on the
+# partitioned gps_data (the columns are added to every attached partition).
+# Existing rows stay NULL and are corrected at read time until
+# `manage.py rebuild_corrections` fills them in.
+#
+# Detached partitions (gps_partitions detach) need the same columns before
+# they can be attached again:
+#     ALTER TABLE gps_data_pYYYYMMDD ADD COLUMN corrected_latitude double precision,
+#         ADD COLUMN corrected_longitude double precision;
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gps', '0005_basecorrection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gpsdata',
+            name='corrected_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gpsdata',
+            name='corrected_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -3,7 +3,11 @@ GPS Data Models for Django
 Converted from PHP PostgreSQL/PostGIS schema
 """
 from django.contrib.gis.db import models
+from django.contrib.postgres.indexes import BrinIndex
 from django.utils import timezone
+from .assignments import resolve_assignment
+from .partitions import day_range
+from .projection import assign_geometries
 
 
 class Match(models.Model):
@@ -38,6 +42,16 @@ class Match(models.Model):
     def __str__(self):
         return f"Match {self.date}" + (f" (base: {self.base_mac})" if self.base_mac else "")
 
+    def time_range(self):
+        """
+        Half-open [start, end) datetime range of the match day in the local timezone.
+
+        Filter with timestamp__gte/timestamp__lt instead of timestamp__date:
+        the date lookup casts the column and cannot use the timestamp indexes.
+        The range equals the bounds of the match day's gps_data partition.
+        """
+        return day_range(self.date)
+
 
 class Player(models.Model):
     """
@@ -77,22 +91,56 @@ class MacAssignment(models.Model):
         return f"{self.mac} -> {self.player} @ {self.match}"
 
 
+class BaseCorrection(models.Model):
+    """
+    Base station correction of a match per 0.1 s tick
+    
+    Maintained incrementally as base station fixes arrive and rebuilt when the
+    match's base station reference changes (see correction_store.py).
+    Only ticks with a base station fix are stored; gaps are interpolated
+    when the table is loaded.
+    """
+    id = models.AutoField(primary_key=True)
+    match = models.ForeignKey(Match, on_delete=models.CASCADE, related_name='base_corrections')
+    tick = models.BigIntegerField(help_text="0.1 s ticks since the Unix epoch")
+    dlat = models.FloatField(help_text="Reference minus measured base station latitude")
+    dlon = models.FloatField(help_text="Reference minus measured base station longitude")
+    samples = models.IntegerField(default=1, help_text="Base station fixes averaged in this tick")
+    
+    class Meta:
+        db_table = 'base_correction'
+        ordering = ['match', 'tick']
+        constraints = [
+            models.UniqueConstraint(fields=['match', 'tick'], name='base_correction_match_tick_uniq'),
+        ]
+    
+    def __str__(self):
+        return f"Correction {self.match_id}@{self.tick} ({self.dlat:+.7f}, {self.dlon:+.7f})"
+
+
 class GpsData(models.Model):
     """
     GPS data model storing location and movement information
     Equivalent to gps_data table in PostgreSQL
     
     Player/Match relationship is determined via MacAssignment based on MAC + timestamp date
+    (resolved from a per-day cache, see assignments.py)
     """
     id = models.AutoField(primary_key=True)
-    timestamp = models.DateTimeField(db_index=True)
-    mac = models.CharField(max_length=50, db_index=True, help_text="Device MAC address")
+    # Indexed by gps_data_timestamp_brin and, with mac first, by gps_data_mac_timestamp_uniq
+    timestamp = models.DateTimeField()
+    mac = models.CharField(max_length=50, help_text="Device MAC address")
     
-    # GPS coordinates
+    # GPS coordinates (raw, as measured by the device)
     latitude = models.FloatField()
     longitude = models.FloatField()
     altitude = models.FloatField(default=0.0)
     
+    # Base station corrected position, written at ingest (see online_correction.py);
+    # NULL when no correction was available, history then corrects at read time
+    corrected_latitude = models.FloatField(null=True, blank=True)
+    corrected_longitude = models.FloatField(null=True, blank=True)
+    
     # GPS quality metrics
     num_satellites = models.IntegerField(default=0, help_text="Number of satellites")
     hdop = models.FloatField(default=0.0, help_text="Horizontal Dilution of Precision")
@@ -108,26 +156,35 @@ class GpsData(models.Model):
     class Meta:
         db_table = 'gps_data'
         ordering = ['-timestamp']
+        constraints = [
+            # One fix per device and instant; ingestion relies on it for ON CONFLICT DO NOTHING.
+            # Its btree also serves per-MAC history ranges.
+            models.UniqueConstraint(fields=['mac', 'timestamp'], name='gps_data_mac_timestamp_uniq'),
+        ]
+        indexes = [
+            # Rows arrive in time order, so a BRIN index answers match-day ranges
+            # at a fraction of the size and write cost of a btree
+            BrinIndex(fields=['timestamp'], name='gps_data_timestamp_brin', pages_per_range=32),
+        ]
     
     def __str__(self):
         return f"GPS {self.mac} @ {self.timestamp} ({self.latitude}, {self.longitude})"
     
+    @property
+    def assignment(self):
+        """MacAssignment-based (player, match) for MAC and local timestamp date (cached per day)"""
+        return resolve_assignment(self.mac, self.timestamp)
+    
     @property
     def player(self):
         """Get player from MacAssignment based on MAC and timestamp date"""
-        assignment = MacAssignment.objects.filter(
-            mac=self.mac,
-            match__date=self.timestamp.date()
-        ).first()
+        assignment = self.assignment
         return assignment.player if assignment else None
     
     @property
     def match(self):
         """Get match from MacAssignment based on MAC and timestamp date"""
-        assignment = MacAssignment.objects.filter(
-            mac=self.mac,
-            match__date=self.timestamp.date()
-        ).first()
+        assignment = self.assignment
         return assignment.match if assignment else None
     
     def save(self, *args, **kwargs):
@@ -135,14 +192,8 @@ class GpsData(models.Model):
         Override save to automatically create geometry point from lat/lon
         Transforms from WGS84 (EPSG:4326) to PUWG 1992 (EPSG:2180)
         """
-        from django.contrib.gis.geos import Point
-        
         # Create geometry point
         if self.latitude and self.longitude:
-            # Create point in WGS84 (4326)
-            point = Point(self.longitude, self.latitude, srid=4326)
-            # Transform to EPSG:2180
-            point.transform(2180)
-            self.geom = point
+            assign_geometries([self])
         
         super().save(*args, **kwargs)
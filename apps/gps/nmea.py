@@ -0,0 +1,280 @@
+"""
+NMEA 0183 Parser
+Bytes-level parsing of GGA, RMC, GSA, VTG and GST sentences
+
+Every sentence is checked against its '*hh' checksum before any field is
+converted, so corrupted lines are rejected instead of being stored.
+Numeric fields are converted straight from bytes (float()/int() accept
+bytes), and parsed sentences are compact __slots__ records.
+
+Example:
+    sentences, rejected = parse_payload(b'$GNGGA,...*70\\n$GNRMC,...*03')
+"""
+import numpy as np
+
+KNOTS_TO_KMH = 1.852
+
+
+class NmeaSentence:
+    """Base class for parsed sentences"""
+    __slots__ = ('talker',)
+    kind = ''
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}(talker={self.talker!r}, {fields})'
+
+
+class GGA(NmeaSentence):
+    """Fix data: position, fix quality, satellites, HDOP, altitude"""
+    __slots__ = ('time', 'latitude', 'longitude', 'quality', 'satellites', 'hdop', 'altitude')
+    kind = 'GGA'
+
+
+class RMC(NmeaSentence):
+    """Recommended minimum: position, speed, course and date"""
+    __slots__ = ('time', 'status', 'latitude', 'longitude', 'speed_knots', 'course', 'date')
+    kind = 'RMC'
+
+    @property
+    def speed_kmh(self):
+        return self.speed_knots * KNOTS_TO_KMH
+
+
+class GSA(NmeaSentence):
+    """DOP and active satellites"""
+    __slots__ = ('mode', 'fix_type', 'satellite_ids', 'pdop', 'hdop', 'vdop')
+    kind = 'GSA'
+
+
+class VTG(NmeaSentence):
+    """Course and speed over ground"""
+    __slots__ = ('course_true', 'course_magnetic', 'speed_knots', 'speed_kmh')
+    kind = 'VTG'
+
+
+class GST(NmeaSentence):
+    """Pseudorange error statistics (meters)"""
+    __slots__ = ('time', 'rms', 'semi_major', 'semi_minor', 'orientation',
+                 'lat_error', 'lon_error', 'alt_error')
+    kind = 'GST'
+
+
+def checksum(body):
+    """XOR checksum of the bytes between '$' and '*'"""
+    value = 0
+    for byte in body:
+        value ^= byte
+    return value
+
+
+def build_sentence(body):
+    """Wrap a sentence body (str) with '$' and its checksum"""
+    return f'${body}*{checksum(body.encode("ascii")):02X}'
+
+
+def _float(value, default=0.0):
+    return float(value) if value else default
+
+
+def _int(value, default=0):
+    return int(value) if value else default
+
+
+def _coordinate(value, hemisphere):
+    """
+    Convert NMEA (D)DDMM.MMMM + hemisphere to decimal degrees.
+
+    Returns:
+        Decimal degrees or None if empty/zero
+    """
+    if not value:
+        return None
+    raw = float(value)
+    if raw == 0:
+        return None
+    degrees = int(raw // 100)
+    decimal = degrees + (raw - degrees * 100) / 60
+    return -decimal if hemisphere in (b'S', b'W') else decimal
+
+
+def _parse_gga(fields):
+    if len(fields) < 10:
+        return None
+    sentence = GGA()
+    sentence.time = fields[1].decode('ascii')
+    sentence.latitude = _coordinate(fields[2], fields[3])
+    sentence.longitude = _coordinate(fields[4], fields[5])
+    sentence.quality = _int(fields[6])
+    sentence.satellites = _int(fields[7])
+    sentence.hdop = _float(fields[8])
+    sentence.altitude = _float(fields[9])
+    return sentence
+
+
+def _parse_rmc(fields):
+    if len(fields) < 10:
+        return None
+    sentence = RMC()
+    sentence.time = fields[1].decode('ascii')
+    sentence.status = fields[2].decode('ascii')
+    sentence.latitude = _coordinate(fields[3], fields[4])
+    sentence.longitude = _coordinate(fields[5], fields[6])
+    sentence.speed_knots = _float(fields[7])
+    sentence.course = _float(fields[8])
+    sentence.date = fields[9].decode('ascii')
+    return sentence
+
+
+def _parse_gsa(fields):
+    if len(fields) < 18:
+        return None
+    sentence = GSA()
+    sentence.mode = fields[1].decode('ascii')
+    sentence.fix_type = _int(fields[2])
+    sentence.satellite_ids = tuple(int(sat) for sat in fields[3:15] if sat)
+    sentence.pdop = _float(fields[15])
+    sentence.hdop = _float(fields[16])
+    sentence.vdop = _float(fields[17])
+    return sentence
+
+
+def _parse_vtg(fields):
+    if len(fields) < 9:
+        return None
+    sentence = VTG()
+    sentence.course_true = _float(fields[1])
+    sentence.course_magnetic = _float(fields[3])
+    sentence.speed_knots = _float(fields[5])
+    sentence.speed_kmh = _float(fields[7])
+    return sentence
+
+
+def _parse_gst(fields):
+    if len(fields) < 9:
+        return None
+    sentence = GST()
+    sentence.time = fields[1].decode('ascii')
+    sentence.rms = _float(fields[2])
+    sentence.semi_major = _float(fields[3])
+    sentence.semi_minor = _float(fields[4])
+    sentence.orientation = _float(fields[5])
+    sentence.lat_error = _float(fields[6])
+    sentence.lon_error = _float(fields[7])
+    sentence.alt_error = _float(fields[8])
+    return sentence
+
+
+_PARSERS = {
+    b'GGA': _parse_gga,
+    b'RMC': _parse_rmc,
+    b'GSA': _parse_gsa,
+    b'VTG': _parse_vtg,
+    b'GST': _parse_gst,
+}
+
+
+def _parse_body(body):
+    """Dispatch checksum-validated sentence body (without '$' and '*hh')"""
+    fields = body.split(b',')
+    parser = _PARSERS.get(fields[0][-3:])
+    if parser is None:
+        return None
+
+    try:
+        sentence = parser(fields)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if sentence is not None:
+        sentence.talker = fields[0][:-3].decode('ascii', 'replace')
+    return sentence
+
+
+def _expected_checksum(line, star):
+    """Checksum written after '*', or None if missing/invalid"""
+    try:
+        return int(line[star + 1:star + 3], 16)
+    except ValueError:
+        return None
+
+
+def parse_sentence(line, require_checksum=True):
+    """
+    Parse a single NMEA sentence.
+
+    Args:
+        line: Sentence as bytes (leading/trailing whitespace allowed)
+        require_checksum: Reject sentences without '*hh'
+
+    Returns:
+        Parsed sentence record, or None if the line is malformed, fails the
+        checksum or is of an unsupported type
+    """
+    line = line.strip()
+    if not line.startswith(b'$'):
+        return None
+
+    star = line.rfind(b'*')
+    if star == -1:
+        if require_checksum:
+            return None
+        return _parse_body(line[1:])
+
+    body = line[1:star]
+    if _expected_checksum(line, star) != checksum(body):
+        return None
+    return _parse_body(body)
+
+
+def parse_payload(data, require_checksum=True):
+    """
+    Parse a multi-line NMEA payload in one call.
+
+    Checksums of all lines are validated from one prefix-XOR pass over the
+    whole payload (NumPy), so no per-byte Python loop runs per sentence.
+
+    Args:
+        data: bytes (str is encoded as ASCII) with newline separated sentences
+        require_checksum: Reject sentences without '*hh'
+
+    Returns:
+        Tuple (sentences, rejected): parsed records in payload order and the
+        number of non-empty lines that were rejected (bad checksum,
+        malformed or unsupported sentence type)
+    """
+    if isinstance(data, str):
+        data = data.encode('ascii', 'replace')
+    if not data:
+        return [], 0
+
+    # prefix[i] = XOR of data[0..i]; XOR of data[a+1..b-1] = prefix[b-1] ^ prefix[a]
+    prefix = np.bitwise_xor.accumulate(np.frombuffer(data, dtype=np.uint8)).tobytes()
+
+    sentences = []
+    rejected = 0
+    offset = 0
+    for line in data.split(b'\n'):
+        start = offset
+        offset += len(line) + 1
+
+        dollar = line.find(b'$')
+        if dollar == -1 or line[:dollar].strip():
+            if line.strip():
+                rejected += 1
+            continue
+
+        star = line.rfind(b'*')
+        if star == -1:
+            sentence = None if require_checksum else _parse_body(line[dollar + 1:].rstrip())
+        elif star <= dollar + 1:
+            sentence = None
+        elif _expected_checksum(line, star) != prefix[start + star - 1] ^ prefix[start + dollar]:
+            sentence = None
+        else:
+            sentence = _parse_body(line[dollar + 1:star])
+
+        if sentence is None:
+            rejected += 1
+        else:
+            sentences.append(sentence)
+    return sentences, rejected
@@ -0,0 +1,251 @@
+"""
+GPS Online Correction
+Running base station corrections applied to fixes as they are ingested
+
+Corrections used to exist only at read time: every history request loaded
+the stored correction table of the match and corrected every row, and live
+consumers queried the stored ticks around each batch. Ingestion now keeps a
+running correction state per match, fed by the Match.base_mac stream, and
+writes corrected_latitude/corrected_longitude next to the raw coordinates:
+
+- the state holds the per-tick corrections of the last window ticks
+  (CORRECTION_WINDOW_TICKS, 60 s behind the newest base station tick)
+- a fix belongs to the match of its MAC on that day (match_macs(): the
+  assigned MACs plus the base station); other fixes stay NULL
+- base station fixes of a batch are merged into the state before the
+  batch is corrected, so fixes arriving together are corrected together
+- fixes are interpolated between known ticks, like CorrectionTable.apply;
+  fixes before the first or after the newest base station tick stay NULL
+  (devices upload independently, player fixes often arrive before the base
+  station's) and history corrects them at read time from the refreshed
+  stored corrections
+- after a restart, or for a batch outside the window (late or replayed
+  fixes), the state continues from the stored corrections around the batch
+
+The raw columns are never changed; rebuild_corrections rewrites the
+corrected positions when a base station reference changes. The state is
+per process; every process continues from the stored corrections.
+"""
+import threading
+import time
+from collections import defaultdict
+import numpy as np
+from django.utils import timezone
+from .assignments import match_macs
+from .correction import GpsColumns, tick_corrections
+from .correction_store import NEARBY_TICKS, has_base_reference, nearby_corrections
+from .models import Match
+
+# Ticks of base station corrections kept behind the newest one (60 s)
+CORRECTION_WINDOW_TICKS = NEARBY_TICKS
+
+# Seconds the base station matches of a day are cached per process
+MATCH_CACHE_TTL = 60
+
+
+class CorrectionState:
+    """
+    Per-tick corrections of the last window ticks of one match.
+
+    Attributes:
+        ticks: Sorted unique int64 ticks with base station fixes
+        dlat, dlon: Average correction per tick
+        samples: Base station fixes averaged per tick
+    """
+
+    def __init__(self, window=CORRECTION_WINDOW_TICKS):
+        self.window = window
+        self.ticks = np.empty(0, dtype=np.int64)
+        self.dlat = np.empty(0, dtype=np.float64)
+        self.dlon = np.empty(0, dtype=np.float64)
+        self.samples = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def merge(self, ticks, dlat, dlon, samples):
+        """Add per-tick corrections (ticks already known are averaged by samples)"""
+        if not len(ticks):
+            return
+        all_ticks = np.concatenate((self.ticks, ticks))
+        weights = np.concatenate((self.samples, samples)).astype(np.float64)
+        self.ticks, inverse = np.unique(all_ticks, return_inverse=True)
+        counts = np.bincount(inverse, weights=weights)
+        self.dlat = np.bincount(inverse, weights=np.concatenate((self.dlat, dlat)) * weights) / counts
+        self.dlon = np.bincount(inverse, weights=np.concatenate((self.dlon, dlon)) * weights) / counts
+        self.samples = counts.astype(np.int64)
+
+        keep = self.ticks >= self.ticks[-1] - self.window
+        self.ticks, self.dlat, self.dlon, self.samples = (
+            self.ticks[keep], self.dlat[keep], self.dlon[keep], self.samples[keep]
+        )
+
+    def covers(self, ticks):
+        """True if ticks lie within the window of the known ticks"""
+        return bool(len(self)) and (
+            ticks.min() >= self.ticks[0] - self.window
+            and ticks.max() <= self.ticks[-1] + self.window
+        )
+
+    def corrections(self, ticks):
+        """(dlat, dlon) arrays for ticks, interpolated between known ticks, NaN outside them"""
+        return (
+            np.interp(ticks, self.ticks, self.dlat, left=np.nan, right=np.nan),
+            np.interp(ticks, self.ticks, self.dlon, left=np.nan, right=np.nan),
+        )
+
+
+class OnlineCorrector:
+    """Correction states of all matches with a base station, safe to use from any thread"""
+
+    def __init__(self, window=CORRECTION_WINDOW_TICKS):
+        self.window = window
+        self._lock = threading.Lock()
+        self._states = {}
+        self._matches = {}
+
+    def reset(self):
+        """Drop all states and cached matches (base station references changed)"""
+        with self._lock:
+            self._states.clear()
+            self._matches.clear()
+
+    def matches_for_day(self, day):
+        """Matches with a base station reference on day, by id (cached)"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._matches.get(day)
+            if cached is not None and now - cached[0] <= MATCH_CACHE_TTL:
+                return cached[1]
+
+        matches = [
+            match for match in Match.objects.filter(date=day).order_by('id')
+            if has_base_reference(match)
+        ]
+        with self._lock:
+            self._matches[day] = (now, matches)
+        return matches
+
+    def _needs_stored(self, state, ticks):
+        return state is None or not state.covers(ticks)
+
+    def correct(self, match, columns, base):
+        """
+        Corrections for a batch of one match day.
+
+        Args:
+            columns: GpsColumns of the batch (any order), base station fixes included
+            base: Boolean mask of the valid base station fixes in columns
+
+        Returns:
+            (dlat, dlon) arrays for the rows of columns, NaN for rows outside
+            the known base station ticks, or None if none are known
+        """
+        ticks = columns.ticks
+        base_ticks = tick_corrections(
+            ticks[base], columns.latitudes[base], columns.longitudes[base],
+            float(match.base_latitude), float(match.base_longitude),
+        )
+
+        with self._lock:
+            needs_stored = self._needs_stored(self._states.get(match.id), ticks)
+        # Query outside the lock; other matches keep correcting meanwhile
+        stored = nearby_corrections(match, ticks, self.window) if needs_stored else None
+
+        with self._lock:
+            state = self._states.get(match.id)
+            if stored is not None and self._needs_stored(state, ticks):
+                fresh = CorrectionState(self.window)
+                fresh.merge(*stored)
+                if state is None or not len(state) or ticks.max() > state.ticks[-1]:
+                    # Restart or a gap in the base station stream: continue from here
+                    self._states[match.id] = state = fresh
+                else:
+                    # Late batch: corrected from its own neighbourhood, the state stays
+                    state = fresh
+            elif state is None:
+                self._states[match.id] = state = CorrectionState(self.window)
+            state.merge(*base_ticks)
+            if not len(state):
+                return None
+            return state.corrections(columns.ticks)
+
+
+_corrector = None
+_corrector_lock = threading.Lock()
+
+
+def get_online_corrector():
+    """Process-wide corrector, created on first use"""
+    global _corrector
+    with _corrector_lock:
+        if _corrector is None:
+            _corrector = OnlineCorrector()
+        return _corrector
+
+
+def reset_online_corrections():
+    """Called when a Match is saved or deleted"""
+    get_online_corrector().reset()
+
+
+def correct_records(records):
+    """
+    Set corrected_latitude/corrected_longitude of unsaved GpsData records.
+
+    Records are grouped by local day and by the match their MAC belongs to
+    (match_macs()); fixes of MACs without a match with a base station
+    reference, and fixes outside its known base station ticks, keep NULL.
+
+    Returns:
+        Number of corrected records
+    """
+    corrector = get_online_corrector()
+    tz = timezone.get_default_timezone()
+    by_day = defaultdict(list)
+    for record in records:
+        by_day[record.timestamp.astimezone(tz).date()].append(record)
+
+    corrected = 0
+    for day, day_records in by_day.items():
+        matches_by_mac = {}
+        for match in corrector.matches_for_day(day):
+            for mac in match_macs(match):
+                matches_by_mac.setdefault(mac, match)
+
+        by_match = defaultdict(list)
+        for record in day_records:
+            match = matches_by_mac.get(record.mac)
+            if match is not None:
+                by_match[match].append(record)
+
+        for match, match_records in by_match.items():
+            corrected += _correct_match_records(corrector, match, match_records)
+    return corrected
+
+
+def _correct_match_records(corrector, match, records):
+    """Correct the records of one match day, returns the number corrected"""
+    columns = GpsColumns(
+        [record.timestamp for record in records],
+        [record.mac for record in records],
+        [record.latitude for record in records],
+        [record.longitude for record in records],
+        [0.0] * len(records),
+    )
+    base = np.fromiter(
+        (record.mac == match.base_mac and record.quality > 0 for record in records),
+        dtype=bool, count=len(records),
+    )
+    corrections = corrector.correct(match, columns, base)
+    if corrections is None:
+        return 0
+
+    covered = ~np.isnan(corrections[0])
+    latitudes = (columns.latitudes + corrections[0]).tolist()
+    longitudes = (columns.longitudes + corrections[1]).tolist()
+    for record, is_covered, latitude, longitude in zip(records, covered.tolist(), latitudes, longitudes):
+        if is_covered:
+            record.corrected_latitude = latitude
+            record.corrected_longitude = longitude
+    return int(covered.sum())
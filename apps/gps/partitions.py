@@ -0,0 +1,256 @@
+"""
+GPS Data Partitions
+Daily range partitions of the gps_data table (PostgreSQL)
+
+gps_data is partitioned by RANGE (timestamp) with one partition per match
+day, bounded by local midnights (TIME_ZONE), plus a default partition for
+fixes recorded on days without a match. Queries filtered with
+Match.time_range() are pruned to a single partition, and a finished season
+is removed by detaching/archiving its partitions instead of a huge DELETE.
+
+Partitions are named gps_data_pYYYYMMDD. A partition for a match day is
+created automatically when the Match is saved (see signals.py); fixes that
+already landed in the default partition for that day are moved into it.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from .history_cache import invalidate_day
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'gps_data'
+DEFAULT_PARTITION = f'{TABLE}_default'
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{8}})$')
+
+DATA_DAYS_CACHE_KEY = 'gps:partitions:data_days'
+# Seconds the day list is cached; new days also clear it (create/attach/detach)
+DATA_DAYS_CACHE_TTL = 600
+
+
+def day_range(day):
+    """Half-open [start, end) aware datetimes of a local calendar day"""
+    tz = timezone.get_default_timezone()
+    start = datetime.combine(day, time.min, tzinfo=tz)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=tz)
+    return start, end
+
+
+def partition_name(day):
+    return f'{TABLE}_p{day:%Y%m%d}'
+
+
+def partition_day(name):
+    """Day of a partition name, or None for other tables"""
+    match = PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), '%Y%m%d').date()
+
+
+def is_partitioned():
+    """True if gps_data is a partitioned table (PostgreSQL, migration 0004 applied)"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [TABLE])
+        row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def _table_exists(cursor, name):
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [name])
+    return cursor.fetchone()[0]
+
+
+def _bounds_sql(day):
+    start, end = day_range(day)
+    return f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def list_partitions():
+    """
+    Attached partitions of gps_data.
+
+    Returns:
+        List of dicts: name, day (None for the default partition), bounds,
+        estimated rows and total size in bytes, ordered by name
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname,
+                   pg_get_expr(child.relpartbound, child.oid),
+                   child.reltuples::bigint,
+                   pg_total_relation_size(child.oid)
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = to_regclass(%s)
+            ORDER BY child.relname
+            """,
+            [TABLE],
+        )
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'name': name,
+            'day': partition_day(name),
+            'bounds': bounds,
+            'rows': max(rows_estimate, 0),
+            'size': size,
+        }
+        for name, bounds, rows_estimate, size in rows
+    ]
+
+
+def _distinct_days(cursor, table):
+    """Local days of the fixes in a single table (sequential scan of that table)"""
+    cursor.execute(
+        f"SELECT DISTINCT (timestamp AT TIME ZONE %s)::date FROM {table}",
+        [settings.TIME_ZONE],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def data_days():
+    """
+    Local days with stored fixes, newest first (cached).
+
+    A partitioned table answers from the catalog (one partition per match
+    day) plus a DISTINCT over the default partition only, instead of a
+    DISTINCT date_trunc over all of gps_data. An unpartitioned table falls
+    back to that full scan, once per DATA_DAYS_CACHE_TTL.
+    """
+    days = cache.get(DATA_DAYS_CACHE_KEY)
+    if days is not None:
+        return days
+
+    if is_partitioned():
+        found = {partition['day'] for partition in list_partitions() if partition['day']}
+        with connection.cursor() as cursor:
+            found |= _distinct_days(cursor, DEFAULT_PARTITION)
+    else:
+        # models.py imports this module (through assignments.py)
+        from .models import GpsData
+        found = set(GpsData.objects.dates('timestamp', 'day'))
+
+    days = sorted(found, reverse=True)
+    cache.set(DATA_DAYS_CACHE_KEY, days, DATA_DAYS_CACHE_TTL)
+    return days
+
+
+def invalidate_data_days():
+    cache.delete(DATA_DAYS_CACHE_KEY)
+
+
+def create_partition(day):
+    """
+    Create and attach the partition for a day.
+
+    Rows of that day already stored in the default partition are moved
+    into the new partition in the same transaction.
+
+    Returns:
+        True if the partition was created, False if it already existed
+    """
+    name = partition_name(day)
+    start, end = day_range(day)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Serialize concurrent creators (e.g. two workers saving matches)
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [name])
+        if _table_exists(cursor, name):
+            return False
+
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} "
+            f"WHERE timestamp >= %s AND timestamp < %s)",
+            [start, end],
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute(f"CREATE TABLE {name} PARTITION OF {TABLE} FOR VALUES {_bounds_sql(day)}")
+        else:
+            cursor.execute(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+            cursor.execute(
+                f"WITH moved AS ("
+                f"DELETE FROM {DEFAULT_PARTITION} WHERE timestamp >= %s AND timestamp < %s "
+                f"RETURNING *) INSERT INTO {name} SELECT * FROM moved",
+                [start, end],
+            )
+            logger.info(f"[PARTITION] Moved {cursor.rowcount} rows from {DEFAULT_PARTITION} to {name}")
+            cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds_sql(day)}")
+
+    invalidate_data_days()
+    logger.info(f"[PARTITION] Created {name}")
+    return True
+
+
+def ensure_partition(day):
+    """Create the partition for a day if gps_data is partitioned and it is missing"""
+    if not is_partitioned():
+        return False
+    return create_partition(day)
+
+
+def attach_partition(day):
+    """Attach a detached (or restored) standalone table gps_data_pYYYYMMDD"""
+    name = partition_name(day)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES {_bounds_sql(day)}")
+    invalidate_day(day)
+    invalidate_data_days()
+    logger.info(f"[PARTITION] Attached {name}")
+
+
+def detach_partition(day):
+    """Detach a day partition; the table and its rows are kept as a standalone table"""
+    name = partition_name(day)
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE} DETACH PARTITION {name}")
+    invalidate_day(day)
+    invalidate_data_days()
+    logger.info(f"[PARTITION] Detached {name}")
+
+
+def archive_partition(day, directory):
+    """
+    Dump a day partition to <directory>/gps_data_pYYYYMMDD.csv.gz and drop it.
+
+    The partition is detached first if it is still attached. The dump is
+    written with COPY ... TO STDOUT (CSV with header) and can be restored
+    by loading it into a new table and attaching it.
+
+    Returns:
+        Path of the archive file
+    """
+    name = partition_name(day)
+    path = os.path.join(directory, f'{name}.csv.gz')
+
+    with connection.cursor() as cursor:
+        if not _table_exists(cursor, name):
+            raise ValueError(f'Partition {name} does not exist')
+        if any(partition['name'] == name for partition in list_partitions()):
+            detach_partition(day)
+
+        os.makedirs(directory, exist_ok=True)
+        with gzip.open(path, 'wt', newline='') as f:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+        cursor.execute(f"DROP TABLE {name}")
+
+    logger.info(f"[PARTITION] Archived {name} to {path}")
+    return path
+
+
+def partitions_before(day):
+    """Days of attached partitions older than day"""
+    return [
+        partition['day'] for partition in list_partitions()
+        if partition['day'] is not None and partition['day'] < day
+    ]
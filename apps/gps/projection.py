@@ -0,0 +1,148 @@
+"""
+GPS Projection Engine
+Vectorized WGS84 (EPSG:4326) -> PUWG 1992 (EPSG:2180) conversion
+
+PUWG 1992 is a Transverse Mercator projection on the GRS80 ellipsoid
+(central meridian 19°E, scale 0.9993, false easting 500 000 m,
+false northing -5 300 000 m). ETRS89 and WGS84 are treated as identical,
+same as the EPSG:2180 definition shipped with PROJ.
+
+Coordinates are projected with the Krüger n-series (4th order), which is
+accurate to well below a millimetre inside Poland, for whole NumPy arrays
+at once instead of one GDAL call per point.
+"""
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+# GRS80 ellipsoid
+GRS80_A = 6378137.0
+GRS80_F = 1 / 298.257222101
+
+# PUWG 1992 projection parameters
+PUWG92_LON0 = 19.0
+PUWG92_K0 = 0.9993
+PUWG92_FALSE_EASTING = 500000.0
+PUWG92_FALSE_NORTHING = -5300000.0
+
+TransverseMercator = namedtuple(
+    'TransverseMercator',
+    ['lon0', 'k0_a', 'false_easting', 'false_northing', 'e_term', 'alpha']
+)
+
+
+@lru_cache(maxsize=None)
+def _transverse_mercator(a=GRS80_A, f=GRS80_F, lon0=PUWG92_LON0, k0=PUWG92_K0,
+                         false_easting=PUWG92_FALSE_EASTING,
+                         false_northing=PUWG92_FALSE_NORTHING):
+    """Precompute series coefficients for a Transverse Mercator projection"""
+    n = f / (2 - f)
+    n2, n3, n4 = n ** 2, n ** 3, n ** 4
+
+    # Rectifying radius
+    big_a = a / (1 + n) * (1 + n2 / 4 + n4 / 64)
+
+    alpha = np.array([
+        n / 2 - 2 * n2 / 3 + 5 * n3 / 16 + 41 * n4 / 180,
+        13 * n2 / 48 - 3 * n3 / 5 + 557 * n4 / 1440,
+        61 * n3 / 240 - 103 * n4 / 140,
+        49561 * n4 / 161280,
+    ])
+
+    return TransverseMercator(
+        lon0=np.radians(lon0),
+        k0_a=k0 * big_a,
+        false_easting=false_easting,
+        false_northing=false_northing,
+        e_term=2 * np.sqrt(n) / (1 + n),
+        alpha=alpha,
+    )
+
+
+def wgs84_to_puwg92(latitudes, longitudes):
+    """
+    Project WGS84 coordinates to PUWG 1992 (EPSG:2180).
+
+    Args:
+        latitudes: Latitudes in decimal degrees (scalar or array-like)
+        longitudes: Longitudes in decimal degrees (scalar or array-like)
+
+    Returns:
+        Tuple (x, y) of float64 arrays: easting and northing in metres
+    """
+    tm = _transverse_mercator()
+
+    phi = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lam = np.radians(np.asarray(longitudes, dtype=np.float64)) - tm.lon0
+
+    sin_phi = np.sin(phi)
+    t = np.sinh(np.arctanh(sin_phi) - tm.e_term * np.arctanh(tm.e_term * sin_phi))
+    xi = np.arctan2(t, np.cos(lam))
+    eta = np.arctanh(np.sin(lam) / np.sqrt(1 + t * t))
+
+    x = eta.copy()
+    y = xi.copy()
+    for j, alpha_j in enumerate(tm.alpha, start=1):
+        x += alpha_j * np.cos(2 * j * xi) * np.sinh(2 * j * eta)
+        y += alpha_j * np.sin(2 * j * xi) * np.cosh(2 * j * eta)
+
+    x = tm.false_easting + tm.k0_a * x
+    y = tm.false_northing + tm.k0_a * y
+    return x, y
+
+
+def puwg92_points(latitudes, longitudes):
+    """
+    Build EPSG:2180 GEOS points for arrays of WGS84 coordinates.
+
+    Returns:
+        List of Point objects (None where latitude or longitude is missing/zero)
+    """
+    from django.contrib.gis.geos import Point
+
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    valid = (lat != 0) & (lon != 0) & np.isfinite(lat) & np.isfinite(lon)
+
+    x, y = wgs84_to_puwg92(lat, lon)
+    return [
+        Point(float(px), float(py), srid=2180) if ok else None
+        for px, py, ok in zip(x, y, valid)
+    ]
+
+
+def assign_geometries(records):
+    """
+    Fill geom for a batch of GpsData instances in one vectorized pass.
+
+    Records without usable coordinates keep their current geom.
+    """
+    if not records:
+        return
+
+    points = puwg92_points(
+        [record.latitude or 0.0 for record in records],
+        [record.longitude or 0.0 for record in records],
+    )
+    for record, point in zip(records, points):
+        if point is not None:
+            record.geom = point
+
+
+def puwg92_ewkt(latitudes, longitudes):
+    """
+    EPSG:2180 points as EWKT strings, for text loaders such as COPY.
+
+    Returns:
+        List of 'SRID=2180;POINT(x y)' strings (None where latitude or
+        longitude is missing/zero)
+    """
+    lat = np.asarray(latitudes, dtype=np.float64)
+    lon = np.asarray(longitudes, dtype=np.float64)
+    valid = (lat != 0) & (lon != 0) & np.isfinite(lat) & np.isfinite(lon)
+
+    x, y = wgs84_to_puwg92(lat, lon)
+    return [
+        f'SRID=2180;POINT({px!r} {py!r})' if ok else None
+        for px, py, ok in zip(x.tolist(), y.tolist(), valid.tolist())
+    ]
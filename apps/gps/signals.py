@@ -0,0 +1,84 @@
+"""
+GPS Signal Handlers
+Keeps database-side structures and caches in step with saved matches
+and MAC assignments
+"""
+import logging
+from django.db import DatabaseError
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from .assignments import invalidate_assignments
+from .correction_store import invalidate_base_macs, schedule_rebuild
+from .history_cache import invalidate_day
+from .models import MacAssignment, Match, Player
+from .online_correction import reset_online_corrections
+from .partitions import ensure_partition
+
+logger = logging.getLogger(__name__)
+
+
+def _base_reference(match):
+    return (match.date, match.base_mac, match.base_latitude, match.base_longitude)
+
+
+@receiver(post_init, sender=Match)
+def remember_base_reference(sender, instance, **kwargs):
+    """Keep the loaded base station reference to detect changes on save"""
+    instance._loaded_base_reference = _base_reference(instance)
+
+
+@receiver(post_save, sender=Match)
+def create_match_partition(sender, instance, **kwargs):
+    """Create the gps_data partition for the match day"""
+    try:
+        ensure_partition(instance.date)
+    except DatabaseError as e:
+        # Fixes still land in the default partition; gps_partitions create can retry
+        logger.error(f"[ERROR] Could not create gps_data partition for {instance.date}: {e}")
+
+
+@receiver(post_save, sender=Match)
+def rebuild_match_corrections(sender, instance, created, **kwargs):
+    """
+    Invalidate caches and schedule a background rebuild of the stored
+    corrections when the base station reference changed.
+    """
+    invalidate_base_macs()
+
+    reference = _base_reference(instance)
+    if created or reference != instance._loaded_base_reference:
+        invalidate_day(instance.date)
+        schedule_rebuild(instance)
+    instance._loaded_base_reference = reference
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def clear_assignments(sender, instance, **kwargs):
+    """Cached assignments hold Match instances"""
+    invalidate_assignments()
+
+
+@receiver(post_save, sender=Match)
+@receiver(post_delete, sender=Match)
+def reset_match_corrections(sender, instance, **kwargs):
+    """Online correction states hold the base station reference of the match"""
+    reset_online_corrections()
+
+
+@receiver(post_save, sender=MacAssignment)
+@receiver(post_delete, sender=MacAssignment)
+def mac_assignment_changed(sender, instance, **kwargs):
+    """Clear cached assignments and the cached history with player names of the day"""
+    invalidate_assignments()
+    invalidate_day(instance.match.date)
+
+
+@receiver(post_save, sender=Player)
+def player_changed(sender, instance, created, **kwargs):
+    """Clear cached assignments; cached history of the player's match days carries the old name"""
+    invalidate_assignments()
+    if created:
+        return
+    for day in Match.objects.filter(mac_assignments__player=instance).values_list('date', flat=True).distinct():
+        invalidate_day(day)
@@ -0,0 +1,241 @@
+"""
+GPS Trajectory Simplification
+Per-MAC downsampling of history tracks for the map
+
+A 10 Hz match with 22 players is over a million points, far more than
+Leaflet can draw. History requests can ask for a reduced track:
+
+- tolerance: Ramer-Douglas-Peucker per MAC in projected PUWG 1992
+  (EPSG:2180) metres; points closer than tolerance to the simplified line
+  are dropped, corners and turns are kept
+- resolution: time-bucket decimation, the first fix per MAC and bucket of
+  resolution seconds
+- bbox: viewport filter on the corrected coordinates
+
+Simplification runs on the whole track, so the viewport filter does not
+change the shape of what is left. step_dist of a kept point is the path
+length since the previous kept point of the same MAC, so summing step_dist
+still gives the full distance covered.
+"""
+from collections import namedtuple
+import numpy as np
+from .functions import factorize
+from .projection import wgs84_to_puwg92
+
+# Ticks (0.1 s) per second
+TICKS_PER_SECOND = 10
+
+
+def rdp_keep(x, y, tolerance):
+    """
+    Ramer-Douglas-Peucker on one polyline of projected coordinates.
+
+    Iterative (no recursion limit on long tracks); distances of each span
+    to its chord segment are computed in one vectorized call.
+
+    Returns:
+        Boolean mask of kept points (first and last are always kept)
+    """
+    n = len(x)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, n - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        px = x[start + 1:end] - x[start]
+        py = y[start + 1:end] - y[start]
+        dx = x[end] - x[start]
+        dy = y[end] - y[start]
+        length2 = dx * dx + dy * dy
+        if length2 > 0:
+            # Distance to the segment (not the infinite line): tracks loop back
+            t = np.clip((px * dx + py * dy) / length2, 0.0, 1.0)
+            distances = np.hypot(px - t * dx, py - t * dy)
+        else:
+            distances = np.hypot(px, py)
+
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+    return keep
+
+
+def _groups(codes):
+    """Stable order by MAC code and the [start, end) bounds of each MAC in it"""
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(codes)]))
+    return order, starts, ends
+
+
+def rdp_mask(codes, latitudes, longitudes, tolerance):
+    """Per-MAC Ramer-Douglas-Peucker in EPSG:2180 metres, as a mask in input order"""
+    keep = np.zeros(len(codes), dtype=bool)
+    if len(codes) == 0:
+        return keep
+
+    x, y = wgs84_to_puwg92(latitudes, longitudes)
+    order, starts, ends = _groups(codes)
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        index = order[start:end]
+        keep[index] = rdp_keep(x[index], y[index], tolerance)
+    return keep
+
+
+def bucket_mask(codes, ticks, resolution):
+    """First fix per MAC in every bucket of resolution seconds, as a mask in input order"""
+    keep = np.zeros(len(codes), dtype=bool)
+    if len(codes) == 0:
+        return keep
+
+    bucket_ticks = max(1, int(round(resolution * TICKS_PER_SECOND)))
+    buckets = np.asarray(ticks, dtype=np.int64) // bucket_ticks
+    order, _, _ = _groups(codes)
+    sorted_codes = codes[order]
+    sorted_buckets = buckets[order]
+
+    first = np.ones(len(order), dtype=bool)
+    first[1:] = (sorted_codes[1:] != sorted_codes[:-1]) | (sorted_buckets[1:] != sorted_buckets[:-1])
+    keep[order] = first
+    return keep
+
+
+def merged_step_distances(codes, step_dist, keep):
+    """
+    Path length since the previous kept point of the same MAC.
+
+    Args:
+        codes: MAC codes (factorize) in timestamp order
+        step_dist: Distances from the previous point of the same MAC
+        keep: Boolean mask of kept points
+
+    Returns:
+        float64 array of the kept points, in input order
+    """
+    if not keep.any():
+        return np.zeros(0, dtype=np.float64)
+
+    order, starts, ends = _groups(codes)
+    cumulative = np.cumsum(np.asarray(step_dist, dtype=np.float64)[order])
+    group_start = np.repeat(starts, ends - starts)
+
+    kept = np.flatnonzero(keep[order])
+    kept_cumulative = cumulative[kept]
+    # Previous kept point of the same MAC, or the path start of the MAC
+    previous = cumulative[group_start[kept]]
+    same_mac = np.zeros(len(kept), dtype=bool)
+    same_mac[1:] = group_start[kept][1:] == group_start[kept][:-1]
+    previous[same_mac] = kept_cumulative[:-1][same_mac[1:]]
+
+    merged = np.empty(len(codes), dtype=np.float64)
+    merged[order[kept]] = kept_cumulative - previous
+    return merged[keep]
+
+
+class Simplification(namedtuple('Simplification', ['tolerance', 'resolution', 'bbox'])):
+    """
+    Simplification requested by ?tolerance=, ?resolution= and ?bbox=.
+
+    Attributes:
+        tolerance: RDP tolerance in metres, or None
+        resolution: Bucket length in seconds, or None
+        bbox: (min_lon, min_lat, max_lon, max_lat), or None
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_params(cls, params):
+        """
+        Parse request parameters.
+
+        bbox uses the order of Leaflet's LatLngBounds.toBBoxString():
+        west,south,east,north.
+
+        Returns:
+            Simplification, or None if no parameter is given
+
+        Raises:
+            ValueError: Invalid parameter
+        """
+        tolerance = resolution = bbox = None
+
+        if params.get('tolerance'):
+            tolerance = float(params['tolerance'])
+            if not tolerance > 0:
+                raise ValueError('tolerance must be a positive number of metres')
+
+        if params.get('resolution'):
+            resolution = float(params['resolution'])
+            if not resolution > 0:
+                raise ValueError('resolution must be a positive number of seconds')
+
+        if params.get('bbox'):
+            bbox = tuple(float(value) for value in params['bbox'].split(','))
+            if len(bbox) != 4 or not (bbox[0] < bbox[2] and bbox[1] < bbox[3]):
+                raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+
+        if tolerance is None and resolution is None and bbox is None:
+            return None
+        return cls(tolerance, resolution, bbox)
+
+    def cache_variant(self, variant):
+        """History cache variant for these parameters; viewports are not cached"""
+        if self.bbox is not None:
+            return None
+        return f'{variant}:t{self.tolerance or 0:g}:r{self.resolution or 0:g}'
+
+    def mask(self, codes, columns):
+        """Boolean mask of the points of columns to keep"""
+        keep = np.ones(len(columns), dtype=bool)
+        if self.resolution is not None:
+            keep &= bucket_mask(codes, columns.ticks, self.resolution)
+        if self.tolerance is not None:
+            if self.resolution is not None:
+                # RDP on the decimated track
+                reduced = np.zeros(len(columns), dtype=bool)
+                index = np.flatnonzero(keep)
+                reduced[index] = rdp_mask(
+                    codes[index], columns.latitudes[index], columns.longitudes[index],
+                    self.tolerance,
+                )
+                keep = reduced
+            else:
+                keep &= rdp_mask(codes, columns.latitudes, columns.longitudes, self.tolerance)
+        if self.bbox is not None:
+            min_lon, min_lat, max_lon, max_lat = self.bbox
+            keep &= (
+                (columns.longitudes >= min_lon) & (columns.longitudes <= max_lon)
+                & (columns.latitudes >= min_lat) & (columns.latitudes <= max_lat)
+            )
+        return keep
+
+
+def simplify(columns, step_dist, simplification, always_keep=None):
+    """
+    Apply a Simplification to history columns.
+
+    Args:
+        columns: Corrected GpsColumns in timestamp order
+        step_dist: step_distances() of the full columns
+        always_keep: Optional boolean mask of rows kept regardless (carried
+            rows of cursor pages)
+
+    Returns:
+        Tuple (selected GpsColumns, merged step_dist array)
+    """
+    codes = factorize(columns.macs)
+    keep = simplification.mask(codes, columns)
+    if always_keep is not None:
+        keep |= always_keep
+    return columns.select(keep), merged_step_distances(codes, step_dist, keep)
@@ -0,0 +1,69 @@
+"""
+GPS Stability Engine
+Per-MAC position stability statistics computed in a single query
+
+Rows are streamed once, ordered by MAC, through a server-side cursor.
+For every MAC the centroid and the deviation statistics of all points
+from that centroid are computed with NumPy.
+"""
+from itertools import groupby
+from operator import itemgetter
+import numpy as np
+from .functions import haversine_distances
+
+# Rows fetched per round-trip from the server-side cursor
+STABILITY_CHUNK_SIZE = 10000
+
+
+def mac_stability(latitudes, longitudes):
+    """
+    Stability statistics for the points of one device.
+
+    Returns:
+        Dict with points, avg_lat/avg_lon (centroid) and mean, sample
+        standard deviation, min and max distance from the centroid in meters
+    """
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+
+    avg_lat = float(latitudes.mean())
+    avg_lon = float(longitudes.mean())
+    distances = haversine_distances(avg_lat, avg_lon, latitudes, longitudes)
+
+    return {
+        'points': len(distances),
+        'avg_distance_m': float(distances.mean()),
+        'std_dev_m': float(distances.std(ddof=1)) if len(distances) > 1 else 0.0,
+        'max_distance_m': float(distances.max()),
+        'min_distance_m': float(distances.min()),
+        'avg_lat': avg_lat,
+        'avg_lon': avg_lon,
+    }
+
+
+def analyze_stability(queryset, min_points=2):
+    """
+    Compute stability statistics for every MAC in a GpsData queryset.
+
+    Args:
+        queryset: GpsData queryset (already filtered)
+        min_points: MACs with fewer points are left out
+
+    Returns:
+        List of dicts (mac + mac_stability() fields) sorted by average
+        distance from the centroid, most stable first
+    """
+    rows = queryset.order_by('mac').values_list(
+        'mac', 'latitude', 'longitude'
+    ).iterator(chunk_size=STABILITY_CHUNK_SIZE)
+
+    results = []
+    for mac, mac_rows in groupby(rows, key=itemgetter(0)):
+        _, latitudes, longitudes = zip(*mac_rows)
+        if len(latitudes) < min_points:
+            continue
+        results.append({'mac': mac, **mac_stability(latitudes, longitudes)})
+
+    # Sort by average distance (lowest = most stable)
+    results.sort(key=lambda x: x['avg_distance_m'])
+    return results
@@ -58,6 +58,88 @@ async function setBaseCoords(lat, lng) {
     }
 }
 
+// Kursor ?since= dla przyrostowego odświeżania (id ostatniego wiersza)
+let cursor = 0;
+let groups = {};
+let seen = new Set();
+const REFRESH_MS = window.historyRefreshMs || 5000;
+// Przy aktywnym strumieniu live polling jest tylko zabezpieczeniem
+const LIVE_REFRESH_MS = REFRESH_MS * 6;
+let liveSource = null;
+
+async function fetchHistoryPage(since) {
+    const params = new URLSearchParams({ since });
+    if (window.matchId) params.set('match', window.matchId);
+    // Oś czasu grupuje punkty po sekundach, więcej niż 1 punkt/s na MAC nie jest potrzebne
+    if (window.historyResolution) params.set('resolution', window.historyResolution);
+    // Format kolumnowy (gzip) jest kilkadziesiąt razy mniejszy od listy rekordów
+    params.set('format', 'columnar');
+    // no-cache: zakończony mecz wraca z serwera jako 304 (ETag)
+    const res = await fetch(`${window.gpsHistoryUrl}?${params}`, { cache: 'no-cache' });
+    const page = await res.json();
+    cursor = page.next;
+    return decodeColumnar(page);
+}
+
+// Rozpakowuje format kolumnowy (apps/gps/history_format.py) do rekordów jak w /history/
+function decodeColumnar(payload) {
+    const points = [];
+    payload.tracks.forEach(track => {
+        let t = payload.t0, lat = 0, lon = 0;
+        for (let i = 0; i < track.t.length; i++) {
+            t += track.t[i];
+            lat += track.lat[i];
+            lon += track.lon[i];
+            points.push({
+                timestamp: new Date(t).toISOString(),
+                mac: track.mac,
+                player: track.player,
+                latitude: lat / payload.scale,
+                longitude: lon / payload.scale,
+                speed_kmh: track.speed[i] / 100,
+                step_dist: track.step[i] / 100
+            });
+        }
+    });
+    return points;
+}
+
+// Klucz punktu niezależny od zapisu czasu (ISO z serwera / toISOString)
+function pointKey(d) {
+    const ts = d.timestamp;
+    const ms = ts[19] === '.' ? ts.substring(20, 23).padEnd(3, '0') : '000';
+    return `${d.mac}|${ts.substring(0, 19)}.${ms}`;
+}
+
+function addPoints(points) {
+    // Filtr 40km/h; punkty ze strumienia live i z ?since= mogą się powtarzać
+    const fresh = points.filter(d => {
+        const key = pointKey(d);
+        if (seen.has(key) || parseFloat(d.speed_kmh) >= 40) return false;
+        seen.add(key);
+        return true;
+    });
+    fresh.forEach(d => {
+        data.push(d);
+        const ts = d.timestamp.substring(0, 19); // Wyciągnij datę i czas bez timezone
+        if(!groups[ts]) groups[ts] = [];
+        groups[ts].push(d);
+
+        if(!players[d.mac]) {
+            const c = colors[Object.keys(players).length % colors.length];
+            players[d.mac] = {
+                m: L.circleMarker([0,0], {radius: 7, color: '#fff', weight: 2, fillColor: c, fillOpacity: 1}).addTo(map),
+                t: L.polyline([], {color: c, weight: 3, opacity: 0.3}).addTo(map),
+                name: null
+            };
+        }
+        if(d.player) players[d.mac].name = d.player;
+    });
+    ticks = Object.keys(groups).sort();
+    document.getElementById('timeline').max = ticks.length - 1;
+    return fresh.length;
+}
+
 async function loadHistory() {
     if (loading) return;
     loading = true;
@@ -65,37 +147,16 @@ async function loadHistory() {
     // Clear previous layers/UI
     Object.values(players).forEach(p => { map.removeLayer(p.m); map.removeLayer(p.t); });
     players = {};
+    data = [];
+    groups = {};
+    seen = new Set();
     document.getElementById('player-list').innerHTML = '';
     heatLayer.setLatLngs([]);
 
-    // Django URL - używamy reverse URL zamiast history.php
-    const params = window.matchId ? `?match=${window.matchId}` : '';
-    const res = await fetch(window.gpsHistoryUrl + params, { cache: 'no-store' });
-    const raw = await res.json();
-    
-    // Filtr 40km/h
-    data = raw.filter(d => parseFloat(d.speed_kmh) < 40);
-
-    const groups = {};
-    data.forEach(d => { 
-        const ts = d.timestamp.substring(0, 19); // Wyciągnij datę i czas bez timezone
-        if(!groups[ts]) groups[ts] = []; 
-        groups[ts].push(d); 
-    });
-    ticks = Object.keys(groups).sort();
-    document.getElementById('timeline').max = ticks.length - 1;
+    addPoints(await fetchHistoryPage(0));
     document.getElementById('timeline').value = 0;
     cur = 0;
 
-    const macs = [...new Set(data.map(d => d.mac))];
-    macs.forEach((mac, idx) => {
-        const c = colors[idx % colors.length];
-        players[mac] = {
-            m: L.circleMarker([0,0], {radius: 7, color: '#fff', weight: 2, fillColor: c, fillOpacity: 1}).addTo(map),
-            t: L.polyline([], {color: c, weight: 3, opacity: 0.3}).addTo(map)
-        };
-    });
-    
     // Set map center to first data point
     if (data.length > 0) {
         map.setView([data[0].latitude, data[0].longitude], 21);
@@ -105,6 +166,38 @@ async function loadHistory() {
     loading = false;
 }
 
+// Dociąga tylko nowe punkty (step_dist liczony od ostatniego punktu poprzedniej strony)
+async function refreshHistory() {
+    if (loading) return;
+    loading = true;
+    try {
+        appendPoints(await fetchHistoryPage(cursor));
+    } finally {
+        loading = false;
+    }
+}
+
+// Dodaje nowe punkty i przesuwa oś czasu, jeśli była na końcu
+function appendPoints(points) {
+    const atEnd = cur >= ticks.length - 1;
+    if (addPoints(points) > 0 && atEnd && !playing) {
+        show(ticks.length - 1);
+        document.getElementById('timeline').value = cur;
+    }
+}
+
+// Strumień live (SSE) dla meczu; EventSource sam wznawia połączenie
+function subscribeLive() {
+    if (!window.matchId || !window.liveStreamUrl || !window.EventSource) return false;
+    liveSource = new EventSource(`${window.liveStreamUrl}?match=${window.matchId}`);
+    liveSource.addEventListener('fixes', (e) => {
+        appendPoints(JSON.parse(e.data));
+    });
+    // Po (ponownym) połączeniu dociągnij punkty z przerwy
+    liveSource.onopen = () => refreshHistory();
+    return true;
+}
+
 function toggleHeat() {
     heatEnabled = !heatEnabled;
     const btn = document.getElementById('heatBtn');
@@ -169,6 +262,11 @@ function show(idx) {
     if(heatEnabled) heatLayer.setLatLngs(heatPoints);
 }
 
+// Nazwa zawodnika trafia do innerHTML
+function escapeHtml(text) {
+    return String(text).replace(/[&<>"']/g, c => ({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c]));
+}
+
 function updateUI(mac, v, vm, d) {
     let el = document.getElementById(`p-${mac}`);
     if(!el) {
@@ -179,7 +277,7 @@ function updateUI(mac, v, vm, d) {
         document.getElementById('player-list').appendChild(el);
     }
     el.innerHTML = `
-        <div style="display:flex; justify-content:space-between"><strong>${mac}</strong> <span class="v-curr">${v.toFixed(1)} <small>km/h</small></span></div>
+        <div style="display:flex; justify-content:space-between"><strong title="${mac}">${escapeHtml(players[mac].name || mac)}</strong> <span class="v-curr">${v.toFixed(1)} <small>km/h</small></span></div>
         <div class="grid">
             <div><div class="label">Dystans</div><div class="val" style="color:#2ed573">${d.toFixed(2)} m</div></div>
             <div><div class="label">V-Max</div><div class="val" style="color:#ff4757">${vm.toFixed(1)} km/h</div></div>
@@ -215,4 +313,7 @@ document.getElementById('timeline').oninput = (e) => {
     if(playing) togglePlay(); 
     show(parseInt(e.target.value)); 
 };
-loadHistory();
+loadHistory().then(() => {
+    const live = subscribeLive();
+    setInterval(refreshHistory, live ? LIVE_REFRESH_MS : REFRESH_MS);
+});
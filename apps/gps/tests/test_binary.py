@@ -0,0 +1,66 @@
+"""Decoding and validation of binary GPS frames"""
+import numpy as np
+import pytest
+from apps.gps.binary import (
+    HEADER, MAX_TIME_MS, MIN_TIME_MS, RECORD_DTYPE, RECORD_SIZE, BinaryFrameError,
+    decode_frame, encode_frame, valid_mask,
+)
+
+RAW_MAC = bytes.fromhex('D8F15B0A3E69')
+# 2026-01-09 17:23:54.100 UTC
+TIME_MS = 1767979434100
+
+
+def record(**fields):
+    values = {
+        'time_ms': TIME_MS, 'lat': 502585000, 'lon': 189659000, 'alt_cm': 24540,
+        'speed': 452, 'course': 16388, 'hdop': 9, 'sats': 12, 'quality': 1, 'reserved': 0,
+    }
+    values.update(fields)
+    return tuple(values[name] for name in RECORD_DTYPE.names)
+
+
+def test_decode_roundtrip():
+    records = [record(), record(time_ms=TIME_MS + 100, lat=-502585000)]
+    mac, decoded = decode_frame(encode_frame(RAW_MAC, records))
+
+    assert mac == 'D8F15B0A3E69'
+    assert decoded.dtype == RECORD_DTYPE
+    assert decoded['time_ms'].tolist() == [TIME_MS, TIME_MS + 100]
+    assert decoded['lat'].tolist() == [502585000, -502585000]
+    assert decoded['speed'].tolist() == [452, 452]
+
+
+def test_decode_empty_frame():
+    mac, decoded = decode_frame(encode_frame(RAW_MAC, np.zeros(0, dtype=RECORD_DTYPE)))
+    assert mac == 'D8F15B0A3E69'
+    assert len(decoded) == 0
+
+
+@pytest.mark.parametrize('data, message', [
+    (b'GPSB', 'too short'),
+    (HEADER.pack(b'NMEA', 1, 0, RAW_MAC), 'magic'),
+    (HEADER.pack(b'GPSB', 2, 0, RAW_MAC), 'version'),
+    (HEADER.pack(b'GPSB', 1, 0, RAW_MAC) + b'\0' * (RECORD_SIZE - 1), 'multiple'),
+])
+def test_decode_rejects_malformed_frames(data, message):
+    with pytest.raises(BinaryFrameError, match=message):
+        decode_frame(data)
+
+
+def test_valid_mask():
+    records = np.array([
+        record(),
+        record(quality=0),
+        record(sats=5),
+        record(lat=0),
+        record(lon=0),
+        record(lat=900000001),
+        record(lon=-1800000001),
+        record(time_ms=MIN_TIME_MS - 1),
+        record(time_ms=MAX_TIME_MS),
+        record(time_ms=np.iinfo(np.int64).max),
+        record(lat=-900000000, lon=1800000000, time_ms=MIN_TIME_MS),
+    ], dtype=RECORD_DTYPE)
+
+    assert valid_mask(records).tolist() == [True] + [False] * 9 + [True]
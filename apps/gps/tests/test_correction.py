@@ -0,0 +1,85 @@
+"""Ticks, stored position columns and the dense base station correction table"""
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from apps.gps.correction import (
+    CorrectionTable, GpsColumns, tick_corrections, tick_to_datetime, to_tick, to_ticks,
+)
+
+T0 = datetime(2026, 1, 9, 17, 0, tzinfo=timezone.utc)
+
+
+def test_ticks_round_down_to_tenth_of_second():
+    tick = to_tick(T0 + timedelta(milliseconds=1299))
+    assert tick == to_tick(T0) + 12
+    assert tick_to_datetime(tick) == T0 + timedelta(milliseconds=1200)
+    assert to_ticks([T0, T0 + timedelta(seconds=1)]).tolist() == [to_tick(T0), to_tick(T0) + 10]
+
+
+def test_tick_corrections_average_fixes_of_a_tick():
+    ticks, dlat, dlon, samples = tick_corrections(
+        [5, 3, 5], np.array([1.0, 2.0, 3.0]), np.array([10.0, 20.0, 30.0]), 2.5, 25.0
+    )
+    assert ticks.tolist() == [3, 5]
+    assert dlat.tolist() == [0.5, 0.5]
+    assert dlon.tolist() == [5.0, 5.0]
+    assert samples.tolist() == [1, 2]
+
+
+def test_from_known_ticks_interpolates_between_fixes():
+    table = CorrectionTable.from_known_ticks([100, 104], [0.0, 4.0], [0.0, -4.0])
+    assert len(table) == 5
+    assert table.dlat.tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert table.lookup(102) == (2.0, -2.0)
+    assert table.lookup(105) is None
+    assert CorrectionTable.from_known_ticks([], [], []) is None
+
+
+def test_apply_corrects_covered_ticks_in_place():
+    table = CorrectionTable.from_known_ticks([100, 102], [1.0, 3.0], [-1.0, -3.0])
+    latitudes = np.array([50.0, 50.0, 50.0, 50.0])
+    longitudes = np.array([18.0, 18.0, 18.0, 18.0])
+
+    covered = table.apply(np.array([99, 100, 101, 103]), latitudes, longitudes)
+
+    assert covered.tolist() == [False, True, True, False]
+    assert latitudes.tolist() == [50.0, 51.0, 52.0, 50.0]
+    assert longitudes.tolist() == [18.0, 17.0, 16.0, 18.0]
+
+
+def test_from_columns_uses_base_station_rows_only():
+    columns = GpsColumns.from_rows([
+        (T0, 'BASE', 50.0001, 18.0, 0.0),
+        (T0, 'PLAYER', 51.0, 19.0, 0.0),
+        (T0 + timedelta(seconds=1), 'BASE', 49.9999, 18.0002, 0.0),
+    ])
+    table = CorrectionTable.from_columns(columns, 'BASE', 50.0, 18.0)
+
+    assert table.first_tick == to_tick(T0)
+    assert len(table) == 11
+    assert table.lookup(to_tick(T0)) == pytest.approx((-0.0001, 0.0))
+    assert table.lookup(to_tick(T0) + 10) == pytest.approx((0.0001, -0.0002))
+
+
+def test_from_stored_rows_prefers_position_corrected_at_ingest():
+    columns, pending = GpsColumns.from_stored_rows([
+        (T0, 'A', 50.0, 18.0, 3.0, 50.1, 18.1),
+        (T0, 'B', 51.0, 19.0, None, None, None),
+    ])
+    assert pending.tolist() == [False, True]
+    assert columns.latitudes.tolist() == [50.1, 51.0]
+    assert columns.longitudes.tolist() == [18.1, 19.0]
+    assert columns.speeds.tolist() == [3.0, 0.0]
+
+
+def test_select_keeps_all_columns_aligned():
+    columns = GpsColumns.from_rows([
+        (T0, 'A', 50.0, 18.0, 1.0),
+        (T0 + timedelta(seconds=1), 'B', 51.0, 19.0, 2.0),
+    ])
+    selected = columns.select(np.array([False, True]))
+    assert len(selected) == 1
+    assert selected.timestamps == [T0 + timedelta(seconds=1)]
+    assert selected.macs.tolist() == ['B']
+    assert selected.ticks.tolist() == [to_tick(T0) + 10]
+    assert selected.speeds.tolist() == [2.0]
@@ -0,0 +1,29 @@
+"""Query plan of the history endpoints (explain_history command)"""
+from datetime import date
+from io import StringIO
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from apps.gps.models import Match
+
+
+@pytest.fixture
+def postgresql():
+    if connection.vendor != 'postgresql':
+        pytest.skip('EXPLAIN check requires PostgreSQL')
+
+
+@pytest.mark.django_db
+def test_recent_history_uses_indexes(postgresql):
+    out = StringIO()
+    call_command('explain_history', '--mac', 'D8F15B0A3E69', stdout=out)
+    assert 'OK: history queries use indexes' in out.getvalue()
+
+
+@pytest.mark.django_db
+def test_match_history_uses_indexes(postgresql):
+    # Saving the match creates the partition of its day (signals.py)
+    match = Match.objects.create(date=date(2026, 1, 9))
+    out = StringIO()
+    call_command('explain_history', '--match', str(match.id), '--mac', 'D8F15B0A3E69', stdout=out)
+    assert 'OK: history queries use indexes' in out.getvalue()
@@ -0,0 +1,112 @@
+"""Row id cursor pages of the history endpoints"""
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from django.db import connection
+from apps.gps.correction import GpsColumns
+from apps.gps.functions import haversine_distance
+from apps.gps.models import GpsData
+from apps.gps.simplify import Simplification
+from apps.gps.views.api.history import FIRST_PAGE, _history_page, _key_mask, _parse_since
+
+T0 = datetime(2026, 1, 9, 17, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def postgresql():
+    # Cursor pages use DISTINCT ON, and gps_data is partitioned
+    if connection.vendor != 'postgresql':
+        pytest.skip('requires PostgreSQL')
+
+
+def store(*fixes):
+    """Insert (seconds, mac, latitude) fixes at longitude 18.0"""
+    GpsData.objects.bulk_create([
+        GpsData(timestamp=T0 + timedelta(seconds=seconds), mac=mac,
+                latitude=latitude, longitude=18.0, quality=1, num_satellites=12)
+        for seconds, mac, latitude in fixes
+    ])
+
+
+def page_points(cursor, simplification=None):
+    return _history_page(
+        GpsData.objects.all(), None, 0.0, cursor, round_coords=False,
+        simplification=simplification,
+    )
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('', ('id', 0)),
+    ('0', ('id', 0)),
+    (' 1234 ', ('id', 1234)),
+])
+def test_parse_since_row_ids(value, expected):
+    assert _parse_since(value) == expected
+
+
+@pytest.mark.parametrize('value', ['-1', '1.5', '2026-01-09T17:00:00Z', 'abc'])
+def test_parse_since_rejects_timestamps_and_garbage(value):
+    with pytest.raises(ValueError, match='row id'):
+        _parse_since(value)
+
+
+def test_key_mask():
+    columns = GpsColumns.from_rows([
+        (T0, 'A', 50.0, 18.0, 0.0),
+        (T0, 'B', 50.0, 18.0, 0.0),
+        (T0 + timedelta(seconds=1), 'A', 50.0, 18.0, 0.0),
+    ])
+    mask = _key_mask(columns, {('A', T0 + timedelta(seconds=1)), ('C', T0)})
+    assert mask.tolist() == [False, False, True]
+    assert _key_mask(columns, set()).dtype == np.bool_
+
+
+@pytest.mark.django_db
+def test_pages_measure_from_the_last_point_before_the_cursor(postgresql):
+    store((0, 'A', 50.0), (1, 'A', 50.0001), (0, 'B', 51.0))
+    first = page_points(FIRST_PAGE)
+    assert len(first['points']) == 3
+
+    # A newer fix and a late (older) fix of A, a first fix of a new MAC
+    store((2, 'A', 50.0003), (0.5, 'A', 50.00005), (1, 'C', 52.0))
+    second = page_points(('id', first['next']))
+
+    assert len(second['points']) == 3
+    assert second['next'] == GpsData.objects.order_by('-id').values_list('id', flat=True)[0]
+
+    late, newer, new_mac = sorted(
+        second['points'], key=lambda point: (point['mac'], point['timestamp'])
+    )
+    # Carried A at 1 s anchors the newer fix; the late one is measured among late fixes
+    assert newer['step_dist'] == round(haversine_distance(50.0001, 18.0, 50.0003, 18.0), 2)
+    assert late['step_dist'] == 0.0
+    assert new_mac['mac'] == 'C'
+    assert new_mac['step_dist'] == 0.0
+
+    # A moves along a meridian, so the pages add up to the distance of one full request
+    paged = sum(point['step_dist'] for point in first['points'] + second['points'])
+    full = sum(point['step_dist'] for point in page_points(FIRST_PAGE)['points'])
+    assert paged == pytest.approx(full, abs=0.05)
+
+
+@pytest.mark.django_db
+def test_simplified_pages_keep_the_carried_anchor(postgresql):
+    store(*((seconds, 'A', 50.0 + seconds * 0.0001) for seconds in range(5)))
+    first = page_points(FIRST_PAGE)
+
+    store(*((seconds, 'A', 50.0 + seconds * 0.0001) for seconds in range(5, 10)))
+    second = page_points(('id', first['next']), Simplification(1000.0, None, None))
+
+    # RDP keeps only the ends of the straight track: the carried point at
+    # 4 s anchors step_dist of the last point and is left out of the page
+    [point] = second['points']
+    assert point['step_dist'] == pytest.approx(
+        haversine_distance(50.0004, 18.0, 50.0009, 18.0), abs=0.01
+    )
+
+
+@pytest.mark.django_db
+def test_empty_page_keeps_the_cursor(postgresql):
+    store((0, 'A', 50.0))
+    first = page_points(FIRST_PAGE)
+    assert page_points(('id', first['next'])) == {'points': [], 'next': first['next']}
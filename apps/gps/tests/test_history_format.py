@@ -0,0 +1,147 @@
+"""Compact history encodings and content negotiation"""
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from django.test import RequestFactory
+from apps.gps.correction import GpsColumns
+from apps.gps.history_format import (
+    BINARY_HEADER, BINARY_MAGIC, MIN_COMPRESS_SIZE, accepted_encodings, binary_payload,
+    columnar_payload, compress_body, negotiate_format,
+)
+
+T0 = datetime(2026, 1, 9, 17, 0, tzinfo=timezone.utc)
+T0_MS = 1767978000000
+
+
+@pytest.fixture
+def history():
+    """Prepared history of two interleaved MACs: (columns, step_dist, speeds, players)"""
+    rows = [
+        (T0, 'A', 50.1234567, 18.7654321, 0.0),
+        (T0 + timedelta(milliseconds=100), 'B', 50.2, 18.8, 0.0),
+        (T0 + timedelta(milliseconds=250), 'A', 50.1235, 18.7654, 0.0),
+        (T0 + timedelta(seconds=1), 'A', 50.1236, 18.7653, 0.0),
+    ]
+    return (
+        GpsColumns.from_rows(rows),
+        np.array([0.0, 0.0, 4.81, 11.25]),
+        np.array([12.34, 0.0, 13.5, 14.0]),
+        np.array(['Player A', 'Player B', 'Player A', 'Player A'], dtype=object),
+    )
+
+
+def test_columnar_payload_decodes_back(history):
+    columns, step_dist, speeds, players = history
+
+    payload = json.loads(json.dumps(columnar_payload(columns, step_dist, speeds, players, 42)))
+
+    assert payload['format'] == 'columnar'
+    assert payload['t0'] == T0_MS
+    assert payload['next'] == 42
+    track_a, track_b = payload['tracks']
+    assert (track_a['mac'], track_a['player']) == ('A', 'Player A')
+    assert (track_b['mac'], track_b['player']) == ('B', 'Player B')
+
+    scale = payload['scale']
+    assert np.cumsum(track_a['t']).tolist() == [0, 250, 1000]
+    assert np.cumsum(track_b['t']).tolist() == [100]
+    assert (np.cumsum(track_a['lat']) / scale).tolist() == pytest.approx([50.123457, 50.1235, 50.1236])
+    assert (np.cumsum(track_a['lon']) / scale).tolist() == pytest.approx([18.765432, 18.7654, 18.7653])
+    assert track_a['speed'] == [1234, 1350, 1400]
+    assert track_a['step'] == [0, 481, 1125]
+
+
+def test_columnar_payload_without_cursor_or_points():
+    empty = np.zeros(0)
+    payload = columnar_payload(GpsColumns.from_rows([]), empty, empty, np.empty(0, dtype=object))
+    assert payload['tracks'] == []
+    assert 'next' not in payload
+
+
+def decode_binary(body):
+    """Metadata and (time, lat, lon, speed, step) columns of a binary payload"""
+    magic, version, meta_len = BINARY_HEADER.unpack_from(body)
+    assert (magic, version) == (BINARY_MAGIC, 1)
+    meta_end = BINARY_HEADER.size + meta_len
+    assert meta_end % 8 == 0
+    meta = json.loads(body[BINARY_HEADER.size:meta_end])
+    points = meta['points']
+    time = np.frombuffer(body, dtype='<u4', count=points, offset=meta_end)
+    floats = np.frombuffer(body, dtype='<f4', count=4 * points, offset=meta_end + 4 * points)
+    # Offsets are added to lat0/lon0 in double precision, as the browser does
+    floats = floats.astype(np.float64)
+    assert len(body) == meta_end + 20 * points
+    return meta, time, floats.reshape(4, points)
+
+
+def test_binary_payload_decodes_back(history):
+    columns, step_dist, speeds, players = history
+
+    meta, time, (lat, lon, speed, step) = decode_binary(
+        binary_payload(columns, step_dist, speeds, players, 42)
+    )
+
+    assert meta['macs'] == ['A', 'B']
+    assert meta['players'] == ['Player A', 'Player B']
+    assert meta['counts'] == [3, 1]
+    assert (meta['t0'], meta['time_unit'], meta['next']) == (T0_MS, 1, 42)
+    assert time.tolist() == [0, 250, 1000, 100]
+    assert (lat + meta['lat0']).tolist() == pytest.approx([50.1234567, 50.1235, 50.1236, 50.2], abs=1e-7)
+    assert (lon + meta['lon0']).tolist() == pytest.approx([18.7654321, 18.7654, 18.7653, 18.8], abs=1e-7)
+    assert speed.tolist() == pytest.approx([12.34, 13.5, 14.0, 0.0])
+    assert step.tolist() == pytest.approx([0.0, 4.81, 11.25, 0.0])
+
+
+def test_binary_payload_long_range_uses_tenth_seconds(history):
+    columns, step_dist, speeds, players = history
+    columns.timestamps[-1] = T0 + timedelta(days=60)
+
+    meta, time, _ = decode_binary(binary_payload(columns, step_dist, speeds, players))
+
+    assert meta['time_unit'] == 100
+    assert meta['next'] is None
+    assert time.tolist() == [0, 2, 60 * 864000, 1]
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('', set()),
+    ('gzip, deflate, br', {'gzip', 'deflate', 'br'}),
+    ('GZIP;q=0.5, br;q=0', {'gzip'}),
+    ('br; q=0.0, gzip ; q=1', {'gzip'}),
+    ('gzip;q=abc, identity', {'identity'}),
+    ('*;q=0.1', {'*'}),
+])
+def test_accepted_encodings(header, expected):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=header)
+    assert accepted_encodings(request) == expected
+
+
+def test_compress_body_respects_refused_encodings():
+    body = b'x' * MIN_COMPRESS_SIZE
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='br;q=0, gzip')
+    compressed, encoding = compress_body(request, body)
+    assert encoding == 'gzip'
+    assert gzip.decompress(compressed) == body
+
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+    assert compress_body(request, body) == (body, None)
+    assert compress_body(RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip'), b'x') == (b'x', None)
+
+
+@pytest.mark.parametrize('query, accept, expected', [
+    ({}, '', 'json'),
+    ({'format': 'binary'}, '', 'binary'),
+    ({}, 'application/vnd.gps-history', 'binary'),
+    ({}, 'application/vnd.gps-history.columnar+json', 'columnar'),
+    ({'format': 'json'}, 'application/vnd.gps-history', 'json'),
+])
+def test_negotiate_format(query, accept, expected):
+    request = RequestFactory().get('/', query, HTTP_ACCEPT=accept)
+    assert negotiate_format(request) == expected
+
+
+def test_negotiate_format_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        negotiate_format(RequestFactory().get('/', {'format': 'xml'}))
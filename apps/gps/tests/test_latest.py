@@ -0,0 +1,87 @@
+"""Per-MAC ring buffers of the latest positions"""
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from apps.gps.correction import GpsColumns, to_tick
+from apps.gps.latest import FixRing, LatestStore
+
+T0 = datetime(2026, 1, 9, 17, 0, tzinfo=timezone.utc)
+
+
+def extend(ring, ticks):
+    """Append fixes whose coordinates encode their tick; odd ticks have no corrected position"""
+    ticks = np.asarray(ticks, dtype=np.int64)
+    values = ticks.astype(np.float64)
+    corrected = np.where(ticks % 2 == 0, values + 0.5, np.nan)
+    ring.extend(ticks, values, -values, corrected, -corrected, values / 10)
+
+
+def newest_ticks(ring, count):
+    return ring.ticks[ring.newest(count)].tolist()
+
+
+def test_empty_ring():
+    ring = FixRing(4)
+    assert len(ring) == 0
+    assert ring.newest_tick is None
+    assert newest_ticks(ring, 3) == []
+
+
+def test_ring_wraps_around_oldest_first():
+    ring = FixRing(4)
+    extend(ring, [1, 2, 3])
+    assert newest_ticks(ring, 10) == [1, 2, 3]
+
+    extend(ring, [4, 5, 6])
+
+    assert len(ring) == 4
+    assert ring.head == 2
+    assert ring.newest_tick == 6
+    assert newest_ticks(ring, 4) == [3, 4, 5, 6]
+    assert newest_ticks(ring, 2) == [5, 6]
+
+    index = ring.newest(4)
+    assert ring.latitudes[index].tolist() == [3.0, 4.0, 5.0, 6.0]
+    assert ring.longitudes[index].tolist() == [-3.0, -4.0, -5.0, -6.0]
+    assert ring.speeds[index].tolist() == [0.3, 0.4, 0.5, 0.6]
+    corrected = ring.corrected_latitudes[index]
+    assert np.isnan(corrected[[0, 2]]).all()
+    assert corrected[[1, 3]].tolist() == [4.5, 6.5]
+
+
+def test_ring_keeps_last_capacity_of_a_long_batch():
+    ring = FixRing(4)
+    extend(ring, [1])
+    extend(ring, range(10, 20))
+    assert len(ring) == 4
+    assert newest_ticks(ring, 4) == [16, 17, 18, 19]
+
+    extend(ring, [20])
+    assert newest_ticks(ring, 4) == [17, 18, 19, 20]
+
+
+def columns(points):
+    """GpsColumns from (seconds, mac, lat) with a fixed longitude"""
+    return GpsColumns.from_rows([
+        (T0 + timedelta(seconds=seconds), mac, lat, 18.0, 1.0) for seconds, mac, lat in points
+    ])
+
+
+def test_store_skips_fixes_older_than_the_newest():
+    store = LatestStore(capacity=3)
+    batch = columns([(2, 'A', 50.2), (1, 'A', 50.1), (1, 'B', 51.1), (1, 'A', 50.1)])
+    nan = np.full(len(batch), np.nan)
+    assert store.update(batch, nan, nan, players={'A': 'Player A'}) == 3
+
+    late = columns([(0, 'A', 50.0), (3, 'A', 50.3)])
+    corrected = np.array([50.0, 50.31])
+    assert store.update(late, corrected, corrected) == 1
+
+    snapshot = store.snapshot(points=5)
+    player, ticks, latitudes, _, corrected_latitudes, _, _ = snapshot['A']
+    assert player == 'Player A'
+    assert ticks.tolist() == [to_tick(T0) + 10 * seconds for seconds in (1, 2, 3)]
+    assert latitudes.tolist() == [50.1, 50.2, 50.3]
+    assert np.isnan(corrected_latitudes[:2]).all()
+    assert corrected_latitudes[2] == 50.31
+    assert snapshot['B'][0] is None
+    assert store.stats()['skipped'] == 2
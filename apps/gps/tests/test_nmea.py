@@ -0,0 +1,75 @@
+"""Checksum validation and field conversion of the NMEA parser"""
+import pytest
+from apps.gps.nmea import GGA, RMC, build_sentence, checksum, parse_payload, parse_sentence
+
+GGA_BODY = 'GNGGA,172354.100,5015.510000,N,01857.954000,E,1,12,0.9,245.4,M,42.1,M,,'
+RMC_BODY = 'GNRMC,172354.100,A,5015.510000,N,01857.954000,E,2.44,163.88,090126,,,D,V'
+
+
+def test_build_sentence_appends_xor_checksum():
+    sentence = build_sentence(GGA_BODY)
+    assert sentence.startswith('$' + GGA_BODY + '*')
+    assert int(sentence[-2:], 16) == checksum(GGA_BODY.encode())
+
+
+def test_parse_sentence_converts_fields():
+    gga = parse_sentence(build_sentence(GGA_BODY).encode())
+    assert isinstance(gga, GGA)
+    assert gga.talker == 'GN'
+    assert gga.latitude == pytest.approx(50 + 15.51 / 60)
+    assert gga.longitude == pytest.approx(18 + 57.954 / 60)
+    assert (gga.quality, gga.satellites, gga.hdop, gga.altitude) == (1, 12, 0.9, 245.4)
+
+    rmc = parse_sentence(build_sentence(RMC_BODY).encode())
+    assert isinstance(rmc, RMC)
+    assert rmc.date == '090126'
+    assert rmc.speed_kmh == pytest.approx(2.44 * 1.852)
+
+
+def test_parse_sentence_southern_western_hemisphere():
+    body = 'GPGGA,000000.000,3345.000000,S,07030.000000,W,1,8,1.0,10.0,M,0.0,M,,'
+    gga = parse_sentence(build_sentence(body).encode())
+    assert gga.latitude == pytest.approx(-33.75)
+    assert gga.longitude == pytest.approx(-70.5)
+
+
+def test_parse_sentence_rejects_bad_or_missing_checksum():
+    sentence = build_sentence(GGA_BODY)
+    corrupted = sentence.replace('5015', '5016', 1)
+    assert parse_sentence(corrupted.encode()) is None
+    assert parse_sentence(('$' + GGA_BODY).encode()) is None
+    assert isinstance(parse_sentence(('$' + GGA_BODY).encode(), require_checksum=False), GGA)
+
+
+def test_parse_payload_matches_per_sentence_checksums():
+    good = [build_sentence(GGA_BODY), build_sentence(RMC_BODY)]
+    bad = build_sentence(RMC_BODY).replace('2.44', '2.45')
+    payload = '\n'.join([good[0], bad, '', good[1], 'garbage', '  '])
+
+    sentences, rejected = parse_payload(payload)
+
+    assert [sentence.kind for sentence in sentences] == ['GGA', 'RMC']
+    # Blank lines are not counted, the corrupted and the non-NMEA line are
+    assert rejected == 2
+
+
+def test_parse_payload_windows_line_endings_and_prefix():
+    sentence = build_sentence(GGA_BODY)
+    sentences, rejected = parse_payload(f'{sentence}\r\n  {sentence}\r\nx{sentence}'.encode())
+    assert len(sentences) == 2
+    assert rejected == 1
+
+
+def test_parse_payload_unsupported_and_unchecked_sentences():
+    gsv = build_sentence('GPGSV,3,1,11,10,63,137,17')
+    sentences, rejected = parse_payload('\n'.join([gsv, '$' + GGA_BODY]))
+    assert sentences == []
+    assert rejected == 2
+
+    sentences, rejected = parse_payload('$' + GGA_BODY, require_checksum=False)
+    assert len(sentences) == 1
+    assert rejected == 0
+
+
+def test_parse_payload_empty():
+    assert parse_payload(b'') == ([], 0)
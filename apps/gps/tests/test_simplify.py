@@ -0,0 +1,126 @@
+"""Step distances and per-MAC track simplification"""
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from apps.gps.correction import GpsColumns
+from apps.gps.functions import factorize, haversine_distance, step_distances
+from apps.gps.simplify import (
+    Simplification, bucket_mask, merged_step_distances, rdp_keep, rdp_mask, simplify,
+)
+
+T0 = datetime(2026, 1, 9, 17, 0, tzinfo=timezone.utc)
+
+
+def track_columns(points):
+    """GpsColumns from (seconds, mac, lat, lon) in timestamp order"""
+    return GpsColumns.from_rows([
+        (T0 + timedelta(seconds=seconds), mac, lat, lon, 0.0) for seconds, mac, lat, lon in points
+    ])
+
+
+def test_factorize_in_order_of_first_appearance():
+    assert factorize(np.array(['B', 'A', 'B', 'C'], dtype=object)).tolist() == [0, 1, 0, 2]
+
+
+def test_step_distances_per_mac_in_input_order():
+    macs = ['A', 'B', 'A', 'B', 'A']
+    latitudes = [50.0, 51.0, 50.001, 51.0, 50.002]
+    longitudes = [18.0, 19.0, 18.0, 19.001, 18.0]
+
+    step_dist = step_distances(macs, latitudes, longitudes)
+
+    assert step_dist[0] == step_dist[1] == 0.0
+    assert step_dist[2] == pytest.approx(haversine_distance(50.0, 18.0, 50.001, 18.0))
+    assert step_dist[3] == pytest.approx(haversine_distance(51.0, 19.0, 51.0, 19.001))
+    assert step_dist[4] == pytest.approx(haversine_distance(50.001, 18.0, 50.002, 18.0))
+    assert step_distances(['A'], [50.0], [18.0]).tolist() == [0.0]
+
+
+def test_merged_step_distances_sum_dropped_steps():
+    codes = np.array([0, 1, 0, 0, 1, 0, 1])
+    step_dist = np.array([0.0, 0.0, 1.0, 2.0, 10.0, 4.0, 20.0])
+    keep = np.array([True, True, False, True, False, True, True])
+
+    merged = merged_step_distances(codes, step_dist, keep)
+
+    # A: 0, 1+2, 4   B: 0, 10+20
+    assert merged.tolist() == [0.0, 0.0, 3.0, 4.0, 30.0]
+    assert merged.sum() == step_dist.sum()
+
+
+def test_merged_step_distances_first_point_dropped():
+    merged = merged_step_distances(
+        np.array([0, 0, 0]), np.array([0.0, 5.0, 7.0]), np.array([False, False, True])
+    )
+    assert merged.tolist() == [12.0]
+    assert merged_step_distances(np.array([0]), np.array([0.0]), np.array([False])).size == 0
+
+
+def test_rdp_keep_drops_collinear_points_and_keeps_corners():
+    x = np.array([0.0, 1.0, 2.0, 3.0, 3.0, 3.0])
+    y = np.array([0.0, 0.01, 0.0, 0.0, 1.0, 2.0])
+
+    keep = rdp_keep(x, y, tolerance=0.1)
+
+    assert keep.tolist() == [True, False, False, True, False, True]
+    assert rdp_keep(x, y, tolerance=0.001)[1]
+
+
+def test_rdp_keep_track_returning_to_start():
+    x = np.array([0.0, 5.0, 10.0, 5.0, 0.0])
+    y = np.zeros(5)
+    assert rdp_keep(x, y, tolerance=1.0).tolist() == [True, False, True, False, True]
+
+
+def test_rdp_mask_per_mac():
+    # Two interleaved straight tracks about 11 m per step
+    columns = track_columns([
+        (i, mac, 50.0 + i * 0.0001, lon)
+        for i in range(5) for mac, lon in (('A', 18.0), ('B', 18.1))
+    ])
+    keep = rdp_mask(factorize(columns.macs), columns.latitudes, columns.longitudes, 1.0)
+    assert np.flatnonzero(keep).tolist() == [0, 1, 8, 9]
+
+
+def test_bucket_mask_first_fix_per_mac_and_bucket():
+    columns = track_columns([
+        (0.0, 'A', 50.0, 18.0), (0.0, 'B', 50.0, 18.0), (0.5, 'A', 50.0, 18.0),
+        (1.0, 'A', 50.0, 18.0), (1.5, 'B', 50.0, 18.0), (1.9, 'B', 50.0, 18.0),
+    ])
+    keep = bucket_mask(factorize(columns.macs), columns.ticks, resolution=1.0)
+    assert keep.tolist() == [True, True, False, True, True, False]
+
+
+def test_simplify_keeps_total_distance_and_always_keep_rows():
+    points = [(i, 'A', 50.0 + i * 0.0001, 18.0) for i in range(10)]
+    columns = track_columns(points)
+    step_dist = step_distances(columns.macs, columns.latitudes, columns.longitudes)
+    always_keep = np.zeros(10, dtype=bool)
+    always_keep[4] = True
+
+    selected, merged = simplify(columns, step_dist, Simplification(5.0, None, None), always_keep)
+
+    assert [ts.second for ts in selected.timestamps] == [0, 4, 9]
+    assert len(merged) == len(selected)
+    assert merged.sum() == pytest.approx(step_dist.sum())
+
+
+def test_simplification_bbox_filters_after_simplifying():
+    columns = track_columns([(i, 'A', 50.0 + i * 0.001, 18.0) for i in range(5)])
+    keep = Simplification(None, None, (17.9, 50.0015, 18.1, 50.1)).mask(
+        factorize(columns.macs), columns
+    )
+    assert keep.tolist() == [False, False, True, True, True]
+
+
+def test_simplification_from_params():
+    assert Simplification.from_params({}) is None
+    simplification = Simplification.from_params({'tolerance': '2.5', 'bbox': '18,50,19,51'})
+    assert simplification == (2.5, None, (18.0, 50.0, 19.0, 51.0))
+    assert simplification.cache_variant('history') is None
+    assert Simplification(2.5, 1.0, None).cache_variant('history') == 'history:t2.5:r1'
+
+    for params in ({'tolerance': '0'}, {'resolution': '-1'}, {'bbox': '19,50,18,51'},
+                   {'bbox': '1,2,3'}, {'tolerance': 'abc'}):
+        with pytest.raises(ValueError):
+            Simplification.from_params(params)
@@ -4,7 +4,11 @@ GPS-specific routes
 """
 from django.urls import path
 from .views.web import gps_map_view
-from .views.api import receive_gps_data, get_gps_history, get_simple_history, stability, update_base_coords
+from .views.api import (
+    receive_gps_data, receive_gps_binary, receive_gps_data_async, ingest_stats,
+    get_gps_history, get_simple_history, get_gps_history_async, get_simple_history_async,
+    stability, update_base_coords, live_stream, live_stats, live_positions,
+)
 
 app_name = 'gps'
 
@@ -18,6 +22,14 @@ urlpatterns = [
     # Usage: POST to /gps/ with params: gps_raw, mac
     path('gps/', receive_gps_data, name='receive_gps_data'),
     
+    # Binary GPS frame receiver (POST, application/octet-stream)
+    # Usage: POST packed frame to /gps/bin/ (format: apps/gps/binary.py)
+    path('gps/bin/', receive_gps_binary, name='receive_gps_binary'),
+    
+    # Ingest queue metrics (depth, written, rejected)
+    # Usage: GET /gps/stats/
+    path('gps/stats/', ingest_stats, name='ingest_stats'),
+    
     # GPS history API endpoint (GET)
     # Replaces: history.php
     # Usage: GET /history/ or /history/?threshold=0.8&hours=24
@@ -27,6 +39,21 @@ urlpatterns = [
     # Usage: GET /history/simple/
     path('history/simple/', get_simple_history, name='simple_history'),
     
+    # Async variants for ASGI deployments (uvicorn core.asgi:application)
+    # Same parameters and responses as the sync endpoints
+    path('gps/async/', receive_gps_data_async, name='receive_gps_data_async'),
+    path('history/async/', get_gps_history_async, name='gps_history_async'),
+    path('history/simple/async/', get_simple_history_async, name='simple_history_async'),
+    
+    # Newest positions of every MAC from memory (no database query)
+    # Usage: GET /live/ or /live/?mac=D8F15B0A3E69&points=20&max_age=30
+    path('live/', live_positions, name='live_positions'),
+    
+    # Live fixes of a match as server-sent events (ASGI)
+    # Usage: GET /live/stream/?match=1 (EventSource), metrics: GET /live/stats/
+    path('live/stream/', live_stream, name='live_stream'),
+    path('live/stats/', live_stats, name='live_stats'),
+    
     # Update base station coordinates
     # Usage: POST /update-base/ with match_id, latitude, longitude
     path('update-base/', update_base_coords, name='update_base_coords'),
@@ -1,9 +1,14 @@
 """
 GPS API Views Package
 """
-from .receiver import receive_gps_data
-from .history import get_gps_history, get_simple_history
+from .receiver import receive_gps_data, receive_gps_binary, receive_gps_data_async, ingest_stats
+from .history import get_gps_history, get_simple_history, get_gps_history_async, get_simple_history_async
 from .stability import stability
 from .base import update_base_coords
+from .live import live_stream, live_stats, live_positions
 
-__all__ = ['receive_gps_data', 'get_gps_history', 'get_simple_history', 'stability', 'update_base_coords']
+__all__ = [
+    'receive_gps_data', 'receive_gps_binary', 'receive_gps_data_async', 'ingest_stats',
+    'get_gps_history', 'get_simple_history', 'get_gps_history_async', 'get_simple_history_async',
+    'stability', 'update_base_coords', 'live_stream', 'live_stats', 'live_positions',
+]
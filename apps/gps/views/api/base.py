@@ -14,6 +14,9 @@ def update_base_coords(request):
     """
     Update base station coordinates for a match.
     
+    Saving the match rebuilds its stored corrections and invalidates its
+    cached history (signals.py).
+    
     POST parameters:
         match_id: Match ID (required)
         latitude: Base station latitude (required)
@@ -4,24 +4,416 @@ Converted from history.php
 
 Provides endpoints for retrieving GPS tracking history with position hold logic.
 """
+import json
 import logging
-from collections import defaultdict
 from datetime import timedelta
-from django.http import JsonResponse
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
 from django.utils import timezone
 from django.views.decorators.http import require_GET
+from ...correction import CorrectionTable, GpsColumns, to_tick
+from ...correction_store import aload_correction_table, has_base_reference, load_correction_table
+from ...assignments import player_labels, resolve_assignment
+from ...functions import haversine_distance, step_distances
+from ...history_cache import acached_history_response, cached_history_response
+from ...history_format import encode_history, negotiate_format, payload_response
 from ...models import GpsData, Match
+from ...simplify import Simplification, simplify
 
 logger = logging.getLogger(__name__)
 
+# Records per chunk written by the streaming history response
+STREAM_CHUNK_SIZE = 2000
+
+# ?since=0: the whole history plus cursor, cached like the full response
+FIRST_PAGE = ('id', 0)
+
+
+def _history_query(match, hours):
+    """Base queryset for history endpoints: match date or last N hours"""
+    gps_query = GpsData.objects.filter(quality__gt=0)
+    if match:
+        start, end = match.time_range()
+        return gps_query.filter(timestamp__gte=start, timestamp__lt=end)
+    return gps_query.filter(timestamp__gt=timezone.now() - timedelta(hours=hours))
+
+
+def _apply_corrections(columns, match, corrections, log_prefix='[DEBUG]', pending=None):
+    """
+    Apply base station corrections to loaded history columns in place.
+
+    Args:
+        corrections: Stored CorrectionTable of the match; if None (nothing
+            stored yet) it is built from the base station rows in columns
+        pending: Boolean mask of the rows without a position corrected at
+            ingest (see GpsColumns.from_stored_rows); only these are
+            corrected. Default: all rows
+
+    Returns:
+        GpsColumns with corrected latitudes/longitudes
+    """
+    if pending is None:
+        pending = np.ones(len(columns), dtype=bool)
+    if has_base_reference(match) and pending.any():
+        if corrections is None:
+            logger.info(f"{log_prefix} No stored corrections, building map: base_mac={match.base_mac}")
+            corrections = CorrectionTable.from_columns(
+                columns.select(pending), match.base_mac,
+                float(match.base_latitude), float(match.base_longitude)
+            )
+        if corrections is not None:
+            latitudes = columns.latitudes[pending]
+            longitudes = columns.longitudes[pending]
+            covered = corrections.apply(columns.ticks[pending], latitudes, longitudes)
+            columns.latitudes[pending] = latitudes
+            columns.longitudes[pending] = longitudes
+            logger.info(
+                f"{log_prefix} Applied corrections from {len(corrections)} ticks "
+                f"to {int(covered.sum())} of {int(pending.sum())} records not corrected at ingest"
+            )
+
+    return columns
+
+
+def _stored_corrections(match):
+    """Stored correction table of the match (one query), or None"""
+    return load_correction_table(match) if has_base_reference(match) else None
+
+
+async def _astored_corrections(match):
+    """Async variant of _stored_corrections"""
+    return await aload_correction_table(match) if has_base_reference(match) else None
+
+
+def _match_corrections(gps_query, match):
+    """Stored corrections, or built from the base station rows of gps_query if none are stored"""
+    corrections = _stored_corrections(match)
+    if corrections is None and has_base_reference(match):
+        base_points = GpsColumns.from_queryset(gps_query.filter(mac=match.base_mac))
+        corrections = CorrectionTable.from_columns(
+            base_points, match.base_mac,
+            float(match.base_latitude), float(match.base_longitude)
+        )
+    return corrections
+
+
+def _load_corrected_columns(gps_query, match, log_prefix='[DEBUG]'):
+    """
+    Load history rows into columns with their positions corrected at ingest.
+
+    The stored correction table is only loaded for rows without one
+    (imported logs, fixes ingested before their base station reference).
+    """
+    columns, pending = GpsColumns.from_stored_queryset(gps_query)
+    corrections = _stored_corrections(match) if pending.any() else None
+    return _apply_corrections(columns, match, corrections, log_prefix, pending)
+
+
+async def _aload_corrected_columns(gps_query, match, log_prefix='[DEBUG]'):
+    """Async variant of _load_corrected_columns"""
+    columns, pending = await GpsColumns.afrom_stored_queryset(gps_query)
+    corrections = await _astored_corrections(match) if pending.any() else None
+    return _apply_corrections(columns, match, corrections, log_prefix, pending)
+
+
+def _prepare_columns(columns, threshold, simplification=None, always_keep=None):
+    """
+    Step distances, simplification and speed threshold of corrected columns.
+
+    Args:
+        simplification: Optional Simplification (tolerance/resolution/bbox)
+        always_keep: Boolean mask of rows kept by the simplification
+            (carried rows of cursor pages)
+
+    Returns:
+        Tuple (columns, step_dist array, speeds array, player labels array)
+    """
+    step_dist = step_distances(columns.macs, columns.latitudes, columns.longitudes)
+    if simplification:
+        total = len(columns)
+        columns, step_dist = simplify(columns, step_dist, simplification, always_keep)
+        logger.info(f"[SIMPLIFY] {simplification}: kept {len(columns)} of {total} records")
+    speeds = np.where(columns.speeds >= threshold, columns.speeds, 0.0)
+    # One assignment lookup per distinct (MAC, day), not per row
+    players = player_labels(columns.macs, columns.ticks)
+    return columns, step_dist, speeds, players
+
+
+def _records(columns, step_dist, speeds, players, round_coords=True):
+    """History JSON records of prepared columns"""
+    results = []
+    for timestamp, mac, latitude, longitude, speed, dist, player in zip(
+        columns.timestamps, columns.macs.tolist(),
+        columns.latitudes.tolist(), columns.longitudes.tolist(),
+        speeds.tolist(), step_dist.tolist(), players.tolist()
+    ):
+        results.append({
+            'timestamp': timestamp.isoformat(),
+            'mac': mac,
+            'player': player,
+            'latitude': round(latitude, 6) if round_coords else latitude,
+            'longitude': round(longitude, 6) if round_coords else longitude,
+            'speed_kmh': round(speed, 2),
+            'step_dist': round(dist, 2)
+        })
+    return results
+
+
+def _format_results(columns, threshold, round_coords=True, simplification=None, fmt='json'):
+    """
+    Serialize corrected columns in the requested format.
+
+    Returns:
+        List of history JSON records for 'json', otherwise the compact
+        payload (see history_format.py)
+    """
+    prepared = _prepare_columns(columns, threshold, simplification)
+    if fmt == 'json':
+        return _records(*prepared, round_coords)
+    return encode_history(fmt, *prepared)
+
+
+def _format_param(request):
+    """
+    Response format from ?format= / Accept.
+
+    Returns:
+        Tuple (format name or None, error JsonResponse or None)
+    """
+    try:
+        return negotiate_format(request), None
+    except ValueError as e:
+        return None, JsonResponse({'error': str(e)}, status=400)
+
+
+def _simplification_param(request):
+    """
+    Simplification from ?tolerance=, ?resolution= and ?bbox=, if given.
+
+    Returns:
+        Tuple (Simplification or None, error JsonResponse or None)
+    """
+    try:
+        return Simplification.from_params(request.GET), None
+    except ValueError as e:
+        return None, JsonResponse({'error': str(e)}, status=400)
+
+
+def _cache_variant(variant, simplification, fmt):
+    """History cache variant, or None if the response must not be cached"""
+    variant = f'{variant}:{fmt}'
+    return simplification.cache_variant(variant) if simplification else variant
+
+
+def _parse_since(value):
+    """
+    Parse the ?since= cursor of the history endpoints.
+
+    Only row ids are accepted: devices upload in batches, so fixes with an
+    older timestamp keep arriving after a page was served and a timestamp
+    cursor would never return them.
+
+    Returns:
+        ('id', int) (empty = 0 = from the start)
+
+    Raises:
+        ValueError: Not a row id
+    """
+    value = value.strip()
+    if not value or value.isdigit():
+        return 'id', int(value or 0)
+    raise ValueError(f"Invalid since cursor: {value} (expected a row id, see 'next')")
+
+
+def _since_param(request):
+    """
+    Cursor from ?since=, if given.
+
+    Returns:
+        Tuple (cursor or None, error JsonResponse or None)
+    """
+    since = request.GET.get('since')
+    if since is None:
+        return None, None
+    try:
+        return _parse_since(since), None
+    except ValueError as e:
+        return None, JsonResponse({'error': str(e)}, status=400)
+
+
+def _key_mask(columns, keys):
+    """Boolean mask of the rows whose (mac, timestamp) is in keys"""
+    rows = zip(columns.macs.tolist(), columns.timestamps)
+    return np.fromiter((row in keys for row in rows), dtype=bool, count=len(columns))
+
+
+def _history_page(gps_query, match, threshold, cursor, round_coords=True, simplification=None,
+                  fmt='json'):
+    """
+    Points newer than the cursor plus the cursor for the next request.
+
+    The row id cursor returns every row inserted after the previous page,
+    also late fixes with older timestamps. step_dist of a point newer than
+    its MAC's last point before the cursor is measured from that point, so
+    summing step_dist over all pages gives the distance of one full request;
+    late points older than it are measured among themselves.
+
+    Returns:
+        Dict {'points': [...history records...], 'next': cursor} for 'json',
+        otherwise the compact payload with the cursor inside
+    """
+    _, value = cursor
+    rows = list(
+        gps_query.filter(id__gt=value).order_by('timestamp')
+        .values_list('id', *GpsColumns.STORED_FIELDS)
+    )
+    if not rows:
+        if fmt == 'json':
+            return {'points': [], 'next': value}
+        empty = np.zeros(0, dtype=np.float64)
+        return encode_history(
+            fmt, GpsColumns.from_rows([]), empty, empty, np.empty(0, dtype=object), value
+        )
+
+    # Last point per MAC before the cursor (one row per MAC, DISTINCT ON)
+    carried = []
+    if value > 0:
+        carried = list(
+            gps_query.filter(id__lte=value, mac__in={row[2] for row in rows})
+            .order_by('mac', '-timestamp').distinct('mac')
+            .values_list(*GpsColumns.STORED_FIELDS)
+        )
+
+    # Carried rows are merged in timestamp order, so they only anchor the
+    # points after them and late points never measure a step backwards
+    columns, pending = GpsColumns.from_stored_rows(
+        sorted(carried + [row[1:] for row in rows], key=lambda row: row[0])
+    )
+    corrections = _match_corrections(gps_query, match) if pending.any() else None
+    _apply_corrections(columns, match, corrections, pending=pending)
+    carried_keys = {(mac, timestamp) for timestamp, mac, *_ in carried}
+    columns, step_dist, speeds, players = _prepare_columns(
+        columns, threshold, simplification, always_keep=_key_mask(columns, carried_keys)
+    )
+    # Carried rows only anchor step_dist ((mac, timestamp) is unique)
+    page = ~_key_mask(columns, carried_keys)
+    columns, step_dist, speeds, players = (
+        columns.select(page), step_dist[page], speeds[page], players[page]
+    )
+
+    next_cursor = max(row[0] for row in rows)
+
+    if fmt == 'json':
+        return {
+            'points': _records(columns, step_dist, speeds, players, round_coords),
+            'next': next_cursor,
+        }
+    return encode_history(fmt, columns, step_dist, speeds, players, next_cursor)
+
+
+def _streaming_history_response(gps_query, match, threshold):
+    """
+    Stream history as a JSON array without materializing the whole match.
+
+    Rows are read through a server-side cursor ordered by timestamp and use
+    their position corrected at ingest; the stored corrections are only
+    loaded once a row without one comes up. Step distances are computed
+    incrementally per MAC.
+    """
+    rows = gps_query.order_by('timestamp').values_list(
+        *GpsColumns.STORED_FIELDS
+    ).iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+    def generate():
+        corrections = None
+        corrections_loaded = False
+        last_position_by_mac = {}
+        chunk = []
+        separator = ''
+        yield '['
+        try:
+            for timestamp, mac, latitude, longitude, speed_kmh, corrected_lat, corrected_lon in rows:
+                if corrected_lat is not None:
+                    latitude = float(corrected_lat)
+                    longitude = float(corrected_lon)
+                else:
+                    latitude = float(latitude)
+                    longitude = float(longitude)
+                    if not corrections_loaded:
+                        corrections = _match_corrections(gps_query, match)
+                        corrections_loaded = True
+                    if corrections is not None:
+                        correction = corrections.lookup(to_tick(timestamp))
+                        if correction:
+                            latitude += correction[0]
+                            longitude += correction[1]
+
+                step_dist = 0.0
+                previous = last_position_by_mac.get(mac)
+                if previous:
+                    step_dist = haversine_distance(previous[0], previous[1], latitude, longitude)
+                last_position_by_mac[mac] = (latitude, longitude)
+
+                speed = float(speed_kmh) if speed_kmh else 0.0
+                assignment = resolve_assignment(mac, timestamp)
+                chunk.append(separator + json.dumps({
+                    'timestamp': timestamp.isoformat(),
+                    'mac': mac,
+                    'player': str(assignment.player) if assignment else None,
+                    'latitude': round(latitude, 6),
+                    'longitude': round(longitude, 6),
+                    'speed_kmh': round(speed, 2) if speed >= threshold else 0.0,
+                    'step_dist': round(step_dist, 2)
+                }))
+                separator = ','
+
+                if len(chunk) >= STREAM_CHUNK_SIZE:
+                    yield ''.join(chunk)
+                    chunk = []
+        except Exception as e:
+            logger.error(f"[ERROR] streaming get_gps_history: {e}")
+            raise
+        if chunk:
+            yield ''.join(chunk)
+        yield ']'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
 
 @require_GET
 def get_gps_history(request):
     """
     Get GPS history with movement analysis using Django ORM.
+
+    Query parameters:
+        threshold: Speed threshold in km/h (default: 0.8)
+        hours: Number of hours to look back (default: 24) if match not set
+        match: Match ID to filter by match date
+        stream: 1/true to stream the JSON array instead of building it in memory
+        since: Row id cursor; returns {"points": [...], "next": cursor}
+            with only the newer points (since=0 for the first page)
+        tolerance: Per-MAC Ramer-Douglas-Peucker tolerance in metres (EPSG:2180)
+        resolution: Keep the first fix per MAC every N seconds
+        bbox: Viewport filter min_lon,min_lat,max_lon,max_lat (not cached)
+        format: json (default), columnar or binary (see history_format.py);
+            responses are gzip/brotli compressed when the client accepts it
+
+    The full history of a completed match is served from the history cache
+    (gzip, ETag / If-None-Match, see history_cache.py).
     """
     logger.info(f"[DEBUG] get_gps_history called with params: {request.GET.dict()}")
-    
+
+    cursor, error = _since_param(request)
+    if error:
+        return error
+    simplification, error = _simplification_param(request)
+    if error:
+        return error
+    fmt, error = _format_param(request)
+    if error:
+        return error
+
     try:
         threshold = float(request.GET.get('threshold', 0.8))
         hours = int(request.GET.get('hours', 24))
@@ -37,156 +429,42 @@ def get_gps_history(request):
             logger.info(f"[DEBUG] Match found: {match.id}, base_mac={match.base_mac}")
         except Match.DoesNotExist:
             return JsonResponse({'error': 'Match not found'}, status=404)
-    
+
     try:
-        # Get data from last N hours using ORM
-        time_limit = timezone.now() - timedelta(hours=hours)
-        
-        gps_query = GpsData.objects.filter(quality__gt=0)
-
-        if match:
-            gps_query = gps_query.filter(timestamp__date=match.date)
-        else:
-            gps_query = gps_query.filter(timestamp__gt=time_limit)
-        
-        gps_records = list(gps_query.order_by('timestamp').values(
-            'timestamp', 'mac', 'latitude', 'longitude', 'speed_kmh'
-        ))
-
-        # Build correction map if we have base_mac and base coordinates
-        corrections_by_tick = {}
-        if match and match.base_mac and match.base_latitude is not None and match.base_longitude is not None:
-            base_mac = match.base_mac
-            base_lat = float(match.base_latitude)
-            base_lon = float(match.base_longitude)
-            
-            logger.info(f"[DEBUG] Building correction map: base_mac={base_mac}")
-            
-            # Step 1: Get all base_mac points and group by tick (0.1s precision)
-            base_points = [r for r in gps_records if r['mac'] == base_mac]
-            logger.info(f"[DEBUG] Found {len(base_points)} base_mac points")
-            
-            base_ticks = defaultdict(list)
-            for rec in base_points:
-                ts = rec['timestamp']
-                tick_key = ts.replace(microsecond=(ts.microsecond // 100000) * 100000)
-                base_ticks[tick_key].append(rec)
-            
-            # Step 2: Calculate correction for each tick with base_mac data
-            for tick_key in sorted(base_ticks.keys()):
-                tick_recs = base_ticks[tick_key]
-                avg_lat = sum(float(r['latitude']) for r in tick_recs) / len(tick_recs)
-                avg_lon = sum(float(r['longitude']) for r in tick_recs) / len(tick_recs)
-                
-                correction_lat = base_lat - avg_lat
-                correction_lon = base_lon - avg_lon
-                
-                corrections_by_tick[tick_key] = {
-                    'lat': correction_lat,
-                    'lon': correction_lon
-                }
-            
-            logger.info(f"[DEBUG] Calculated corrections for {len(corrections_by_tick)} ticks")
-            
-            # Step 3: Interpolate missing corrections
-            if corrections_by_tick:
-                sorted_ticks = sorted(corrections_by_tick.keys())
-                
-                for i in range(len(sorted_ticks) - 1):
-                    curr_tick = sorted_ticks[i]
-                    next_tick = sorted_ticks[i + 1]
-                    
-                    # Calculate how many ticks are between current and next
-                    tick_diff = (next_tick - curr_tick).total_seconds()
-                    num_gaps = int(tick_diff / 0.1) - 1
-                    
-                    if num_gaps > 0:
-                        curr_corr = corrections_by_tick[curr_tick]
-                        next_corr = corrections_by_tick[next_tick]
-                        
-                        if num_gaps == 1:
-                            # Single gap: average
-                            mid_tick = curr_tick + (next_tick - curr_tick) / 2
-                            corrections_by_tick[mid_tick] = {
-                                'lat': (curr_corr['lat'] + next_corr['lat']) / 2,
-                                'lon': (curr_corr['lon'] + next_corr['lon']) / 2
-                            }
-                        else:
-                            # Multiple gaps: linear interpolation
-                            for gap_idx in range(1, num_gaps + 1):
-                                fraction = gap_idx / (num_gaps + 1)
-                                gap_tick = curr_tick + (next_tick - curr_tick) * fraction
-                                corrections_by_tick[gap_tick] = {
-                                    'lat': curr_corr['lat'] + (next_corr['lat'] - curr_corr['lat']) * fraction,
-                                    'lon': curr_corr['lon'] + (next_corr['lon'] - curr_corr['lon']) * fraction
-                                }
-                
-                logger.info(f"[DEBUG] After interpolation: {len(corrections_by_tick)} corrections available")
-            
-            # Step 4: Apply corrections to all records
-            corrected_records = []
-            for rec in gps_records:
-                ts = rec['timestamp']
-                tick_key = ts.replace(microsecond=(ts.microsecond // 100000) * 100000)
-                
-                if tick_key in corrections_by_tick:
-                    correction = corrections_by_tick[tick_key]
-                    rec['latitude'] = float(rec['latitude']) + correction['lat']
-                    rec['longitude'] = float(rec['longitude']) + correction['lon']
-                
-                corrected_records.append(rec)
-            
-            gps_records = corrected_records
-            logger.info("[DEBUG] Applied corrections to all records")
-        
-        # Calculate step distances for each MAC
-        gps_records_by_mac = defaultdict(list)
-        for rec in gps_records:
-            gps_records_by_mac[rec['mac']].append(rec)
-        
-        for mac, mac_records in gps_records_by_mac.items():
-            for i in range(1, len(mac_records)):
-                curr = mac_records[i]
-                prev = mac_records[i - 1]
-                
-                from ...functions import haversine_distance
-                distance = haversine_distance(
-                    float(prev['latitude']), float(prev['longitude']),
-                    float(curr['latitude']), float(curr['longitude'])
-                )
-                curr['step_dist'] = distance
-        
-        # Flatten back to single list
-        gps_records = []
-        for mac_records in gps_records_by_mac.values():
-            gps_records.extend(mac_records)
-        gps_records.sort(key=lambda r: r['timestamp'])
-        
-        # Filter by threshold
-        gps_records = [
-            rec for rec in gps_records
-            if (rec['timestamp'].microsecond // 100000) % 1 == 0
-        ]
-        
-        # Convert to list and format response
-        results = []
-        for record in gps_records:
-            speed = float(record['speed_kmh']) if record['speed_kmh'] else 0.0
-            results.append({
-                'timestamp': record['timestamp'].isoformat(),
-                'mac': record['mac'],
-                'latitude': round(float(record['latitude']), 6),
-                'longitude': round(float(record['longitude']), 6),
-                'speed_kmh': round(speed, 2) if speed >= threshold else 0.0,
-                'step_dist': round(float(record.get('step_dist', 0.0)), 2)
-            })
-        
-        if results:
-            logger.info(f"[DEBUG] First result: {results[0]}")
-            logger.info(f"[DEBUG] Total results: {len(results)}")
-        
-        return JsonResponse(results, safe=False)
-        
+        gps_query = _history_query(match, hours)
+
+        if cursor == FIRST_PAGE:
+            return cached_history_response(
+                request, match, _cache_variant('history-page', simplification, fmt), threshold,
+                lambda: _history_page(
+                    gps_query, match, threshold, cursor, simplification=simplification, fmt=fmt
+                ),
+            )
+        if cursor:
+            return payload_response(request, _history_page(
+                gps_query, match, threshold, cursor, simplification=simplification, fmt=fmt
+            ))
+
+        # Simplified and compact responses are small, they are built in memory
+        if request.GET.get('stream') in ('1', 'true') and not simplification and fmt == 'json':
+            return _streaming_history_response(gps_query, match, threshold)
+
+        def build():
+            columns = _load_corrected_columns(gps_query, match)
+
+            # Convert to list and format response
+            results = _format_results(columns, threshold, simplification=simplification, fmt=fmt)
+
+            if results and fmt == 'json':
+                logger.info(f"[DEBUG] First result: {results[0]}")
+                logger.info(f"[DEBUG] Total results: {len(results)}")
+            return results
+
+        # Completed matches are served from the history cache (ETag / 304)
+        return cached_history_response(
+            request, match, _cache_variant('history', simplification, fmt), threshold, build
+        )
+
     except Exception as e:
         import traceback
         logger.error(f"[ERROR] get_gps_history: {e}")
@@ -202,14 +480,26 @@ def get_simple_history(request):
     """
     Simplified history endpoint without position hold logic.
     Returns raw GPS data filtered by parameters.
-    
+
     Query parameters:
         threshold: Speed threshold in km/h (default: 0.8)
         hours: Number of hours to look back (default: 24) if match not set
         match: Match ID to filter by match date
+        since: Row id cursor (see get_gps_history)
+        tolerance, resolution, bbox: Track simplification (see get_gps_history)
+        format: json, columnar or binary (see get_gps_history)
     """
     threshold = float(request.GET.get('threshold', 0.8))
     hours = int(request.GET.get('hours', 24))
+    cursor, error = _since_param(request)
+    if error:
+        return error
+    simplification, error = _simplification_param(request)
+    if error:
+        return error
+    fmt, error = _format_param(request)
+    if error:
+        return error
     match_id = request.GET.get('match')
     match = None
     if match_id:
@@ -217,145 +507,148 @@ def get_simple_history(request):
             match = Match.objects.get(id=match_id)
         except Match.DoesNotExist:
             return JsonResponse({'error': 'Match not found'}, status=404)
-    
+
     # Get data from last N hours or match date
-    time_limit = timezone.now() - timedelta(hours=hours)
-    gps_query = GpsData.objects.filter(quality__gt=0)
-    if match:
-        gps_query = gps_query.filter(timestamp__date=match.date)
-    else:
-        gps_query = gps_query.filter(timestamp__gt=time_limit)
-    
-    gps_data = list(gps_query.order_by('timestamp').values(
-        'timestamp', 'mac', 'latitude', 'longitude', 'speed_kmh'
-    ))
-
-    # Build correction map if we have base_mac and base coordinates
-    corrections_by_tick = {}
-    if match and match.base_mac and match.base_latitude is not None and match.base_longitude is not None:
-        base_mac = match.base_mac
-        base_lat = float(match.base_latitude)
-        base_lon = float(match.base_longitude)
-        
-        logger.info(f"[DEBUG simple] Building correction map: base_mac={base_mac}")
-        
-        # Step 1: Get all base_mac points and group by tick (0.1s precision)
-        base_points = [r for r in gps_data if r['mac'] == base_mac]
-        logger.info(f"[DEBUG simple] Found {len(base_points)} base_mac points")
-        
-        base_ticks = defaultdict(list)
-        for rec in base_points:
-            ts = rec['timestamp']
-            tick_key = ts.replace(microsecond=(ts.microsecond // 100000) * 100000)
-            base_ticks[tick_key].append(rec)
-        
-        # Step 2: Calculate correction for each tick with base_mac data
-        for tick_key in sorted(base_ticks.keys()):
-            tick_recs = base_ticks[tick_key]
-            avg_lat = sum(float(r['latitude']) for r in tick_recs) / len(tick_recs)
-            avg_lon = sum(float(r['longitude']) for r in tick_recs) / len(tick_recs)
-            
-            correction_lat = base_lat - avg_lat
-            correction_lon = base_lon - avg_lon
-            
-            corrections_by_tick[tick_key] = {
-                'lat': correction_lat,
-                'lon': correction_lon
-            }
-        
-        logger.info(f"[DEBUG simple] Calculated corrections for {len(corrections_by_tick)} ticks")
-        
-        # Step 3: Interpolate missing corrections
-        if corrections_by_tick:
-            sorted_ticks = sorted(corrections_by_tick.keys())
-            
-            for i in range(len(sorted_ticks) - 1):
-                curr_tick = sorted_ticks[i]
-                next_tick = sorted_ticks[i + 1]
-                
-                # Calculate how many ticks are between current and next
-                tick_diff = (next_tick - curr_tick).total_seconds()
-                num_gaps = int(tick_diff / 0.1) - 1
-                
-                if num_gaps > 0:
-                    curr_corr = corrections_by_tick[curr_tick]
-                    next_corr = corrections_by_tick[next_tick]
-                    
-                    if num_gaps == 1:
-                        # Single gap: average
-                        mid_tick = curr_tick + (next_tick - curr_tick) / 2
-                        corrections_by_tick[mid_tick] = {
-                            'lat': (curr_corr['lat'] + next_corr['lat']) / 2,
-                            'lon': (curr_corr['lon'] + next_corr['lon']) / 2
-                        }
-                    else:
-                        # Multiple gaps: linear interpolation
-                        for gap_idx in range(1, num_gaps + 1):
-                            fraction = gap_idx / (num_gaps + 1)
-                            gap_tick = curr_tick + (next_tick - curr_tick) * fraction
-                            corrections_by_tick[gap_tick] = {
-                                'lat': curr_corr['lat'] + (next_corr['lat'] - curr_corr['lat']) * fraction,
-                                'lon': curr_corr['lon'] + (next_corr['lon'] - curr_corr['lon']) * fraction
-                            }
-            
-            logger.info(f"[DEBUG simple] After interpolation: {len(corrections_by_tick)} corrections available")
-        
-        # Step 4: Apply corrections to all records
-        corrected_records = []
-        for rec in gps_data:
-            ts = rec['timestamp']
-            tick_key = ts.replace(microsecond=(ts.microsecond // 100000) * 100000)
-            
-            if tick_key in corrections_by_tick:
-                correction = corrections_by_tick[tick_key]
-                rec['latitude'] = float(rec['latitude']) + correction['lat']
-                rec['longitude'] = float(rec['longitude']) + correction['lon']
-            
-            corrected_records.append(rec)
-        
-        gps_data = corrected_records
-        logger.info("[DEBUG simple] Applied corrections to all records")
-    
-    # Calculate step distances for each MAC
-    gps_data_by_mac = defaultdict(list)
-    for rec in gps_data:
-        gps_data_by_mac[rec['mac']].append(rec)
-    
-    for mac, mac_records in gps_data_by_mac.items():
-        for i in range(1, len(mac_records)):
-            curr = mac_records[i]
-            prev = mac_records[i - 1]
-            
-            from ...functions import haversine_distance
-            distance = haversine_distance(
-                float(prev['latitude']), float(prev['longitude']),
-                float(curr['latitude']), float(curr['longitude'])
+    gps_query = _history_query(match, hours)
+    if cursor == FIRST_PAGE:
+        return cached_history_response(
+            request, match, _cache_variant('simple-page', simplification, fmt), threshold,
+            lambda: _history_page(gps_query, match, threshold, cursor, False, simplification, fmt),
+        )
+    if cursor:
+        return payload_response(
+            request, _history_page(gps_query, match, threshold, cursor, False, simplification, fmt)
+        )
+
+    def build():
+        columns = _load_corrected_columns(gps_query, match, log_prefix='[DEBUG simple]')
+
+        # Convert to list and format
+        return _format_results(
+            columns, threshold, round_coords=False, simplification=simplification, fmt=fmt
+        )
+
+    return cached_history_response(
+        request, match, _cache_variant('simple', simplification, fmt), threshold, build
+    )
+
+
+async def get_gps_history_async(request):
+    """
+    Async variant of get_gps_history for ASGI deployments (core.asgi)
+
+    Same query parameters and response as get_gps_history (without stream).
+    Rows are fetched with the async ORM; correction runs on the loaded
+    columns. Formatting (player labels may query assignments) and cursor
+    pages (since) run in a worker thread.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    cursor, error = _since_param(request)
+    if error:
+        return error
+    simplification, error = _simplification_param(request)
+    if error:
+        return error
+    fmt, error = _format_param(request)
+    if error:
+        return error
+
+    try:
+        threshold = float(request.GET.get('threshold', 0.8))
+        hours = int(request.GET.get('hours', 24))
+    except (ValueError, TypeError):
+        threshold = 0.8
+        hours = 24
+
+    match_id = request.GET.get('match')
+    match = None
+    if match_id:
+        try:
+            match = await Match.objects.aget(id=match_id)
+        except Match.DoesNotExist:
+            return JsonResponse({'error': 'Match not found'}, status=404)
+
+    try:
+        async def build_page():
+            return await sync_to_async(_history_page)(
+                _history_query(match, hours), match, threshold, cursor,
+                simplification=simplification, fmt=fmt,
             )
-            curr['step_dist'] = distance
-    
-    # Flatten back to single list
-    gps_data = []
-    for mac_records in gps_data_by_mac.values():
-        gps_data.extend(mac_records)
-    gps_data.sort(key=lambda r: r['timestamp'])
-    
-    # Filter by threshold
-    gps_data = [
-        rec for rec in gps_data
-        if (rec['timestamp'].microsecond // 100000) % 1 == 0
-    ]
-    
-    # Convert to list and format
-    results = []
-    for item in gps_data:
-        speed = float(item['speed_kmh']) if item['speed_kmh'] else 0.0
-        results.append({
-            'timestamp': item['timestamp'].isoformat(),
-            'mac': item['mac'],
-            'latitude': float(item['latitude']),
-            'longitude': float(item['longitude']),
-            'speed_kmh': round(speed, 2) if speed >= threshold else 0.0,
-            'step_dist': round(float(item.get('step_dist', 0.0)), 2)
-        })
-    
-    return JsonResponse(results, safe=False)
+
+        if cursor == FIRST_PAGE:
+            return await acached_history_response(
+                request, match, _cache_variant('history-page', simplification, fmt), threshold, build_page
+            )
+        if cursor:
+            return payload_response(request, await build_page())
+
+        async def build():
+            columns = await _aload_corrected_columns(_history_query(match, hours), match)
+            # Player labels may load assignments with the sync ORM
+            return await sync_to_async(_format_results)(
+                columns, threshold, simplification=simplification, fmt=fmt
+            )
+
+        return await acached_history_response(
+            request, match, _cache_variant('history', simplification, fmt), threshold, build
+        )
+
+    except Exception as e:
+        logger.error(f"[ERROR] get_gps_history_async: {e}")
+        return JsonResponse({
+            'error': str(e),
+            'type': type(e).__name__
+        }, status=500)
+
+
+async def get_simple_history_async(request):
+    """
+    Async variant of get_simple_history for ASGI deployments (core.asgi)
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    threshold = float(request.GET.get('threshold', 0.8))
+    hours = int(request.GET.get('hours', 24))
+    cursor, error = _since_param(request)
+    if error:
+        return error
+    simplification, error = _simplification_param(request)
+    if error:
+        return error
+    fmt, error = _format_param(request)
+    if error:
+        return error
+    match_id = request.GET.get('match')
+    match = None
+    if match_id:
+        try:
+            match = await Match.objects.aget(id=match_id)
+        except Match.DoesNotExist:
+            return JsonResponse({'error': 'Match not found'}, status=404)
+
+    async def build_page():
+        return await sync_to_async(_history_page)(
+            _history_query(match, hours), match, threshold, cursor, False, simplification, fmt
+        )
+
+    if cursor == FIRST_PAGE:
+        return await acached_history_response(
+            request, match, _cache_variant('simple-page', simplification, fmt), threshold, build_page
+        )
+    if cursor:
+        return payload_response(request, await build_page())
+
+    async def build():
+        columns = await _aload_corrected_columns(
+            _history_query(match, hours), match, log_prefix='[DEBUG simple]'
+        )
+        return await sync_to_async(_format_results)(
+            columns, threshold, round_coords=False, simplification=simplification, fmt=fmt
+        )
+
+    return await acached_history_response(
+        request, match, _cache_variant('simple', simplification, fmt), threshold, build
+    )
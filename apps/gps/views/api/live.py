@@ -0,0 +1,155 @@
+"""
+GPS Live Feed API
+Server-sent events stream of new fixes for a match (ASGI)
+
+The stream replaces polling /history/ for live tracking: the client loads
+the history once, then receives every newly ingested and corrected fix of
+the match as it is written (see apps/gps/live.py).
+
+Events:
+    event: fixes
+    data: [{"timestamp", "mac", "latitude", "longitude", "speed_kmh", "step_dist"}, ...]
+
+A comment line is sent as heartbeat while nothing is ingested. The stream
+ends after GPS_LIVE_MAX_SECONDS; EventSource reconnects on its own.
+
+/live/ answers "where is everyone now" from the in-memory latest positions
+store (see apps/gps/latest.py) without a database query.
+"""
+import json
+import logging
+import time
+from django.conf import settings
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from ...latest import get_latest_store, latest_positions
+from ...live import get_live_hub, live_enabled
+from ...models import Match
+
+logger = logging.getLogger(__name__)
+
+# Seconds between heartbeat comments (keeps proxies from closing the stream)
+HEARTBEAT_SECONDS = 15
+
+# Reconnect delay sent to EventSource, in milliseconds
+RETRY_MS = 3000
+
+
+def _threshold_points(points, threshold):
+    """Zero speeds below threshold, as /history/ does"""
+    if not threshold:
+        return points
+    return [
+        dict(point, speed_kmh=0.0) if point['speed_kmh'] < threshold else point
+        for point in points
+    ]
+
+
+async def _event_stream(match, threshold, max_seconds):
+    """Subscribe on the first iteration so the finally block always unsubscribes"""
+    hub = get_live_hub()
+    subscription = hub.subscribe(match)
+    logger.info(f"[LIVE] Match {match.id}: subscriber opened ({hub.stats()['subscribers']} total)")
+
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            points = await subscription.get(min(HEARTBEAT_SECONDS, remaining))
+            if points is None:
+                yield ': ping\n\n'
+                continue
+            data = json.dumps(_threshold_points(points, threshold))
+            yield f'event: fixes\ndata: {data}\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+        logger.info(
+            f"[LIVE] Match {subscription.match_id}: subscriber closed, "
+            f"dropped {subscription.dropped} points"
+        )
+
+
+async def live_stream(request):
+    """
+    Subscribe to live fixes of a match (text/event-stream)
+
+    GET parameters:
+        match: Match ID (required)
+        threshold: Speed threshold in km/h (default: 0.8)
+
+    Requires an ASGI server (uvicorn core.asgi:application) with a single
+    worker process; answers 404 unless GPS_LIVE_ENABLED is set.
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    if not live_enabled():
+        return JsonResponse({'error': 'Live stream disabled (GPS_LIVE_ENABLED)'}, status=404)
+
+    match_id = request.GET.get('match')
+    if not match_id:
+        return JsonResponse({'error': 'Missing match parameter'}, status=400)
+
+    try:
+        threshold = float(request.GET.get('threshold', 0.8))
+    except (ValueError, TypeError):
+        threshold = 0.8
+
+    try:
+        match = await Match.objects.aget(id=match_id)
+    except (Match.DoesNotExist, ValueError):
+        return JsonResponse({'error': 'Match not found'}, status=404)
+
+    response = StreamingHttpResponse(
+        _event_stream(match, threshold, settings.GPS_LIVE_MAX_SECONDS),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Disable response buffering in nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def live_positions(request):
+    """
+    Newest position of every MAC, from memory
+
+    GET parameters:
+        mac: Only these MACs (comma separated or repeated)
+        points: Fixes per MAC, 1 to GPS_LATEST_SIZE (default: 1); with more
+            than one the response adds a track per MAC, oldest first
+        max_age: Only MACs with a fix in the last max_age seconds
+
+    Returns:
+        JSON {"positions": [{"mac", "player", "timestamp", "latitude",
+        "longitude", "speed_kmh", "corrected", "track"?}, ...], "store": stats},
+        most recently seen MAC first
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    macs = [
+        mac.strip() for value in request.GET.getlist('mac')
+        for mac in value.split(',') if mac.strip()
+    ] or None
+
+    store = get_latest_store()
+    try:
+        points = min(max(int(request.GET.get('points', 1)), 1), store.capacity)
+        max_age = float(request.GET['max_age']) if request.GET.get('max_age') else None
+    except ValueError:
+        return JsonResponse({'error': 'points and max_age must be numbers'}, status=400)
+
+    return JsonResponse({
+        'positions': latest_positions(macs, points, max_age),
+        'store': store.stats(),
+    })
+
+
+async def live_stats(request):
+    """Live feed metrics (matches, subscribers, published, dropped)"""
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+    return JsonResponse(get_live_hub().stats())
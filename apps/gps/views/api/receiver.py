@@ -3,34 +3,26 @@ GPS Data Receiver API
 Converted from gps.php
 
 This view receives GPS data from devices via POST requests,
-parses NMEA sentences (GGA and RMC), and stores them in the database.
+parses NMEA sentences (GGA and RMC, checksum validated), and stores them in the database.
 """
 import logging
 from datetime import datetime
 from django.utils import timezone
-from django.http import JsonResponse
+from django.http import HttpResponseNotAllowed, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
-from ...functions import convert_to_decimal
+from django.views.decorators.http import require_GET, require_POST
+from ...binary import BinaryFrameError, decode_frame, records_to_gps_data
+from ...ingest import abulk_insert_gps_data, bulk_insert_gps_data
+from ...ingest_queue import get_ingest_queue, queue_enabled
 from ...models import GpsData
+from ...nmea import parse_payload
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 
-@csrf_exempt
-@require_POST
-def receive_gps_data(request):
-    """
-    Receive and process GPS data from devices
-    
-    POST parameters:
-        gps_raw: Raw NMEA sentences (newline separated)
-        mac: Device MAC address
-    
-    Returns:
-        JSON response with status
-    """
+def _read_payload(request):
+    """Extract and log gps_raw and mac from a device request"""
     # Try both POST and GET parameters (in case nginx forwards as GET)
     gps_raw = request.POST.get('gps_raw', '') or request.GET.get('gps_raw', '')
     mac = request.POST.get('mac', '') or request.GET.get('mac', '')
@@ -40,63 +32,134 @@ def receive_gps_data(request):
     logger.info(f"[INCOMING] RAW GPS: {gps_raw[:500] if gps_raw else 'EMPTY'}")
     logger.debug(f"[INCOMING] Full payload length: {len(gps_raw)} chars")
     
-    if not gps_raw or not mac:
-        logger.warning(f"[ERROR] Missing parameters - MAC: {bool(mac)}, GPS_RAW: {bool(gps_raw)}")
-        return JsonResponse({
+    return gps_raw, mac
+
+
+def _missing_parameters_response(gps_raw, mac):
+    """400 response for requests without gps_raw or mac"""
+    logger.warning(f"[ERROR] Missing parameters - MAC: {bool(mac)}, GPS_RAW: {bool(gps_raw)}")
+    return JsonResponse({
+        'status': 'error',
+        'message': 'Missing gps_raw or mac parameter'
+    }, status=400)
+
+
+def _queue_records(records, skipped_count, mac):
+    """Submit records to the ingest queue and build the 202/503 response"""
+    ingest_queue = get_ingest_queue()
+    if not ingest_queue.submit(records):
+        reason = 'database unavailable' if ingest_queue.failing else 'ingest queue full'
+        logger.warning(f"[BACKPRESSURE] PLAYER {mac}: {reason}, rejected {len(records)} records")
+        response = JsonResponse({
             'status': 'error',
-            'message': 'Missing gps_raw or mac parameter'
-        }, status=400)
+            'message': f'{reason.capitalize()}, retry later'
+        }, status=503)
+        response['Retry-After'] = '1'
+        return response
     
-    logger.info(f"[PROCESS] PLAYER {mac} - zgłosił się")
+    logger.info(f"[RESULT] PLAYER {mac}: Queued {len(records)} records, Skipped {skipped_count} records")
+    return JsonResponse({
+        'status': 'queued',
+        'queued': len(records),
+        'skipped': skipped_count
+    }, status=202)
+
+
+def _insert_failed_response(records, mac, error):
+    """503 for a batch that could not be written, so the device sends it again"""
+    logger.error(f"[ERROR] PLAYER {mac}: Error inserting GPS batch of {len(records)} records: {error}")
+    response = JsonResponse({
+        'status': 'error',
+        'message': 'Storing GPS data failed, retry later'
+    }, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+def _result_response(records, inserted_count, skipped_count, mac):
+    """Log and report the outcome of a synchronous write"""
+    duplicate_count = len(records) - inserted_count
+    logger.info(
+        f"[RESULT] PLAYER {mac}: Inserted {inserted_count} records, "
+        f"Duplicates {duplicate_count} records, Skipped {skipped_count} records"
+    )
+    
+    return JsonResponse({
+        'status': 'success',
+        'inserted': inserted_count,
+        'duplicates': duplicate_count,
+        'skipped': skipped_count
+    })
+
+
+def _store_records(records, skipped_count, mac):
+    """Write (or queue) parsed records and build the device response"""
+    if queue_enabled():
+        # Hand the batch to the background writer and answer right away
+        return _queue_records(records, skipped_count, mac)
+    
+    try:
+        inserted_count = bulk_insert_gps_data(records)
+    except Exception as e:
+        return _insert_failed_response(records, mac, e)
+    
+    return _result_response(records, inserted_count, skipped_count, mac)
+
+
+def parse_gps_records(gps_raw, mac):
+    """
+    Parse raw NMEA sentences into unsaved GpsData records
+    
+    Args:
+        gps_raw: Raw NMEA sentences (newline separated)
+        mac: Device MAC address
     
-    lines = gps_raw.strip().split('\n')
-    logger.info(f"[PROCESS] Number of NMEA lines: {len(lines)}")
+    Returns:
+        Tuple (records, skipped_count)
+    """
+    sentences, rejected = parse_payload(gps_raw)
+    logger.info(f"[PROCESS] Number of NMEA sentences: {len(sentences)}, rejected lines: {rejected}")
     buffer = {}
     
-    # Parse NMEA sentences
-    for line in lines:
-        parts = line.strip().split(',')
-        if len(parts) < 2:
-            logger.debug(f"[PARSE] Skipping malformed line: {line}")
+    # Merge GGA and RMC sentences by fix time
+    for sentence in sentences:
+        if sentence.kind not in ('GGA', 'RMC'):
             continue
         
-        # Extract sentence type (GGA or RMC)
-        sentence_type = parts[0][3:6] if len(parts[0]) >= 6 else ''
-        time_str = parts[1]  # hhmmss or hhmmss.sss
-        
+        time_str = sentence.time  # hhmmss or hhmmss.sss
         if not time_str:
-            logger.debug(f"[PARSE] No time in sentence: {line}")
+            logger.debug(f"[PARSE] No time in sentence: {sentence}")
             continue
         
-        logger.debug(f"[PARSE] Sentence type: {sentence_type}, Time: {time_str}")
+        logger.debug(f"[PARSE] Sentence type: {sentence.kind}, Time: {time_str}")
         
         # Initialize buffer entry
         if time_str not in buffer:
             buffer[time_str] = {'mac': mac}
+        row = buffer[time_str]
         
-        # Parse GGA sentence (position and quality)
-        if sentence_type == 'GGA' and len(parts) >= 10:
-            buffer[time_str]['lat'] = convert_to_decimal(parts[2], parts[3])
-            buffer[time_str]['lon'] = convert_to_decimal(parts[4], parts[5])
-            buffer[time_str]['qual'] = int(parts[6]) if parts[6] else 0
-            buffer[time_str]['sats'] = int(parts[7]) if parts[7] else 0
-            buffer[time_str]['hdop'] = float(parts[8]) if parts[8] else 0.0
-            buffer[time_str]['alt'] = float(parts[9]) if parts[9] else 0.0
+        # GGA sentence (position and quality)
+        if sentence.kind == 'GGA':
+            row['lat'] = sentence.latitude if sentence.latitude is not None else False
+            row['lon'] = sentence.longitude if sentence.longitude is not None else False
+            row['qual'] = sentence.quality
+            row['sats'] = sentence.satellites
+            row['hdop'] = sentence.hdop
+            row['alt'] = sentence.altitude
         
-        # Parse RMC sentence (speed, course, date)
-        elif sentence_type == 'RMC' and len(parts) >= 10:
-            # Convert speed from knots to km/h (1 knot = 1.852 km/h)
-            buffer[time_str]['speed'] = float(parts[7]) * 1.852 if parts[7] else 0.0
-            buffer[time_str]['course'] = float(parts[8]) if parts[8] else 0.0
-            buffer[time_str]['date'] = parts[9]
+        # RMC sentence (speed, course, date)
+        else:
+            row['speed'] = sentence.speed_kmh
+            row['course'] = sentence.course
+            row['date'] = sentence.date
             
             # Use RMC position if GGA not available
-            if 'lat' not in buffer[time_str] or buffer[time_str]['lat'] is False:
-                buffer[time_str]['lat'] = convert_to_decimal(parts[3], parts[4])
-                buffer[time_str]['lon'] = convert_to_decimal(parts[5], parts[6])
+            if row.get('lat', False) is False:
+                row['lat'] = sentence.latitude if sentence.latitude is not None else False
+                row['lon'] = sentence.longitude if sentence.longitude is not None else False
     
-    # Insert valid records into database
-    inserted_count = 0
+    # Build valid records
+    records = []
     skipped_count = 0
 
     date_str = ''
@@ -161,18 +224,111 @@ def receive_gps_data(request):
                 course=row.get('course', 0.0),
                 quality=quality
             )
-            gps_data.save()
-            inserted_count += 1
-            logger.debug(f"[INSERT] Inserted record: {timestamp}, Lat: {row['lat']}, Lon: {row['lon']}, Sats: {sats}")
+            records.append(gps_data)
+            logger.debug(f"[INSERT] Queued record: {timestamp}, Lat: {row['lat']}, Lon: {row['lon']}, Sats: {sats}")
             
         except Exception as e:
-            logger.error(f"[ERROR] Error inserting GPS record: {e}, Row: {row}")
+            logger.error(f"[ERROR] Error building GPS record: {e}, Row: {row}")
             continue
     
-    logger.info(f"[RESULT] PLAYER {mac}: Inserted {inserted_count} records, Skipped {skipped_count} records")
+    return records, skipped_count
+
+
+@csrf_exempt
+@require_POST
+def receive_gps_data(request):
+    """
+    Receive and process GPS data from devices
+    
+    POST parameters:
+        gps_raw: Raw NMEA sentences (newline separated)
+        mac: Device MAC address
     
-    return JsonResponse({
-        'status': 'success',
-        'inserted': inserted_count,
-        'skipped': skipped_count
-    })
+    Returns:
+        JSON response with status (202 when queued, 503 when the ingest queue
+        is full or the batch could not be written; the device retries it)
+    """
+    gps_raw, mac = _read_payload(request)
+    if not gps_raw or not mac:
+        return _missing_parameters_response(gps_raw, mac)
+    
+    logger.info(f"[PROCESS] PLAYER {mac} - zgłosił się")
+    records, skipped_count = parse_gps_records(gps_raw, mac)
+    
+    return _store_records(records, skipped_count, mac)
+
+
+@csrf_exempt
+@require_POST
+def receive_gps_binary(request):
+    """
+    Receive packed binary GPS frames from devices
+    
+    Body (application/octet-stream):
+        Frame with MAC header and fixed-width records, see apps/gps/binary.py
+    
+    Returns:
+        Same JSON responses as receive_gps_data, 400 for malformed frames
+    """
+    data = request.body
+    
+    try:
+        mac, frame_records = decode_frame(data)
+    except BinaryFrameError as e:
+        logger.warning(f"[ERROR] Invalid binary frame ({len(data)} bytes): {e}")
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
+    
+    logger.info(f"[INCOMING] BINARY MAC: {mac}, {len(frame_records)} records, {len(data)} bytes")
+    records, skipped_count = records_to_gps_data(mac, frame_records)
+    
+    return _store_records(records, skipped_count, mac)
+
+
+async def receive_gps_data_async(request):
+    """
+    Async variant of receive_gps_data for ASGI deployments (core.asgi)
+    
+    Same parameters and responses as receive_gps_data. Records are written
+    with the async ORM, so a single ASGI worker can keep many device
+    connections open without tying up a thread per request.
+    """
+    if request.method != 'POST':
+        return HttpResponseNotAllowed(['POST'])
+    
+    gps_raw, mac = _read_payload(request)
+    if not gps_raw or not mac:
+        return _missing_parameters_response(gps_raw, mac)
+    
+    logger.info(f"[PROCESS] PLAYER {mac} - zgłosił się")
+    records, skipped_count = parse_gps_records(gps_raw, mac)
+    
+    if queue_enabled():
+        return _queue_records(records, skipped_count, mac)
+    
+    try:
+        inserted_count = await abulk_insert_gps_data(records)
+    except Exception as e:
+        return _insert_failed_response(records, mac, e)
+    
+    return _result_response(records, inserted_count, skipped_count, mac)
+
+
+# csrf_exempt/require_POST only wrap async views from Django 5.0 on
+receive_gps_data_async.csrf_exempt = True
+
+
+@require_GET
+def ingest_stats(request):
+    """
+    Ingest queue depth and throughput metrics
+    
+    Returns:
+        JSON with ingest mode and queue counters (when the queue is enabled)
+    """
+    if not queue_enabled():
+        return JsonResponse({'mode': 'sync'})
+    
+    return JsonResponse({'mode': 'queue', **get_ingest_queue().stats()})
@@ -5,6 +5,7 @@ Renders web interface for GPS visualization
 from django.shortcuts import render
 from django.http import Http404
 from django.views.decorators.http import require_GET
+from apps.gps.live import live_enabled
 from apps.gps.models import Match
 
 
@@ -15,7 +16,8 @@ def gps_map_view(request):
     Accepts optional ?match=<id> to filter map data to a specific match date
     """
     match_id = request.GET.get('match')
-    context = {}
+    # Without the live stream the map polls ?since=
+    context = {'live_enabled': live_enabled()}
 
     if match_id:
         try:
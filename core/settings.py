@@ -169,6 +169,36 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 THUMBS_QUALITY = 100
 
+# GPS ingest: 'sync' writes in the request, 'queue' answers 202 and writes
+# from a background thread (see apps/gps/ingest_queue.py)
+GPS_INGEST_MODE = env.str('GPS_INGEST_MODE', default='sync')
+GPS_INGEST_QUEUE_SIZE = env.int('GPS_INGEST_QUEUE_SIZE', default=50000)
+GPS_INGEST_BATCH_SIZE = env.int('GPS_INGEST_BATCH_SIZE', default=2000)
+GPS_INGEST_FLUSH_INTERVAL = env.float('GPS_INGEST_FLUSH_INTERVAL', default=0.5)
+
+# Cache of completed matches' history responses (apps/gps/history_cache.py).
+# Local disk by default; set GPS_HISTORY_CACHE_URL to e.g. redis://host:6379/1
+# (maxmemory-policy allkeys-lru) for LRU eviction shared by all workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'history': env.cache_url(
+        'GPS_HISTORY_CACHE_URL',
+        default=f"filecache://{BASE_DIR / 'tmp' / 'history_cache'}?max_entries=500",
+    ),
+}
+
+# GPS live feed (server-sent events, see apps/gps/live.py): only for a single
+# ASGI worker process; batches buffered per subscriber and lifetime of one
+# stream before the client reconnects
+GPS_LIVE_ENABLED = env.bool('GPS_LIVE_ENABLED', default=False)
+GPS_LIVE_QUEUE_SIZE = env.int('GPS_LIVE_QUEUE_SIZE', default=256)
+GPS_LIVE_MAX_SECONDS = env.int('GPS_LIVE_MAX_SECONDS', default=600)
+
+# Newest fixes kept in memory per MAC for /live/ (see apps/gps/latest.py)
+GPS_LATEST_SIZE = env.int('GPS_LATEST_SIZE', default=50)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,